@@ -17,7 +17,9 @@ from time import sleep
 
 from service.utils import constants
 from service.utils.environment import Environment
+from service.utils.kerberos_util import KerberosUtil
 from service.utils.rest_util import RestUtil
+from service.utils.sw_session_manager import SwSessionManager
 from service.exception.exceptions import ServiceError, ObjectNotFoundError
 
 
@@ -28,9 +30,9 @@ class LivyClient:
         self.url = Environment().get_spark_livy_url()
         self.auth = None
         if Environment().is_kerberos_enabled():
-            from requests_kerberos import HTTPKerberosAuth, REQUIRED
-            self.auth = HTTPKerberosAuth(
-                mutual_authentication=REQUIRED, sanitize_mutual_error_response=False)
+            # Use the credential cache of the principal the request is served for
+            principal = SwSessionManager().get_session().get_user_principal()
+            self.auth = KerberosUtil.get_http_auth(principal)
 
     def run_batch_job(self, job_json, background=True, timeout=constants.SYNC_JOB_MAX_WAIT_TIME):
         """
@@ -44,7 +46,7 @@ class LivyClient:
              response {dict} -- Dictionary with job id, state and the application id.
         """
         job_url = "{}/batches".format(self.url)
-        response = RestUtil.request_with_retry().post(
+        response = RestUtil.request_with_retry(upstream="livy").post(
             url=job_url, json=job_json, headers={"Content-Type": "application/json"}, auth=self.auth)
 
         if not response.ok:
@@ -91,7 +93,7 @@ class LivyClient:
         """
         job_url = "{}/batches/{}".format(self.url, job_id)
 
-        response = RestUtil.request_with_retry().get(url=job_url, auth=self.auth)
+        response = RestUtil.request_with_retry(upstream="livy").get(url=job_url, auth=self.auth)
 
         if not response.ok:
             if response.status_code == 404:
@@ -126,7 +128,7 @@ class LivyClient:
         if size is not None and size > 0:
             job_logs_url = job_logs_url + "?size={}".format(size)
 
-        response = RestUtil.request_with_retry().get(url=job_logs_url, auth=self.auth)
+        response = RestUtil.request_with_retry(upstream="livy").get(url=job_logs_url, auth=self.auth)
 
         if not response.ok:
             if response.status_code == 404:
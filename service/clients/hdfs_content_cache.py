@@ -0,0 +1,222 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import fcntl
+import hashlib
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from service.utils.environment import Environment
+from service.utils.sw_logger import SwLogger
+from service.utils.sw_singleton import SwSingleton
+
+logger = SwLogger(__name__)
+
+
+class CacheWriter:
+    """Writes the content of a file into the cache while it is being streamed to the client"""
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.temp_path = os.path.join(cache.cache_dir, HdfsContentCache.TEMP_FILE_PREFIX + uuid.uuid4().hex)
+        self.file = open(self.temp_path, "wb")
+        self.size = 0
+
+    def write(self, chunk):
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self, expected_size=None):
+        """Adds the written content to the cache, unless it doesn't have the expected size"""
+        self.file.close()
+        if expected_size is not None and self.size != expected_size:
+            self.abort()
+            return
+        self.cache.add_file(self.key, self.temp_path)
+
+    def abort(self):
+        if not self.file.closed:
+            self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+
+class HdfsContentCache(metaclass=SwSingleton):
+    """
+    Local disk cache of the content of HDFS files and directory archives, bounded by the total number of bytes
+    and evicting the least recently used entries first. Entries are keyed by the user reading them along with the
+    path, its length and modification time, so a changed HDFS file never matches a stale entry and a user is never
+    served the content read with the permissions of another user.
+
+    The cache directory is shared by the gunicorn workers. The byte budget is enforced on the whole directory while
+    holding its lock file, the last use of an entry being recorded in its modification time.
+    """
+
+    TEMP_FILE_PREFIX = ".tmp-"
+    LOCK_FILE_NAME = ".lock"
+    # Age in seconds after which the temp files left behind by a killed worker are removed
+    STALE_TEMP_FILE_AGE = 3600
+
+    def __init__(self):
+        self.cache_dir = Environment().get_hdfs_content_cache_dir()
+        self.max_bytes = int(Environment().get_hdfs_content_cache_max_bytes())
+        self.max_file_bytes = int(Environment().get_hdfs_content_cache_max_file_bytes())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        if self.is_enabled():
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with self.__lock_directory():
+                entries, size = self.__evict()
+            logger.log_info("Found {} entries of {} bytes in the HDFS content cache".format(len(entries), size))
+
+    def is_enabled(self):
+        return self.max_bytes > 0
+
+    def is_cacheable(self, size):
+        return self.is_enabled() and size is not None and size <= min(self.max_file_bytes, self.max_bytes)
+
+    @staticmethod
+    def get_file_key(path, file_status, user=None):
+        """
+        Returns the key of a HDFS file identified by its path and FileStatus, also used as its entity tag.
+        The content cache keys its entries by the user reading the file.
+        """
+        signature = "{}:{}:{}:{}".format(path, file_status.get("fileId"), file_status.get("length"),
+                                         file_status.get("modificationTime"))
+        if user is not None:
+            signature = "{}:{}".format(user, signature)
+        return hashlib.sha256(signature.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get_directory_key(path, file_statuses, compress=True, user=None):
+        """
+        Returns the key of the archive of a HDFS directory identified by the FileStatus of its contents, also used
+        as its entity tag. The content cache keys its entries by the user reading the directory.
+        """
+        extension = ".tar.gz" if compress else ".tar"
+        digest = hashlib.sha256((path + extension).encode("utf-8"))
+        if user is not None:
+            digest.update("\n{}".format(user).encode("utf-8"))
+        for relative_path, file_status in sorted(file_statuses, key=lambda f: f[0]):
+            digest.update("\n{}:{}:{}:{}".format(relative_path, file_status.get("type"), file_status.get("length"),
+                                                 file_status.get("modificationTime")).encode("utf-8"))
+        return digest.hexdigest() + extension
+
+    def get(self, key):
+        """
+        Returns the local path of the cached content for the key
+
+        Returns:
+            path {str} -- The local file path, None on a cache miss
+        """
+        path = os.path.join(self.cache_dir, key)
+        try:
+            # Records the use of the entry for the LRU order shared by the workers
+            os.utime(path)
+        except OSError:
+            # Never cached, or evicted by another worker
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return path
+
+    def open_writer(self, key):
+        return CacheWriter(self, key)
+
+    def add_file(self, key, local_path):
+        """Moves the local file into the cache under the key, evicting the least recently used entries over budget"""
+        path = os.path.join(self.cache_dir, key)
+        size = os.path.getsize(local_path)
+        if not self.is_cacheable(size):
+            os.remove(local_path)
+            return None
+        with self.__lock_directory():
+            os.replace(local_path, path)
+            os.utime(path)
+            self.__evict()
+        return path
+
+    def get_stats(self):
+        entries, size = self.__get_entries()
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "size_bytes": size,
+                "max_bytes": self.max_bytes
+            }
+
+    @contextmanager
+    def __lock_directory(self):
+        """Holds the lock file of the cache directory, serializing the additions of the workers of the host"""
+        with self.lock, open(os.path.join(self.cache_dir, self.LOCK_FILE_NAME), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __evict(self):
+        """Removes the least recently used entries until the directory is within the byte budget"""
+        entries, size = self.__get_entries()
+        entries.sort()
+        while size > self.max_bytes and entries:
+            _, name, entry_size = entries.pop(0)
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            size -= entry_size
+            self.evictions += 1
+        return entries, size
+
+    def __get_entries(self):
+        """
+        Lists the entries of the cache directory, the temp files left behind by a killed worker are removed
+
+        Returns:
+            entries {list}, size {int} -- The (last use time, name, size) of the entries and their total size
+        """
+        entries = []
+        size = 0
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if name.startswith(self.TEMP_FILE_PREFIX):
+                if now - stat.st_mtime > self.STALE_TEMP_FILE_AGE:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                continue
+            if name == self.LOCK_FILE_NAME:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+            size += stat.st_size
+        return entries, size
@@ -0,0 +1,46 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+from service.utils.environment import Environment
+from service.utils.sw_singleton import SwSingleton
+from service.utils.ttl_cache import TtlCache
+
+
+class HdfsContentSummaryCache(metaclass=SwSingleton):
+    """
+    Process wide cache of the ContentSummary of the HDFS paths, keyed by user and path. An entry holds the
+    modification time of the path it was computed for, it is used only while the path has the same one.
+    The modification time of a directory changes with its direct entries only, the short time to live
+    bounds how long a change deeper in the directory goes unnoticed.
+    """
+
+    def __init__(self):
+        self.ttl = int(Environment().get_hdfs_content_summary_cache_ttl())
+        self.cache = TtlCache(max_size=int(Environment().get_hdfs_content_summary_cache_max_entries()), ttl=self.ttl)
+
+    def is_enabled(self):
+        return self.ttl > 0
+
+    def get(self, user, path, modification_time):
+        """Returns the cached ContentSummary of the path if it was computed for the modification time"""
+        if not self.is_enabled():
+            return None
+        entry = self.cache.get((user, path))
+        if entry is None or entry[0] != modification_time:
+            return None
+        return entry[1]
+
+    def put(self, user, path, modification_time, content_summary):
+        if not self.is_enabled():
+            return
+        self.cache.put((user, path), (modification_time, content_summary))
@@ -0,0 +1,76 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+from service.utils.environment import Environment
+from service.utils.sw_singleton import SwSingleton
+from service.utils.ttl_cache import TtlCache
+
+
+class ResolvedPath:
+    """Result of resolving a requested path to the HDFS file to be downloaded"""
+
+    def __init__(self, path, file_status=None, is_file_path=False):
+        # Resolved path of the file, or None when the requested path does not exist
+        self.path = path
+        # FileStatus of the resolved file
+        self.file_status = file_status
+        # Flag indicating that the requested path is the file itself and not a directory leading to it
+        self.is_file_path = is_file_path
+
+    def is_not_found(self):
+        return self.path is None
+
+
+class HdfsMetadataCache(metaclass=SwSingleton):
+    """
+    Process wide cache of the download paths resolved from HDFS listings, keyed by user and requested path.
+    Paths that were not found are cached for a shorter time.
+    """
+
+    NOT_FOUND = ResolvedPath(None)
+
+    def __init__(self):
+        self.ttl = int(Environment().get_hdfs_metadata_cache_ttl())
+        self.negative_ttl = int(Environment().get_hdfs_metadata_cache_negative_ttl())
+        self.cache = TtlCache(max_size=int(Environment().get_hdfs_metadata_cache_max_entries()), ttl=self.ttl)
+
+    def is_enabled(self):
+        return self.ttl > 0
+
+    def get_resolved_path(self, user, path):
+        """
+        Returns the cached resolution of the path for the user
+
+        Returns:
+            (resolved_path, expired) -- The cached ResolvedPath or None, and a flag indicating if it has to be revalidated
+        """
+        return self.cache.get_entry((user, path))
+
+    def put_resolved_path(self, user, path, resolved_path):
+        if not self.is_enabled():
+            return
+        ttl = self.negative_ttl if resolved_path.is_not_found() else self.ttl
+        self.cache.put((user, path), resolved_path, ttl=ttl)
+
+    def invalidate(self, path):
+        """
+        Removes the entries of all users affected by a change of the path, ie. the entries of the path itself,
+        of the paths under it and of the directories above it.
+        """
+        path = path.strip("/")
+
+        def is_affected(key, resolved_path):
+            cached_path = key[1].strip("/")
+            return cached_path == path or cached_path.startswith(path + "/") or path.startswith(cached_path + "/")
+
+        self.cache.remove_if(is_affected)
@@ -0,0 +1,122 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+from collections import deque
+
+from service.utils.environment import Environment
+from service.utils.sw_executor import SwExecutor
+from service.utils.sw_logger import SwLogger
+
+logger = SwLogger(__name__)
+
+READ_POOL = "hdfs-read"
+MAX_SEGMENT_RETRIES = 3
+
+
+class HdfsParallelReader:
+    """
+    Reads the content of several HDFS files with parallel reads, and returns it in order.
+    Files bigger than the segment size are split into segments read with ranged OPEN requests,
+    smaller files are read whole. The reads run on a pool shared by the worker, so the total
+    number of connections to the datanodes stays bounded whatever the number of downloads.
+
+    The number of reads in flight for one transfer adapts: it grows by one after as many reads
+    as are in flight succeed, and is halved when a read fails. The failed read is retried.
+    The memory used is bounded by the number of reads in flight times the segment size.
+    """
+
+    def __init__(self, read_range, transfer_stats=None):
+        """
+        Keyword arguments:
+            read_range {callable} -- Function (path, offset, length) returning the bytes of the file range,
+                                     called concurrently from the pool threads
+            transfer_stats {TransferStats} -- Counters updated while reading
+        """
+        self.read_range = read_range
+        self.transfer_stats = transfer_stats
+        self.max_concurrency = max(1, int(Environment().get_hdfs_download_max_concurrency()))
+        self.concurrency = min(self.max_concurrency, max(1, int(Environment().get_hdfs_download_initial_concurrency())))
+        self.segment_size = max(1, int(Environment().get_hdfs_download_segment_size()))
+        self.pool = SwExecutor().get_pool(READ_POOL, self.max_concurrency)
+
+    def read(self, files):
+        """
+        Reads the files
+
+        Keyword arguments:
+            files {list} -- The (path, length) of the files to be read
+
+        Returns:
+            generator of (index, bytes) -- Content of the files, in order, identified by the index of the file
+        """
+        segments = self.__get_segments(files)
+        in_flight = deque()
+        successes = 0
+        self.__set_concurrency(self.concurrency)
+        try:
+            while True:
+                while len(in_flight) < self.concurrency:
+                    segment = next(segments, None)
+                    if segment is None:
+                        break
+                    in_flight.append((segment, self.pool.submit(self.__read_segment, segment)))
+                if not in_flight:
+                    break
+
+                segment, future = in_flight.popleft()
+                data = self.__get_result(segment, future)
+                successes += 1
+                if successes >= self.concurrency and self.concurrency < self.max_concurrency:
+                    successes = 0
+                    self.__set_concurrency(self.concurrency + 1)
+                yield segment[0], data
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+
+    def __get_segments(self, files):
+        for index, (path, length) in enumerate(files):
+            if length > self.segment_size:
+                for offset in range(0, length, self.segment_size):
+                    yield index, path, offset, min(self.segment_size, length - offset)
+            elif length > 0:
+                yield index, path, None, None
+
+    def __read_segment(self, segment):
+        _, path, offset, length = segment
+        data = self.read_range(path, offset, length)
+        if self.transfer_stats is not None:
+            self.transfer_stats.add_segment(len(data))
+        return data
+
+    def __get_result(self, segment, future):
+        retries = 0
+        while True:
+            try:
+                return future.result()
+            except Exception as ex:
+                if retries >= MAX_SEGMENT_RETRIES:
+                    raise
+                retries += 1
+                # Back off, the upstream is likely overloaded
+                self.__set_concurrency(max(1, self.concurrency // 2))
+                if self.transfer_stats is not None:
+                    self.transfer_stats.add_retry()
+                logger.log_warning("Reading {0} at offset {1} failed with {2}, retrying with {3} parallel reads".format(
+                    segment[1], segment[2] or 0, str(ex), self.concurrency))
+                future = self.pool.submit(self.__read_segment, segment)
+
+    def __set_concurrency(self, concurrency):
+        self.concurrency = concurrency
+        if self.transfer_stats is not None:
+            self.transfer_stats.set_concurrency(concurrency)
@@ -0,0 +1,252 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import fcntl
+import json
+import os
+import threading
+import time
+
+from service.clients.web_hdfs_client import WebHdfsClient
+from service.exception.exceptions import ServiceError
+from service.utils import constants
+from service.utils.environment import Environment
+from service.utils.kerberos_util import KerberosUtil
+from service.utils.sw_logger import SwLogger
+from service.utils.sw_session import SwSession
+from service.utils.sw_session_manager import SwSessionManager
+from service.utils.sw_singleton import SwSingleton
+
+logger = SwLogger(__name__)
+
+
+class HdfsRetentionCollector(metaclass=SwSingleton):
+    """
+    Deletes the per run artifacts left in HDFS once they are older than the retention of the rule matching them.
+    Each rule has a glob pattern relative to the base HDFS location and a maximum age in days, for example
+    {"pattern": "testing_data/Configuration_Job/*", "max_age_days": 30}.
+
+    A thread of every worker wakes up periodically, the worker holding the lock file of the host runs the
+    collection. The deletions are rate limited so that the namenode isn't flooded. In dry run mode, the default,
+    the paths that would be deleted are only reported. The metrics of the runs are saved next to the lock file,
+    any worker of the host can report them.
+    """
+
+    def __init__(self):
+        self.interval = int(Environment().get_hdfs_retention_interval())
+        self.rules = self.__load_rules(Environment().get_hdfs_retention_rules())
+        self.dry_run = Environment().get_property_boolean_value("HDFS_RETENTION_DRY_RUN", "true")
+        self.max_deletes_per_second = float(Environment().get_hdfs_retention_max_deletes_per_second())
+        self.user = Environment().get_hdfs_retention_user()
+        self.directory = Environment().get_hdfs_retention_dir()
+        self.__lock_file = None
+        self.__thread = None
+        self.__stop = threading.Event()
+
+    def is_enabled(self):
+        return self.interval > 0 and bool(self.rules) and bool(self.user)
+
+    def start(self):
+        """Starts the thread of the collector, when retention rules are configured"""
+        if not self.is_enabled() or self.__thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.__thread = threading.Thread(target=self.__run_periodically, name="hdfs-retention", daemon=True)
+        self.__thread.start()
+        logger.log_info("Started the HDFS retention collector with {0} rules every {1} seconds{2}".format(
+            len(self.rules), self.interval, ", in dry run mode" if self.dry_run else ""))
+
+    def stop(self):
+        """Stops the thread of the collector, the path being deleted is completed"""
+        self.__stop.set()
+
+    def get_metrics(self):
+        """
+        Returns the metrics of the collector, saved by the worker running it
+
+        Returns:
+             metrics {dict} -- The totals of the paths, files and bytes deleted, and the report of the last run
+        """
+        metrics = self.__load_metrics()
+        metrics.update({
+            "enabled": self.is_enabled(),
+            "dry_run": self.dry_run,
+            "interval": self.interval,
+            "rules": self.rules
+        })
+        return metrics
+
+    def run(self):
+        """
+        Runs a collection, deleting or reporting the paths matching the rules which are older than their retention
+
+        Returns:
+             report {dict} -- The report of the run
+        """
+        started_at = time.time()
+        self.__set_session()
+        client = WebHdfsClient()
+        base_path = Environment().get_base_hdfs_location().strip("/")
+        report = {
+            "started_at": started_at,
+            "dry_run": self.dry_run,
+            "matched_paths": 0,
+            "deleted_paths": 0,
+            "failed_paths": 0,
+            "reclaimed_files": 0,
+            "reclaimed_bytes": 0,
+            "paths": []
+        }
+        matches = {}
+        for rule in self.rules:
+            dry_run = rule.get("dry_run", self.dry_run)
+            modified_before = (started_at - float(rule["max_age_days"]) * 86400) * 1000
+            try:
+                expanded_paths = client._expand_glob(base_path + "/" + rule["pattern"].strip("/"))
+            except Exception:
+                logger.log_exception("Expanding the retention pattern {} failed".format(rule["pattern"]),
+                                     exc_info=True)
+                continue
+            for file_name_with_path, file_status in expanded_paths:
+                if file_status.get("modificationTime", 0) < modified_before:
+                    # A path matched by several rules is deleted unless all of them are in dry run mode
+                    matched_rule, matched_status, matched_dry_run = matches.get(
+                        file_name_with_path, (rule, file_status, dry_run))
+                    matches[file_name_with_path] = (matched_rule, matched_status, matched_dry_run and dry_run)
+
+        # The content of a directory goes with it, the ancestors of a path sort before it. Paths under a directory
+        # only reported in dry run mode are still deleted by their rule.
+        collected_paths = {}
+        for file_name_with_path in sorted(matches):
+            if self.__stop.is_set():
+                break
+            rule, file_status, dry_run = matches[file_name_with_path]
+            parts = file_name_with_path.split("/")
+            ancestors = ["/".join(parts[:i]) for i in range(1, len(parts))]
+            if any(ancestor in collected_paths and (dry_run or not collected_paths[ancestor])
+                   for ancestor in ancestors):
+                continue
+            collected_paths[file_name_with_path] = dry_run
+            report["matched_paths"] += 1
+            self.__collect(client, rule, base_path, file_name_with_path, file_status, dry_run, report)
+
+        report["ended_at"] = time.time()
+        logger.log_info("HDFS retention run: {0} paths matched, {1} deleted, {2} failed, {3} files and {4} bytes "
+                        "reclaimed".format(report["matched_paths"], report["deleted_paths"], report["failed_paths"],
+                                           report["reclaimed_files"], report["reclaimed_bytes"]))
+        self.__save_metrics(report)
+        return report
+
+    def __collect(self, client, rule, base_path, file_name_with_path, file_status, dry_run, report):
+        path_report = {
+            "path": file_name_with_path[len(base_path) + 1:],
+            "pattern": rule["pattern"],
+            "modification_time": file_status.get("modificationTime"),
+            "dry_run": dry_run
+        }
+        try:
+            content_summary = client.get_content_summary(file_name_with_path)
+            path_report["files"] = content_summary.get("file_count")
+            path_report["bytes"] = content_summary.get("length")
+            if dry_run:
+                logger.log_info("HDFS retention would delete {0} with {1} files and {2} bytes".format(
+                    file_name_with_path, path_report["files"], path_report["bytes"]))
+            else:
+                if self.max_deletes_per_second > 0:
+                    # Rate limit of the deletions, the content summary is cheap compared to a recursive delete
+                    self.__stop.wait(1 / self.max_deletes_per_second)
+                if not client.delete_file(file_name_with_path, recursive=True).json().get("boolean"):
+                    raise ValueError("The path was deleted meanwhile.")
+                report["deleted_paths"] += 1
+                report["reclaimed_files"] += path_report["files"] or 0
+                report["reclaimed_bytes"] += path_report["bytes"] or 0
+                logger.log_info("HDFS retention deleted {0} with {1} files and {2} bytes".format(
+                    file_name_with_path, path_report["files"], path_report["bytes"]))
+        except Exception as e:
+            logger.log_warning("HDFS retention failed to collect {0}: {1}".format(file_name_with_path, str(e)))
+            report["failed_paths"] += 1
+            path_report["error"] = e.message if isinstance(e, ServiceError) else str(e)
+        if len(report["paths"]) < constants.RETENTION_REPORT_MAX_PATHS:
+            report["paths"].append(path_report)
+
+    def __run_periodically(self):
+        while not self.__stop.wait(self.interval):
+            if not self.__is_leader():
+                continue
+            try:
+                self.run()
+            except Exception:
+                logger.log_exception("HDFS retention run failed", exc_info=True)
+
+    def __is_leader(self):
+        """Takes the lock file of the host, the worker taking it keeps it and runs the collections until it exits"""
+        if self.__lock_file is not None:
+            return True
+        lock_file = open(os.path.join(self.directory, "leader.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self.__lock_file = lock_file
+        logger.log_info("This worker runs the HDFS retention collector of the host")
+        return True
+
+    def __set_session(self):
+        session = SwSession()
+        session.set_username(self.user)
+        if Environment().is_kerberos_enabled():
+            principal = (Environment().get_kerberos_principals() or {}).get(self.user)
+            KerberosUtil.ensure_ticket(Environment().get_hdfs_keytab_file_path(), principal, exit_on_fail=False)
+            session.set_user_principal(principal)
+        SwSessionManager().set_session(session)
+
+    def __load_metrics(self):
+        try:
+            with open(os.path.join(self.directory, "metrics.json")) as metrics_file:
+                return json.load(metrics_file)
+        except (OSError, ValueError):
+            return {
+                "runs": 0,
+                "deleted_paths": 0,
+                "failed_paths": 0,
+                "reclaimed_files": 0,
+                "reclaimed_bytes": 0,
+                "last_run": None
+            }
+
+    def __save_metrics(self, report):
+        metrics = self.__load_metrics()
+        metrics["runs"] += 1
+        for name in ["deleted_paths", "failed_paths", "reclaimed_files", "reclaimed_bytes"]:
+            metrics[name] += report[name]
+        metrics["last_run"] = report
+        metrics_path = os.path.join(self.directory, "metrics.json")
+        os.makedirs(self.directory, exist_ok=True)
+        with open(metrics_path + ".tmp", "w") as metrics_file:
+            json.dump(metrics, metrics_file)
+        os.replace(metrics_path + ".tmp", metrics_path)
+
+    @staticmethod
+    def __load_rules(rules):
+        if not rules:
+            return []
+        try:
+            rules = json.loads(rules)
+            for rule in rules:
+                if not rule.get("pattern", "").strip("/") or float(rule["max_age_days"]) <= 0:
+                    raise ValueError("A rule needs a pattern and a positive max_age_days: {}".format(rule))
+            return rules
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.log_error("The HDFS retention rules are invalid, the collector is disabled: {}".format(str(e)))
+            return []
@@ -0,0 +1,62 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+from service.utils.environment import Environment
+from service.utils.sw_singleton import SwSingleton
+from service.utils.ttl_cache import TtlCache
+
+
+class HdfsUploadIndex(metaclass=SwSingleton):
+    """
+    Process wide index of the content hashes of the files uploaded to HDFS, keyed by user and SHA-256 digest.
+    An entry holds the path of the file and its FileStatus at the time of the upload, the FileStatus tells
+    if the file is still the one that was uploaded.
+    """
+
+    def __init__(self):
+        self.ttl = int(Environment().get_upload_index_ttl())
+        self.cache = TtlCache(max_size=int(Environment().get_upload_index_max_entries()), ttl=self.ttl)
+
+    def is_enabled(self):
+        return self.ttl > 0
+
+    def get(self, user, content_hash):
+        """
+        Returns the file uploaded by the user with the content hash
+
+        Returns:
+            (path, file_status) -- The path of the file and its FileStatus, or None
+        """
+        if not self.is_enabled():
+            return None
+        return self.cache.get((user, content_hash))
+
+    def put(self, user, content_hash, path, file_status):
+        if not self.is_enabled():
+            return
+        self.cache.put((user, content_hash), (path, file_status))
+
+    def remove(self, user, content_hash):
+        self.cache.remove((user, content_hash))
+
+    def remove_path(self, user, path):
+        """Removes the entries of the file, once its content changed"""
+        self.cache.remove_if(lambda key, value: key[0] == user and value[0] == path)
+
+    @staticmethod
+    def is_unchanged(file_status, indexed_file_status):
+        """Returns True if the FileStatus is the one of the indexed file"""
+        return file_status is not None and indexed_file_status is not None and \
+            file_status.get("type") == "FILE" and \
+            file_status.get("length") == indexed_file_status.get("length") and \
+            file_status.get("modificationTime") == indexed_file_status.get("modificationTime")
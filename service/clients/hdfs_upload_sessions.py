@@ -0,0 +1,254 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import json
+import posixpath
+import re
+import time
+import uuid
+
+from service.clients.web_hdfs_client import WebHdfsClient
+from service.exception.exceptions import BadRequestError, ObjectNotFoundError, ServiceError
+from service.utils import constants
+from service.utils.environment import Environment
+from service.utils.sw_logger import SwLogger
+
+logger = SwLogger(__name__)
+
+SESSION_FILE = "session.json"
+CHUNK_FILE_PREFIX = "chunk-"
+UPLOAD_ID_PATTERN = re.compile("^[0-9a-f]{32}$")
+
+
+class HdfsUploadSessions:
+    """
+    Upload sessions letting a large file be uploaded in numbered chunks, in parallel, and resumed after a
+    failure by uploading the missing chunks only. The state of a session lives in HDFS so that any worker
+    can serve it, even after a restart: a staging directory per session holds the session file and a file
+    per chunk. On commit the chunks are assembled with CONCAT, or APPEND, and the result renamed to the file.
+    """
+
+    def __init__(self, sessions_path):
+        """
+        Keyword arguments:
+            sessions_path {str} -- HDFS directory holding the staging directories of the sessions
+        """
+        self.client = WebHdfsClient()
+        self.sessions_path = sessions_path.rstrip("/")
+
+    def create_upload(self, file_name_with_path, overwrite=False, total_chunks=None):
+        """
+        Creates an upload session for the file
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file identified with a path
+            overwrite {bool} -- Flag indicating of the file should be overwritten
+            total_chunks {int} -- Number of chunks of the file when known
+
+        Returns:
+             response {dict} -- Status of the upload session
+        """
+        if total_chunks is not None and not 0 < total_chunks <= constants.MAX_UPLOAD_CHUNKS:
+            raise BadRequestError("The number of chunks must be between 1 and {}.".format(constants.MAX_UPLOAD_CHUNKS))
+        if not overwrite and self.client._get_file_status(file_name_with_path) is not None:
+            raise BadRequestError("File {} already exists.".format(file_name_with_path))
+
+        session = {
+            "id": uuid.uuid4().hex,
+            "file": file_name_with_path,
+            "overwrite": overwrite,
+            "total_chunks": total_chunks,
+            "owner": self.client._get_cache_user(),
+            "created": int(time.time() * 1000),
+            "status": "open"
+        }
+        self.client.make_directory(self.__get_session_path(session["id"]))
+        self.__write_session(session)
+        logger.log_info("Created the upload session {0} of the file {1}".format(session["id"], file_name_with_path))
+        return self.__get_upload_status(session, {})
+
+    def upload_chunk(self, upload_id, chunk_number, data, content_length=None):
+        """
+        Uploads a chunk of the file, a chunk uploaded again replaces the previous one
+
+        Keyword arguments:
+            upload_id {str} -- Identifier of the upload session
+            chunk_number {int} -- Number of the chunk, starting at 0
+            data {bytearray or file} -- Content of the chunk
+            content_length {int} -- Length of the stream when known
+
+        Returns:
+             response {dict} -- Number and size of the uploaded chunk
+        """
+        session = self.__read_session(upload_id)
+        if session["status"] != "open":
+            raise BadRequestError("The upload session {} is being committed.".format(upload_id))
+        total_chunks = session.get("total_chunks") or constants.MAX_UPLOAD_CHUNKS
+        if not 0 <= chunk_number < total_chunks:
+            raise BadRequestError("The chunk number must be between 0 and {}.".format(total_chunks - 1))
+
+        self.client.upload_file(self.__get_chunk_path(upload_id, chunk_number), data, overwrite=True,
+                                content_length=content_length)
+        chunk_status = self.client._get_file_status(self.__get_chunk_path(upload_id, chunk_number))
+        return {
+            "id": upload_id,
+            "chunk": chunk_number,
+            "size": chunk_status.get("length") if chunk_status else None
+        }
+
+    def get_upload(self, upload_id):
+        """
+        Fetches the status of the upload session
+
+        Keyword arguments:
+            upload_id {str} -- Identifier of the upload session
+
+        Returns:
+             response {dict} -- Status of the upload session, with the received and the missing chunks
+        """
+        session = self.__read_session(upload_id)
+        return self.__get_upload_status(session, self.__list_chunks(upload_id))
+
+    def commit_upload(self, upload_id):
+        """
+        Assembles the chunks into the file and ends the session. A commit interrupted by a failure
+        resumes where it stopped when it is requested again.
+
+        Keyword arguments:
+            upload_id {str} -- Identifier of the upload session
+
+        Returns:
+             response {dict} -- Dictionary denoting the status of the upload operation and the relative location of the file.
+        """
+        session = self.__read_session(upload_id)
+        chunks = self.__list_chunks(upload_id)
+        if session["status"] == "open":
+            missing_chunks = self.__get_missing_chunks(session, chunks)
+            if not chunks or missing_chunks:
+                raise BadRequestError("The upload session {0} misses the chunks {1}.".format(
+                    upload_id, missing_chunks or [0]))
+            # The sizes tell how far the assembly went if the commit is interrupted
+            session["status"] = "committing"
+            session["chunk_sizes"] = [chunks[number] for number in range(len(chunks))]
+            self.__write_session(session)
+
+        file_name_with_path = session["file"]
+        first_chunk_path = self.__get_chunk_path(upload_id, 0)
+        # Without the first chunk, the assembled chunks were already renamed to the file
+        if 0 in chunks:
+            self.__assemble_chunks(upload_id, session["chunk_sizes"], chunks[0])
+
+            if self.client._get_file_status(file_name_with_path) is not None:
+                if not session.get("overwrite"):
+                    raise BadRequestError("File {} already exists.".format(file_name_with_path))
+                self.client.delete_file(file_name_with_path)
+            else:
+                self.client.make_directory(posixpath.dirname(file_name_with_path))
+            self.client.rename(first_chunk_path, file_name_with_path)
+        self.client.delete_file(self.__get_session_path(upload_id))
+        logger.log_info("Committed the upload session {0} of the file {1}".format(upload_id, file_name_with_path))
+        return {
+            "status": "finished",
+            "location": file_name_with_path
+        }
+
+    def delete_upload(self, upload_id):
+        """
+        Deletes the upload session and its chunks
+
+        Keyword arguments:
+            upload_id {str} -- Identifier of the upload session
+        """
+        self.__read_session(upload_id)
+        self.client.delete_file(self.__get_session_path(upload_id))
+        logger.log_info("Deleted the upload session {}".format(upload_id))
+
+    def __assemble_chunks(self, upload_id, chunk_sizes, first_chunk_size):
+        # The chunks already in the first chunk are found from its size
+        assembled_size = 0
+        next_chunk = len(chunk_sizes)
+        for number, size in enumerate(chunk_sizes):
+            assembled_size += size
+            if assembled_size == first_chunk_size:
+                next_chunk = number + 1
+                break
+        else:
+            raise ServiceError("The chunks of the upload session {} are inconsistent.".format(upload_id))
+
+        # Empty chunks add nothing, and CONCAT rejects them
+        source_chunks = [number for number in range(next_chunk, len(chunk_sizes)) if chunk_sizes[number] > 0]
+        if not source_chunks:
+            return
+
+        first_chunk_path = self.__get_chunk_path(upload_id, 0)
+        if Environment().get_upload_commit_mode() == "concat":
+            try:
+                self.client.concat(first_chunk_path, [self.__get_chunk_path(upload_id, n) for n in source_chunks])
+                return
+            except ServiceError as e:
+                # Older namenodes only concatenate files made of full blocks
+                logger.log_warning("Concatenating the chunks of the upload session {0} failed with {1}, "
+                                   "appending them instead".format(upload_id, e.message))
+
+        for number in source_chunks:
+            chunk_path = self.__get_chunk_path(upload_id, number)
+            res = self.client._open_file(chunk_path)
+            try:
+                self.client.append_file(first_chunk_path, res.raw, content_length=chunk_sizes[number])
+            finally:
+                res.close()
+
+    def __list_chunks(self, upload_id):
+        chunks = {}
+        for file_status in self.client._list_status(self.__get_session_path(upload_id)):
+            name = file_status.get("pathSuffix", "")
+            if name.startswith(CHUNK_FILE_PREFIX) and name[len(CHUNK_FILE_PREFIX):].isdigit():
+                chunks[int(name[len(CHUNK_FILE_PREFIX):])] = file_status.get("length", 0)
+        return chunks
+
+    @staticmethod
+    def __get_missing_chunks(session, chunks):
+        total_chunks = session.get("total_chunks") or (max(chunks) + 1 if chunks else 0)
+        return [number for number in range(total_chunks) if number not in chunks]
+
+    def __get_upload_status(self, session, chunks):
+        return {
+            "id": session["id"],
+            "file": session["file"],
+            "status": session["status"],
+            "total_chunks": session.get("total_chunks"),
+            "chunks": sorted(chunks),
+            "missing_chunks": self.__get_missing_chunks(session, chunks),
+            "size": sum(chunks.values())
+        }
+
+    def __read_session(self, upload_id):
+        if not UPLOAD_ID_PATTERN.match(upload_id or ""):
+            raise ObjectNotFoundError("Upload session {} not found.".format(upload_id))
+        try:
+            session = json.loads(self.client.read_file(self.__get_session_path(upload_id) + "/" + SESSION_FILE))
+        except ObjectNotFoundError:
+            raise ObjectNotFoundError("Upload session {} not found.".format(upload_id))
+        if session.get("owner") != self.client._get_cache_user():
+            raise ObjectNotFoundError("Upload session {} not found.".format(upload_id))
+        return session
+
+    def __write_session(self, session):
+        self.client.upload_file(self.__get_session_path(session["id"]) + "/" + SESSION_FILE,
+                                json.dumps(session).encode("utf-8"), overwrite=True)
+
+    def __get_session_path(self, upload_id):
+        return self.sessions_path + "/" + upload_id
+
+    def __get_chunk_path(self, upload_id, chunk_number):
+        return "{0}/{1}{2:06d}".format(self.__get_session_path(upload_id), CHUNK_FILE_PREFIX, chunk_number)
@@ -11,27 +11,66 @@
 # specific language governing permissions and limitations under the License.
 # ----------------------------------------------------------------------------------------------------
 
+import base64
+import binascii
+import calendar
+import fnmatch
+import io
 import json
 import os
-import random
+import posixpath
+import re
 import time
-import io
-import shutil
-import tempfile
 import urllib3
 import tarfile
+import threading
+import uuid
 
 from flask import Response, send_file
-from hdfs import InsecureClient
+from werkzeug.http import http_date, parse_date, parse_etags, parse_range_header, quote_etag, unquote_etag
 
-from service.exception.exceptions import ServiceError, ObjectNotFoundError, BadRequestError
+from service.clients.hdfs_content_cache import HdfsContentCache
+from service.clients.hdfs_content_summary_cache import HdfsContentSummaryCache
+from service.clients.hdfs_metadata_cache import HdfsMetadataCache, ResolvedPath
+from service.clients.hdfs_parallel_reader import HdfsParallelReader
+from service.clients.hdfs_upload_index import HdfsUploadIndex
+from service.exception.exceptions import (AuthenticationError, ServiceError, ObjectNotFoundError, BadRequestError,
+                                          PreconditionFailedError)
+from service.utils import constants
 from service.utils.environment import Environment
+from service.utils.kerberos_util import KerberosUtil
 from service.utils.rest_util import RestUtil
+from service.utils.single_flight import SingleFlight, file_lock
+from service.utils.sw_executor import SwExecutor
 from service.utils.sw_logger import SwLogger
+from service.utils.spooled_body import PeekedStream, SpooledBody
 from service.utils.sw_session_manager import SwSessionManager
+from service.utils.tar_stream import TarStream
 
 logger = SwLogger(__name__)
 
+# Pool resolving the paths of bulk downloads, kept apart from the pool reading the files
+HDFS_RESOLVE_POOL = "hdfs-resolve"
+# Pool writing the files of directory uploads
+HDFS_WRITE_POOL = "hdfs-write"
+# Pool running the operations of the batch requests
+HDFS_BATCH_POOL = "hdfs-batch"
+GLOB_CHARACTERS = frozenset("*?[")
+CONTENT_HASH_PATTERN = re.compile("^[0-9a-f]{64}$")
+
+# Uploads in flight, by user, path and content hash
+_upload_flights = SingleFlight()
+
+# Cleared when the namenode rejects LISTSTATUS_BATCH, the listings then fall back to LISTSTATUS
+_list_status_batch_supported = True
+
+# Authentication objects of the threads reading files in parallel, by principal
+_thread_local = threading.local()
+
+# Headers of the datanode response that apply only to that connection and must not be forwarded
+HOP_BY_HOP_HEADERS = ("connection", "keep-alive", "transfer-encoding", "te", "trailer", "upgrade",
+                      "proxy-authenticate", "proxy-authorization")
+
 
 class WebHdfsClient:
     """Client class to manage connectivity to HDFS files"""
@@ -39,47 +78,217 @@ class WebHdfsClient:
     def __init__(self):
         self.url = Environment().get_web_hdfs_url() + "/webhdfs/v1/"
         self.auth = None
+        self.principal = None
         if Environment().is_kerberos_enabled():
-            from requests_kerberos import HTTPKerberosAuth, REQUIRED
-            self.auth = HTTPKerberosAuth(mutual_authentication=REQUIRED, sanitize_mutual_error_response=False)
+            # Use the credential cache of the principal the request is served for
+            self.principal = SwSessionManager().get_session().get_user_principal()
+            self.auth = KerberosUtil.get_http_auth(self.principal)
 
-    def delete_file(self, file_name_with_path):
+    def delete_file(self, file_name_with_path, recursive=None):
         """
         Deletes a file from HDFS identified by the path
 
         Keyword arguments:
             file_name_with_path {str} -- Name of the file identified with a path
+            recursive {bool} -- Flag to delete a directory with its content. By default paths without
+                an extension are deleted recursively.
 
         Returns:
              response -- Http method response
         """
         delete_file_url = self.url + file_name_with_path + "?op=DELETE"
 
-        if os.path.splitext(file_name_with_path)[-1] == "":
+        if recursive is None:
+            recursive = os.path.splitext(file_name_with_path)[-1] == ""
+        if recursive:
             delete_file_url = delete_file_url + "&recursive=true"
 
-        response = RestUtil.request_with_retry().delete(delete_file_url, auth=self.auth)
+        response = RestUtil.request_with_retry(upstream="webhdfs").delete(delete_file_url, auth=self.auth)
+        HdfsMetadataCache().invalidate(file_name_with_path)
 
         if not response.ok:
             raise ServiceError("Attempt to delete file {0} failed with {1} and {2}.".format(file_name_with_path, response.status_code, response.reason))
 
         return response
 
-    def download_file(self, file_name_with_path):
+    def download_file(self, file_name_with_path, request_headers=None):
         """
         Downloads a file from HDFS location identified by the path
 
         Keyword arguments:
             file_name_with_path {str} -- Name of the file identified with a path
+            request_headers {dict} -- Headers of the download request. The Range, If-Range, If-None-Match and
+                If-Modified-Since headers are honoured.
 
         Returns:
              response -- Default Flask response object with file content and appropriate headers set
         """
-        file_name_with_path = self._get_actual_download_file_path(file_name_with_path)
+        request_headers = request_headers or {}
+        # The status of the file has to be current to serve the content cached for it
+        file_name_with_path, file_status = self._get_actual_download_file_status(
+            file_name_with_path, revalidate=HdfsContentCache().is_enabled())
+        if isinstance(file_name_with_path, list):
+            # A directory with multiple entries, such as the output of a Spark job
+            return self._download_part_files(file_name_with_path[0], request_headers)
+        file_name = file_name_with_path.split("/")[-1] if isinstance(file_name_with_path, str) else None
+
+        etag, last_modified = None, None
+        if file_status is not None:
+            etag = self._get_file_etag(file_name_with_path, file_status)
+            last_modified = file_status.get("modificationTime")
+            response = self._get_not_modified_response(request_headers, etag, last_modified)
+            if response is not None:
+                return response
+
+        range_header = request_headers.get("Range")
+        if range_header is not None and not self._is_if_range_valid(request_headers.get("If-Range"), etag,
+                                                                     last_modified):
+            # The client's partial copy is outdated, send the whole file
+            range_header = None
+
+        byte_ranges = None
+        if range_header is not None and file_status is not None:
+            file_length = file_status.get("length")
+            byte_ranges = self._get_byte_ranges(range_header, file_length)
+            if byte_ranges == []:
+                # None of the requested ranges overlap the file
+                response = Response(status=416)
+                response.headers["Content-Range"] = "bytes */{}".format(file_length)
+                return response
+            if byte_ranges is not None and len(byte_ranges) > 1:
+                response = self._get_multipart_ranges_response(file_name_with_path, file_length, byte_ranges)
+                self._set_cache_validators(response, etag, last_modified)
+                return response
+
+        content_cache = HdfsContentCache()
+        cache_writer = None
+        if file_status is not None and content_cache.is_cacheable(file_status.get("length")):
+            cache_key = content_cache.get_file_key(file_name_with_path, file_status, user=self._get_cache_user())
+            cached_file = content_cache.get(cache_key)
+            if cached_file is not None:
+                response = self._send_cached_file(cached_file, file_name, last_modified=last_modified)
+                self._set_cache_validators(response, etag, last_modified)
+                return response
+            if byte_ranges is None:
+                cache_writer = content_cache.open_writer(cache_key)
+
+        offset, length = None, None
+        if byte_ranges:
+            offset, end = byte_ranges[0]
+            length = end - offset
+
+        try:
+            res = self._open_file(file_name_with_path, offset=offset, length=length)
+        except Exception:
+            if cache_writer is not None:
+                cache_writer.abort()
+            raise
+        if res is not None:
+            if cache_writer is not None and res.headers.get("Content-Encoding"):
+                # Only the plain content of the file is cached
+                cache_writer.abort()
+                cache_writer = None
+            # Pass the datanode stream through chunk by chunk instead of loading the whole file in memory
+            headers = {k: v for k, v in res.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+            response = Response(self._stream_content(res, file_name_with_path, cache_writer=cache_writer,
+                                                     expected_size=file_status.get("length") if file_status else None),
+                                headers=headers, direct_passthrough=True)
+            response.headers['Content-Type'] = 'application/octet-stream'
+            response.headers['Content-Disposition'] = 'attachment;filename="{}"'.format(file_name)
+            response.headers['Accept-Ranges'] = 'bytes'
+            if byte_ranges:
+                response.status_code = 206
+                response.headers['Content-Range'] = "bytes {}-{}/{}".format(
+                    offset, offset + length - 1, file_status.get("length"))
+            self._set_cache_validators(response, etag, last_modified)
+
+            return response
 
+    def _download_part_files(self, directory_name_with_path, request_headers=None):
+        """
+        Downloads the files of the directory as a single body, the way Spark writes its output in
+        one part file per partition. The marker files starting with _ or . such as _SUCCESS and the
+        checksum files are skipped, and so are the sub directories. The parts are streamed in order
+        while the next ones are read ahead.
+
+        Keyword arguments:
+            directory_name_with_path {str} -- Name of the directory identified with a path
+            request_headers {dict} -- Headers of the request, used for conditional requests
+
+        Returns:
+             response -- Default Flask response object with the concatenated content of the files
+        """
+        part_files = [(directory_name_with_path + "/" + f["pathSuffix"], f)
+                      for f in self._list_status(directory_name_with_path)
+                      if f.get("type") == "FILE" and not f.get("pathSuffix", "").startswith(("_", "."))]
+        if not part_files:
+            raise ObjectNotFoundError("No file found in the directory {}.".format(directory_name_with_path))
+        part_files.sort(key=lambda f: self.__get_natural_sort_key(f[1]["pathSuffix"]))
+        logger.log_info("Concatenating {0} files of the directory {1}".format(len(part_files), directory_name_with_path))
+
+        etag = HdfsContentCache.get_directory_key(
+            directory_name_with_path, [(f["pathSuffix"], f) for _, f in part_files], compress=False)[:32]
+        last_modified = max(f.get("modificationTime", 0) for _, f in part_files)
+        response = self._get_not_modified_response(request_headers or {}, etag, last_modified)
+        if response is not None:
+            return response
+
+        # The extension of the parts, such as .csv or .json, is kept for the downloaded file
+        extension = os.path.splitext(part_files[0][1]["pathSuffix"])[1]
+        file_name = os.path.split(directory_name_with_path)[1] + extension
+        contents = HdfsParallelReader(self._read_file_range).read(
+            [(path, f.get("length", 0)) for path, f in part_files])
+        response = Response(self.__generate_part_files(part_files, contents), direct_passthrough=True)
+        response.headers['Content-Type'] = 'application/octet-stream'
+        response.headers['Content-Disposition'] = 'attachment;filename="{}"'.format(file_name)
+        response.headers['Content-Length'] = str(sum(f.get("length", 0) for _, f in part_files))
+        self._set_cache_validators(response, etag, last_modified)
+        return response
+
+    @staticmethod
+    def __get_natural_sort_key(name):
+        # part-2 sorts before part-10
+        return [(0, int(token), "") if token.isdigit() else (1, 0, token) for token in re.split(r"(\d+)", name)]
+
+    @staticmethod
+    def __generate_part_files(part_files, contents):
+        try:
+            content = next(contents, None)
+            for file_index, (file_name_with_path, file_status) in enumerate(part_files):
+                remaining = file_status.get("length", 0)
+                while content is not None and content[0] == file_index:
+                    remaining -= len(content[1])
+                    if remaining < 0:
+                        break
+                    yield content[1]
+                    content = next(contents, None)
+                if remaining:
+                    # Abort rather than send a body not matching the declared Content-Length
+                    raise ServiceError("The file {} changed while being downloaded.".format(file_name_with_path))
+        finally:
+            contents.close()
+
+    def _open_file(self, file_name_with_path, offset=None, length=None, auth=None):
+        """
+        Opens the file for reading, following the namenode redirect to the datanode
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file identified with a path
+            offset {int} -- Starting byte position to read from
+            length {int} -- Number of bytes to be read
+            auth {AuthBase} -- Authentication to be used instead of the one of the client
+
+        Returns:
+             response -- Streamed datanode response, it has to be closed by the caller
+        """
         open_file_url = self.url + file_name_with_path + "?op=OPEN"
+        if offset is not None:
+            open_file_url = open_file_url + "&offset={}".format(offset)
+        if length is not None:
+            open_file_url = open_file_url + "&length={}".format(length)
 
-        response = RestUtil.request_with_retry().get(open_file_url, auth=self.auth, allow_redirects=False)
+        auth = auth or self.auth
+        response = RestUtil.request_with_retry(upstream="webhdfs").get(open_file_url, auth=auth, allow_redirects=False)
         if response.status_code != 307:
             if response.status_code == 404:
                 raise ObjectNotFoundError("File {} not found.".format(file_name_with_path))
@@ -91,36 +300,255 @@ class WebHdfsClient:
         if response.headers is not None:
             file_download_url = response.headers["Location"]
 
-        if file_download_url is not None:
-            res = RestUtil.request_with_retry().get(file_download_url, auth=self.auth, stream=True)
-            if not response.ok:
-                raise ServiceError(
-                    "Attempt to download file {0} failed with {1} and {2}.".format(file_name_with_path, response.status_code, response.reason))
+        if file_download_url is None:
+            return None
 
-            response = Response(res.content, headers=dict(res.headers))
-            response.headers['Content-Type'] = 'application/octet-stream'
-            response.headers['Content-Disposition'] = 'attachment;filename="{}"'.format(file_name_with_path.split("/")[-1])
+        res = RestUtil.request_with_retry(upstream="webhdfs").get(file_download_url, auth=auth, stream=True)
+        if not res.ok:
+            res.close()
+            raise ServiceError(
+                "Attempt to download file {0} failed with {1} and {2}.".format(file_name_with_path, res.status_code, res.reason))
+        return res
 
-            return response
+    def _read_file_range(self, file_name_with_path, offset=None, length=None):
+        """
+        Reads the file range whole. Can be called from any thread, the authentication objects
+        are not thread safe so each thread uses its own.
+        """
+        res = self._open_file(file_name_with_path, offset=offset, length=length, auth=self._get_thread_auth())
+        if res is None:
+            return b""
+        try:
+            return res.raw.read(decode_content=True)
+        finally:
+            res.close()
+
+    def _get_thread_auth(self):
+        if self.principal is None:
+            return None
+        auths = getattr(_thread_local, "auths", None)
+        if auths is None:
+            auths = _thread_local.auths = {}
+        auth = auths.get(self.principal)
+        if auth is None:
+            auth = auths[self.principal] = KerberosUtil.get_http_auth(self.principal)
+        return auth
+
+    def _get_multipart_ranges_response(self, file_name_with_path, file_length, byte_ranges):
+        """Returns a multipart/byteranges response streaming each of the requested ranges of the file"""
+        boundary = uuid.uuid4().hex
+        part_headers = []
+        for start, end in byte_ranges:
+            part_headers.append(
+                "--{}\r\nContent-Type: application/octet-stream\r\nContent-Range: bytes {}-{}/{}\r\n\r\n".format(
+                    boundary, start, end - 1, file_length).encode("ascii"))
+        closing_boundary = "--{}--\r\n".format(boundary).encode("ascii")
+        content_length = sum(len(h) + (end - start) + 2 for h, (start, end) in zip(part_headers, byte_ranges)) + \
+            len(closing_boundary)
 
-    def upload_file(self, file_name_with_path, data, overwrite=False):
+        def generate():
+            for part_header, (start, end) in zip(part_headers, byte_ranges):
+                yield part_header
+                res = self._open_file(file_name_with_path, offset=start, length=end - start)
+                for chunk in self._stream_content(res, file_name_with_path):
+                    yield chunk
+                yield b"\r\n"
+            yield closing_boundary
+
+        response = Response(generate(), status=206, direct_passthrough=True)
+        response.headers['Content-Type'] = 'multipart/byteranges; boundary={}'.format(boundary)
+        response.headers['Content-Length'] = str(content_length)
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
+
+    @staticmethod
+    def _get_byte_ranges(range_header, file_length):
+        """
+        Parses the Range header into the list of (start, end) byte ranges of the file, with end exclusive.
+
+        Returns:
+            None when the header is invalid or asks for too many ranges and the whole file should be sent,
+            an empty list when none of the ranges can be satisfied.
         """
-        Uploads file to a HDFS location identified by the path
+        parsed_range = parse_range_header(range_header)
+        if parsed_range is None or parsed_range.units != "bytes" or file_length is None:
+            return None
+        if len(parsed_range.ranges) > constants.MAX_BYTE_RANGES:
+            return None
+
+        byte_ranges = []
+        for start, end in parsed_range.ranges:
+            if start < 0:
+                # Suffix range, the last -start bytes of the file
+                start, end = max(file_length + start, 0), file_length
+            else:
+                end = file_length if end is None else min(end, file_length)
+            if start < end:
+                byte_ranges.append((start, end))
+        return byte_ranges
+
+    @staticmethod
+    def _stream_content(res, file_name_with_path, chunk_size=constants.DOWNLOAD_CHUNK_SIZE, cache_writer=None,
+                        expected_size=None):
+        """
+        Yields the content of the datanode response in chunks of bounded size. The upstream connection is
+        released when the stream is exhausted or when the client disconnects before that.
+        When a cache writer is given, the content is also written into the content cache, and added to it
+        only if the whole file was streamed.
+        """
+        completed = False
+        try:
+            # Raw bytes are forwarded as is, the Content-Encoding and Content-Length headers are passed along
+            for chunk in res.raw.stream(chunk_size, decode_content=False):
+                if cache_writer is not None:
+                    cache_writer.write(chunk)
+                yield chunk
+            completed = True
+        except GeneratorExit:
+            logger.log_warning("Client disconnected while downloading the file {}".format(file_name_with_path))
+            raise
+        except Exception:
+            logger.log_exception("Streaming the file {} failed".format(file_name_with_path), exc_info=True)
+            raise
+        finally:
+            res.close()
+            if cache_writer is not None:
+                if completed:
+                    cache_writer.commit(expected_size=expected_size)
+                else:
+                    cache_writer.abort()
+
+    @staticmethod
+    def _send_cached_file(cached_file, attachment_filename, last_modified=None):
+        """Sends the cached file, letting the server use zero copy file transfer"""
+        if last_modified is not None:
+            last_modified = last_modified / 1000
+        return send_file(cached_file, mimetype="application/octet-stream", as_attachment=True,
+                         attachment_filename=attachment_filename, add_etags=False, conditional=True,
+                         last_modified=last_modified)
+
+    @staticmethod
+    def _get_file_etag(file_name_with_path, file_status):
+        """Returns the entity tag of the file version identified by its FileStatus"""
+        return HdfsContentCache.get_file_key(file_name_with_path, file_status)[:32]
+
+    @staticmethod
+    def _get_not_modified_response(request_headers, etag, last_modified, weak=False):
+        """
+        Evaluates the If-None-Match and If-Modified-Since request headers
+
+        Keyword arguments:
+            request_headers {dict} -- Headers of the request
+            etag {str} -- Entity tag of the current version of the content
+            last_modified {int} -- Modification time of the content in milliseconds
+
+        Returns:
+            response -- A 304 response if the client's copy is still valid, None otherwise
+        """
+        not_modified = False
+        if_none_match = request_headers.get("If-None-Match")
+        if if_none_match:
+            # If-Modified-Since is ignored when If-None-Match is present
+            etags = parse_etags(if_none_match)
+            not_modified = etag is not None and (etags.star_tag or etags.contains_weak(etag))
+        else:
+            if_modified_since = parse_date(request_headers.get("If-Modified-Since"))
+            if if_modified_since is not None and last_modified is not None:
+                not_modified = last_modified // 1000 <= calendar.timegm(if_modified_since.utctimetuple())
+
+        if not not_modified:
+            return None
+        response = Response(status=304)
+        WebHdfsClient._set_cache_validators(response, etag, last_modified, weak=weak)
+        return response
+
+    @staticmethod
+    def _is_if_range_valid(if_range, etag, last_modified):
+        """Checks whether the If-Range header, an entity tag or a date, matches the current version of the file"""
+        if if_range is None:
+            return True
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            if_range_etag, weak = unquote_etag(if_range)
+            return not weak and if_range_etag == etag
+        if_range_date = parse_date(if_range)
+        return if_range_date is not None and last_modified is not None and \
+            last_modified // 1000 == calendar.timegm(if_range_date.utctimetuple())
+
+    @staticmethod
+    def _set_cache_validators(response, etag, last_modified, weak=False):
+        """Sets the ETag, Last-Modified and Cache-Control headers of a download response"""
+        if etag is not None:
+            response.headers["ETag"] = quote_etag(etag, weak=weak)
+        if last_modified is not None:
+            response.headers["Last-Modified"] = http_date(last_modified / 1000)
+        max_age = int(Environment().get_files_cache_max_age())
+        # Let the clients store the content, and revalidate it using the validators once it is stale
+        response.headers["Cache-Control"] = "private, max-age={}".format(max_age) if max_age > 0 \
+            else "private, no-cache"
+
+    def upload_file(self, file_name_with_path, data, overwrite=False, content_length=None, content_hash=None):
+        """
+        Uploads file to a HDFS location identified by the path. The content is streamed to the datanode
+        in chunks, and spooled so that it can be sent again on a retry.
+
+        When the SHA-256 digest of the content is given, the upload is skipped if the file already has this
+        content, and the file is copied within HDFS if the user uploaded the same content elsewhere. The
+        content can then be left out of the request, it is only needed when the upload can't be deduplicated.
+
+        Concurrent uploads to the same path are coordinated: with the same content hash only one of them
+        writes the file and the others get its result, otherwise they write one after the other.
 
         Keyword arguments:
             file_name_with_path {str} -- Name of the file identified with a path
-            data {bytearray} -- Byte array representation of the file
+            data {bytearray or file} -- Byte array representation of the file, or a stream of the file
             overwrite {bool} -- Flag indicating of the file should be overwritten
+            content_length {int} -- Length of the stream when known
+            content_hash {str} -- SHA-256 digest of the content as a hex string
 
         Returns:
              response {dict} -- Dictionary denoting the status of the upload operation and the relative location of the file.
         """
+        if content_hash is not None:
+            content_hash = content_hash.strip().lower()
+            if not CONTENT_HASH_PATTERN.match(content_hash):
+                raise BadRequestError("The content hash must be a SHA-256 digest in hex.")
+
+        key = (self._get_cache_user(), file_name_with_path, content_hash)
+        response, is_shared = _upload_flights.do(key, lambda: self.__upload_file(
+            file_name_with_path, data, overwrite, content_length, content_hash), shared=content_hash is not None)
+        if is_shared:
+            logger.log_info("File {} was uploaded by a concurrent request with the same content".format(
+                file_name_with_path))
+            response = dict(response, deduplicated=True)
+        return response
+
+    def __upload_file(self, file_name_with_path, data, overwrite, content_length, content_hash):
+        # The workers of the host upload the path one at a time when a lock directory is configured
+        with file_lock(Environment().get_upload_lock_dir(), "{}:{}".format(file_name_with_path, content_hash)):
+            return self.__upload_file_locked(file_name_with_path, data, overwrite, content_length, content_hash)
+
+    def __upload_file_locked(self, file_name_with_path, data, overwrite, content_length, content_hash):
+        if content_hash is not None:
+            # The file may have been written meanwhile by the request holding the lock
+            response = self.__upload_from_index(file_name_with_path, content_hash, overwrite)
+            if response is not None:
+                return response
+            if content_length is None and hasattr(data, "read"):
+                # Chunked uploads have no Content-Length, the stream tells whether the content was sent
+                data = PeekedStream(data)
+                is_empty = data.is_empty()
+            else:
+                is_empty = not content_length if content_length is not None else not data
+            if is_empty and content_hash != constants.EMPTY_CONTENT_SHA256:
+                raise PreconditionFailedError(
+                    "No file with the content hash {} is known, the content has to be uploaded.".format(content_hash))
+
         # The following lines (114-123) are a temporary fix until we have the right change made in the
         # ibm-wos-utils module to handle upload of this specific file only when its not found
-        # in the HDFS location
-        if "main_job.py" in file_name_with_path:
+        # in the HDFS location. Clients sending the content hash get the same skip for any file.
+        elif "main_job.py" in file_name_with_path:
             check_file_status_url = self.url + file_name_with_path + "?op=LISTSTATUS"
-            response = RestUtil.request_with_retry().get(check_file_status_url, auth=self.auth)
+            response = RestUtil.request_with_retry(upstream="webhdfs").get(check_file_status_url, auth=self.auth)
             if response.status_code == 200:
                 logger.log_warning("File already exists.. Skipping upload...")
                 response = {
@@ -129,11 +557,149 @@ class WebHdfsClient:
                 }
                 return response
 
+        return self._write_file(file_name_with_path, data, overwrite=overwrite, content_length=content_length,
+                                content_hash=content_hash)
+
+    def copy_file(self, source_path, file_name_with_path, overwrite=False):
+        """
+        Copies a file within HDFS, streaming it from one datanode to another
+
+        Keyword arguments:
+            source_path {str} -- Name of the file to be copied identified with a path
+            file_name_with_path {str} -- Name of the copy identified with a path
+            overwrite {bool} -- Flag indicating of the copy should be overwritten
+
+        Returns:
+             response {dict} -- Dictionary denoting the status of the copy and the relative location of the copy.
+        """
+        source_status = self._get_file_status(source_path)
+        if source_status is None or source_status.get("type") != "FILE":
+            raise ObjectNotFoundError("File {} not found.".format(source_path))
+        res = self._open_file(source_path)
+        try:
+            # The digest of the copied content is recorded on the copy, the one recorded on the source isn't
+            # checked as the source may have been changed by a tool not keeping it up to date
+            return self._write_file(file_name_with_path, res.raw if res is not None else b"", overwrite=overwrite,
+                                    content_length=source_status.get("length"))
+        finally:
+            if res is not None:
+                res.close()
+
+    def move(self, source_path, destination_path):
+        """
+        Moves a file or directory within HDFS with RENAME, only the metadata of the namenode changes
+
+        Keyword arguments:
+            source_path {str} -- Name of the file or directory to be moved identified with a path
+            destination_path {str} -- New name of the file or directory identified with a path
+
+        Returns:
+             response {dict} -- Dictionary denoting the status of the move and the relative location of the destination.
+        """
+        self.__check_copy_paths(source_path, destination_path)
+        if self._get_file_status(destination_path) is not None:
+            raise BadRequestError("{} already exists.".format(destination_path))
+        destination_directory = posixpath.dirname(destination_path.strip("/"))
+        if destination_directory:
+            self.make_directory(destination_directory)
+        self.rename(source_path, destination_path)
+        logger.log_info("Moved {0} to {1}".format(source_path, destination_path))
+        return {
+            "status": "finished",
+            "location": destination_path
+        }
+
+    def copy(self, source_path, destination_path, overwrite=False, transfer_stats=None):
+        """
+        Copies a file or directory within HDFS, the content is streamed from datanode to datanode by the service.
+        The files of a directory are copied in parallel, capped by HDFS_UPLOAD_MAX_CONCURRENCY.
+
+        Keyword arguments:
+            source_path {str} -- Name of the file or directory to be copied identified with a path
+            destination_path {str} -- Name of the copy identified with a path
+            overwrite {bool} -- Flag indicating if the existing files of the copy should be overwritten
+            transfer_stats {TransferStats} -- Counters updated while copying
+
+        Returns:
+             response {dict} -- Dictionary denoting the status of the copy, the relative location of the copy and
+                the number of files and bytes copied.
+        """
+        source_status = self.__check_copy_paths(source_path, destination_path)
+        source_path = source_path.strip("/")
+        destination_path = destination_path.strip("/")
+        if not overwrite and self._get_file_status(destination_path) is not None:
+            raise BadRequestError("{} already exists.".format(destination_path))
+        if source_status.get("type") != "DIRECTORY":
+            self.copy_file(source_path, destination_path, overwrite=overwrite)
+            files = [source_status]
+        else:
+            entries = list(self._walk(source_path))
+            self.make_directory(destination_path)
+            for relative_path, file_status in entries:
+                if file_status.get("type") == "DIRECTORY":
+                    self.make_directory(self.__join_path(destination_path, relative_path))
+            files = [(relative_path, file_status) for relative_path, file_status in entries
+                     if file_status.get("type") == "FILE"]
+
+            max_concurrency = int(Environment().get_hdfs_upload_max_concurrency())
+            pool = SwExecutor().get_pool(HDFS_WRITE_POOL, max_concurrency)
+            # Pool threads use a client of their own, the authentication objects are not thread safe
+            copy_file = SwSessionManager().bind_session(
+                lambda source, destination: WebHdfsClient().copy_file(source, destination, overwrite=overwrite))
+            futures = [pool.submit(copy_file, self.__join_path(source_path, relative_path),
+                                   self.__join_path(destination_path, relative_path))
+                       for relative_path, _ in files]
+            try:
+                for future in futures:
+                    future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+            files = [file_status for _, file_status in files]
+
+        copied_bytes = sum(file_status.get("length", 0) for file_status in files)
+        if transfer_stats is not None:
+            transfer_stats.add_bytes(copied_bytes)
+            for _ in files:
+                transfer_stats.add_file()
+        logger.log_info("Copied {0} to {1}".format(source_path, destination_path))
+        return {
+            "status": "finished",
+            "location": destination_path,
+            "files": len(files),
+            "bytes": copied_bytes
+        }
+
+    def __check_copy_paths(self, source_path, destination_path):
+        """Returns the FileStatus of the source, the destination can't be the source or under it"""
+        source = source_path.strip("/")
+        destination = destination_path.strip("/")
+        if destination == source or destination.startswith(source + "/"):
+            raise BadRequestError("{0} can't be copied or moved to {1}.".format(source_path, destination_path))
+        source_status = self._get_file_status(source)
+        if source_status is None:
+            raise ObjectNotFoundError("File {} not found.".format(source_path))
+        return source_status
+
+    def _write_file(self, file_name_with_path, data, overwrite=False, content_length=None, content_hash=None):
+        """
+        Writes the content to the file and records its content hash
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file identified with a path
+            data {bytearray or file} -- Byte array representation of the file, or a stream of the file
+            overwrite {bool} -- Flag indicating of the file should be overwritten
+            content_length {int} -- Length of the stream when known
+            content_hash {str} -- Expected SHA-256 digest of the content
+
+        Returns:
+             response {dict} -- Dictionary denoting the status of the upload operation and the relative location of the file.
+        """
         create_file_url = self.url + file_name_with_path + "?op=CREATE"
         if overwrite:
             create_file_url = create_file_url + "&overwrite=true"
 
-        response = RestUtil.request_with_retry().put(create_file_url, auth=self.auth, allow_redirects=False)
+        response = RestUtil.request_with_retry(upstream="webhdfs").put(create_file_url, auth=self.auth, allow_redirects=False)
         if response.status_code != 307:
             raise ServiceError(
                 "Attempt to create file {0} failed with {1} and {2}.".format(file_name_with_path, response.status_code,
@@ -144,34 +710,31 @@ class WebHdfsClient:
             file_write_url = response.headers["Location"]
 
         if file_write_url is not None:
-            response = RestUtil.request_with_retry().put(file_write_url, auth=self.auth, data=data)
-
-            retry_attempt = 0
-            sleep_factor = random.randint(1, 5)
-            # If the file upload fails with 404, during multiple parallel requests trying to upload the same file,
-            # attempting retry up-to 5 times with a random start sleep time ranging between 1 and 5 seconds
-            # and a back-off factor of 1.5
-            if response.status_code == 404:
-                while retry_attempt < 5:
-                    sleep_factor = sleep_factor * 1.5
-                    time.sleep(sleep_factor)
-                    retry_attempt += 1
-                    logger.log_info("Re-attempt {} of file {} upload.".format(retry_attempt, file_name_with_path))
-                    actual_response = RestUtil.request_with_retry().put(create_file_url, auth=self.auth, allow_redirects=False)
-                    if actual_response.headers is not None:
-                        file_url = actual_response.headers["Location"]
-                        response = RestUtil.request_with_retry().put(file_url, auth=self.auth, data=data)
+            body = SpooledBody(data, content_length)
+            try:
+                response = self.__write_file(file_name_with_path, file_write_url, create_file_url, body)
+                uploaded_content_hash = body.get_sha256()
+            finally:
+                body.close()
 
+            HdfsMetadataCache().invalidate(file_name_with_path)
             if not response.ok:
                 raise ServiceError(
                     "Attempt to write to file {0} failed with {1} and {2}.".format(file_name_with_path,
                                                                                    response.status_code,
                                                                                    response.reason))
 
-            check_file_status_url = self.url + file_name_with_path + "?op=LISTSTTAUS"
-            response = RestUtil.request_with_retry().get(check_file_status_url, auth=self.auth)
-            if response.status_code == 404:
+            if content_hash is not None and content_hash != uploaded_content_hash:
+                # Don't leave a file which doesn't have the announced content
+                self.delete_file(file_name_with_path)
+                raise BadRequestError("The content of the file {0} doesn't match the content hash {1}.".format(
+                    file_name_with_path, content_hash))
+
+            file_status = self._get_file_status(file_name_with_path)
+            if file_status is None:
                 raise ServiceError("File {} not found".format(file_name_with_path))
+            self._set_content_hash(file_name_with_path, uploaded_content_hash)
+            HdfsUploadIndex().put(self._get_cache_user(), uploaded_content_hash, file_name_with_path, file_status)
 
             response = {
                 "status": "finished",
@@ -179,13 +742,151 @@ class WebHdfsClient:
             }
             return response
 
-    def _get_actual_download_file_path(self, file_name_with_path):
+    def __upload_from_index(self, file_name_with_path, content_hash, overwrite):
+        """Completes the upload without the content when a file with the same content is known"""
+        upload_index = HdfsUploadIndex()
+        cache_user = self._get_cache_user()
+        indexed_file = upload_index.get(cache_user, content_hash)
+
+        file_status = self._get_file_status(file_name_with_path)
+        if file_status is not None and file_status.get("type") == "FILE":
+            if (indexed_file is not None and indexed_file[0] == file_name_with_path and
+                    upload_index.is_unchanged(file_status, indexed_file[1])) or \
+                    self._get_content_hash(file_name_with_path) == content_hash:
+                logger.log_info("File {} already has the uploaded content, skipping the upload".format(
+                    file_name_with_path))
+                upload_index.put(cache_user, content_hash, file_name_with_path, file_status)
+                return {
+                    "status": "finished",
+                    "location": file_name_with_path,
+                    "deduplicated": True
+                }
+
+        if indexed_file is not None and indexed_file[0] != file_name_with_path:
+            source_path, source_status = indexed_file
+            if upload_index.is_unchanged(self._get_file_status(source_path), source_status):
+                logger.log_info("Copying {0} to {1} which has the same content, instead of uploading it".format(
+                    source_path, file_name_with_path))
+                response = self.copy_file(source_path, file_name_with_path, overwrite=overwrite)
+                response["deduplicated"] = True
+                return response
+            upload_index.remove(cache_user, content_hash)
+        return None
+
+    def _get_content_hash(self, file_name_with_path):
+        """Returns the SHA-256 digest recorded on the file, None when it has none"""
+        get_xattr_url = self.url + file_name_with_path + "?op=GETXATTRS&xattr.name={}&encoding=hex".format(
+            constants.CONTENT_HASH_XATTR)
+        try:
+            response = RestUtil.request_with_retry(upstream="webhdfs").get(get_xattr_url, auth=self.auth)
+            if not response.ok:
+                return None
+            for xattr in response.json().get("XAttrs", []):
+                if xattr.get("name") == constants.CONTENT_HASH_XATTR and xattr.get("value"):
+                    return xattr["value"][2:].lower() if xattr["value"].startswith("0x") else None
+        except Exception as e:
+            logger.log_debug("Fetching the content hash of {0} failed with {1}".format(file_name_with_path, str(e)))
+        return None
+
+    def _set_content_hash(self, file_name_with_path, content_hash):
+        """Records the SHA-256 digest on the file, best effort as extended attributes may be disabled"""
+        for flag in ("CREATE", "REPLACE"):
+            set_xattr_url = self.url + file_name_with_path + \
+                "?op=SETXATTR&xattr.name={0}&xattr.value=0x{1}&flag={2}".format(
+                    constants.CONTENT_HASH_XATTR, content_hash, flag)
+            try:
+                response = RestUtil.request_with_retry(upstream="webhdfs").put(set_xattr_url, auth=self.auth)
+                if response.ok:
+                    return
+            except Exception as e:
+                logger.log_debug("Recording the content hash of {0} failed with {1}".format(file_name_with_path, str(e)))
+                return
+        logger.log_debug("Recording the content hash of {0} failed with {1}".format(file_name_with_path,
+                                                                                      response.status_code))
+
+    def _remove_content_hash(self, file_name_with_path):
+        """Removes the SHA-256 digest recorded on a file whose content is about to change, best effort"""
+        HdfsUploadIndex().remove_path(self._get_cache_user(), file_name_with_path)
+        remove_xattr_url = self.url + file_name_with_path + "?op=REMOVEXATTR&xattr.name={}".format(
+            constants.CONTENT_HASH_XATTR)
+        try:
+            # Fails when the file has no digest recorded
+            RestUtil.request_with_retry(upstream="webhdfs").put(remove_xattr_url, auth=self.auth)
+        except Exception as e:
+            logger.log_debug("Removing the content hash of {0} failed with {1}".format(file_name_with_path, str(e)))
+
+    def __write_file(self, file_name_with_path, file_write_url, create_file_url, body):
+        response = RestUtil.request_with_retry(upstream="webhdfs").put(file_write_url, auth=self.auth,
+                                                                       data=body.get_reader())
+
+        # The datanode rejects the write with 404 while another request writes the same file. Concurrent
+        # uploads within the host are coordinated, retry a few times for the uploads made from other hosts.
+        retry_attempt = 0
+        while response.status_code == 404 and retry_attempt < constants.UPLOAD_CONFLICT_RETRY_COUNT:
+            time.sleep(constants.UPLOAD_CONFLICT_RETRY_DELAY * (2 ** retry_attempt))
+            retry_attempt += 1
+            logger.log_info("Re-attempt {} of file {} upload.".format(retry_attempt, file_name_with_path))
+            actual_response = RestUtil.request_with_retry(upstream="webhdfs").put(create_file_url, auth=self.auth,
+                                                                                  allow_redirects=False)
+            if actual_response.status_code != 307:
+                break
+            # The content is sent again from the spool
+            response = RestUtil.request_with_retry(upstream="webhdfs").put(actual_response.headers["Location"],
+                                                                           auth=self.auth, data=body.get_reader())
+        return response
+
+    def _get_actual_download_file_status(self, file_name_with_path, revalidate=False):
+        """
+        Resolves the file to be downloaded for the path. A directory holding a single entry resolves to that entry.
+        Resolved paths are cached per user, and revalidated using the modification time of the file when possible.
+        The cache of a worker isn't told about the files written by the other workers, a cached resolution may
+        hence hold an outdated FileStatus until it expires.
 
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file identified with a path
+            revalidate {bool} -- Flag to check the FileStatus of a cached resolution before its expiry, when the
+                content is served based on its length and modification time
+
+        Returns:
+            (download_file_path, file_status) -- The path of the file and its FileStatus. The path is returned
+            as a list and the status is None when the path is a directory with multiple entries.
+        """
+        metadata_cache = HdfsMetadataCache()
+        cache_user = self._get_cache_user()
+        resolved_path, expired = metadata_cache.get_resolved_path(cache_user, file_name_with_path)
+        if resolved_path is not None:
+            if not expired and resolved_path.is_not_found():
+                raise ObjectNotFoundError("File {} not found.".format(file_name_with_path))
+            if not expired and not revalidate:
+                return resolved_path.path, resolved_path.file_status
+
+            if resolved_path.is_file_path or not expired:
+                # A single status call tells if the file is unchanged, no need to list it again
+                file_status = self._get_file_status(resolved_path.path)
+                if file_status is not None and \
+                        file_status.get("modificationTime") == resolved_path.file_status.get("modificationTime") and \
+                        file_status.get("length") == resolved_path.file_status.get("length"):
+                    metadata_cache.put_resolved_path(cache_user, file_name_with_path, resolved_path)
+                    return resolved_path.path, resolved_path.file_status
+
+        try:
+            download_file_path, file_status = self._list_download_file_status(file_name_with_path)
+        except ObjectNotFoundError:
+            metadata_cache.put_resolved_path(cache_user, file_name_with_path, HdfsMetadataCache.NOT_FOUND)
+            raise
+
+        if isinstance(download_file_path, str) and file_status is not None:
+            metadata_cache.put_resolved_path(cache_user, file_name_with_path, ResolvedPath(
+                download_file_path, file_status, is_file_path=download_file_path == file_name_with_path))
+        return download_file_path, file_status
+
+    def _list_download_file_status(self, file_name_with_path):
         download_file_path = None
+        file_status = None
 
         list_status_url = self.url + file_name_with_path + "?op=LISTSTATUS"
 
-        response = RestUtil.request_with_retry().get(list_status_url, auth=self.auth)
+        response = RestUtil.request_with_retry(upstream="webhdfs").get(list_status_url, auth=self.auth)
 
         if not response.ok:
             if response.status_code == 404:
@@ -201,83 +902,845 @@ class WebHdfsClient:
                 file_status_list = files_statuses.get("FileStatus")
 
                 if len(file_status_list) > 1:
-                    return [file_name_with_path]
-                    
+                    return [file_name_with_path], None
+
                 path_suffix = file_status_list[0]["pathSuffix"]
                 if len(path_suffix) > 0:
                     if file_status_list[0]["type"] == "DIRECTORY":
-                        download_file_path = self._get_actual_download_file_path(
+                        download_file_path, file_status = self._list_download_file_status(
                             file_name_with_path + "/" + path_suffix)
                     elif file_status_list[0]["type"] == "FILE":
                         download_file_path = file_name_with_path + "/" + path_suffix
+                        file_status = file_status_list[0]
                 else:
                     download_file_path = file_name_with_path
+                    file_status = file_status_list[0]
+
+        return download_file_path, file_status
+
+    def _get_file_status(self, file_name_with_path):
+        """
+        Fetches the FileStatus of the path
+
+        Returns:
+            file_status {dict} -- FileStatus of the path, None when it doesn't exist
+        """
+        file_status_url = self.url + file_name_with_path + "?op=GETFILESTATUS"
+        response = RestUtil.request_with_retry(upstream="webhdfs").get(file_status_url, auth=self.auth)
+        if response.status_code == 404:
+            return None
+        if not response.ok:
+            raise ServiceError(
+                "Attempt to get status of {0} failed with {1} and {2}.".format(file_name_with_path, response.status_code,
+                                                                               response.reason))
+        return response.json().get("FileStatus")
 
-        return download_file_path
+    def get_content_summary(self, file_name_with_path):
+        """
+        Fetches the size and the number of files and directories under the path with GETCONTENTSUMMARY.
+        The summary is cached as long as the modification time of the path doesn't change.
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file or directory identified with a path
+
+        Returns:
+            content_summary {dict} -- The summary of the path
+        """
+        file_status = self._get_file_status(file_name_with_path)
+        if file_status is None:
+            raise ObjectNotFoundError("File {} not found.".format(file_name_with_path))
+        modification_time = file_status.get("modificationTime")
+        summary_cache = HdfsContentSummaryCache()
+        cache_user = self._get_cache_user()
+
+        content_summary = summary_cache.get(cache_user, file_name_with_path, modification_time)
+        cached = content_summary is not None
+        if not cached:
+            content_summary_url = self.url + file_name_with_path + "?op=GETCONTENTSUMMARY"
+            response = RestUtil.request_with_retry(upstream="webhdfs").get(content_summary_url, auth=self.auth)
+            if response.status_code == 404:
+                raise ObjectNotFoundError("File {} not found.".format(file_name_with_path))
+            if not response.ok:
+                raise ServiceError(
+                    "Attempt to get content summary of {0} failed with {1} and {2}.".format(
+                        file_name_with_path, response.status_code, response.reason))
+            content_summary = response.json().get("ContentSummary", {})
+            summary_cache.put(cache_user, file_name_with_path, modification_time, content_summary)
 
-    def download_directory(self, directory_url):
-        '''Downloads directory from remote HDFS to local, archives it and
-        returns the zip of the directory'''
+        return {
+            "type": file_status.get("type"),
+            "length": content_summary.get("length"),
+            "file_count": content_summary.get("fileCount"),
+            "directory_count": content_summary.get("directoryCount"),
+            "space_consumed": content_summary.get("spaceConsumed"),
+            "quota": content_summary.get("quota"),
+            "space_quota": content_summary.get("spaceQuota"),
+            "modification_time": modification_time,
+            "cached": cached
+        }
+
+    def _get_cache_user(self):
+        """Returns the identity the HDFS requests are made with, used to key the per user caches"""
+        if self.principal is not None:
+            return self.principal
+        session = SwSessionManager().get_session()
+        return session.get_username() if session is not None else None
+
+    def download_directory(self, directory_url, request_headers=None, compress=True, transfer_stats=None):
+        '''Streams the directory from remote HDFS as a tar archive, gzip compressed
+        by default. Each file is added to the archive as its bytes arrive from the
+        datanode, nothing is staged on the local disk. The files are read ahead in
+        parallel, big files in ranged segments. The If-None-Match and
+        If-Modified-Since request headers are honoured.'''
         logger.log_info("Downloading the directory {0} ".format(directory_url))
         # Remove the base url from the absolute directory path provided as parameter
         # For example, if the absolute path is hdfs://alpha:9000/configuration/12345/drift,
         # the below statement will return /configuration/12345/drift
         directory_name_with_path = urllib3.util.parse_url(directory_url).path
         directory_name = os.path.split(directory_name_with_path)[1]
-        web_hdfs_url = Environment().get_web_hdfs_url()
-        session = SwSessionManager().get_session()
-        user_name = session.get_username()
-        client = InsecureClient(web_hdfs_url, user_name)
+        attachment_filename = directory_name + (".tar.gz" if compress else ".tar")
+
+        # The archive is identified by the current state of the directory contents
+        file_statuses = list(self._walk(directory_name_with_path.lstrip("/")))
+        directory_key = HdfsContentCache.get_directory_key(directory_name_with_path, file_statuses, compress=compress)
+        # The archive bytes differ between downloads of the same contents, hence the weak entity tag
+        etag = directory_key[:32]
+        last_modified = max((f.get("modificationTime", 0) for _, f in file_statuses), default=None)
+        response = self._get_not_modified_response(request_headers or {}, etag, last_modified, weak=True)
+        if response is not None:
+            return response
+
+        content_cache = HdfsContentCache()
+        cache_writer = None
+        if content_cache.is_enabled():
+            cache_key = HdfsContentCache.get_directory_key(directory_name_with_path, file_statuses, compress=compress,
+                                                           user=self._get_cache_user())
+            cached_file = content_cache.get(cache_key)
+            if cached_file is not None:
+                response = self._send_cached_file(cached_file, attachment_filename)
+                self._set_cache_validators(response, etag, last_modified, weak=True)
+                return response
+            if content_cache.is_cacheable(sum(f.get("length", 0) for _, f in file_statuses)):
+                cache_writer = content_cache.open_writer(cache_key)
+
+        archive = self._stream_directory_archive(directory_name_with_path.lstrip("/"), directory_name,
+                                                 file_statuses, compress, cache_writer, transfer_stats)
+        response = Response(archive, mimetype="application/x-tar", direct_passthrough=True)
+        response.headers["Content-Disposition"] = 'attachment;filename="{}"'.format(attachment_filename)
+        self._set_cache_validators(response, etag, last_modified, weak=True)
+        return response
+
+    def _stream_directory_archive(self, directory_name_with_path, directory_name, file_statuses, compress,
+                                  cache_writer=None, transfer_stats=None):
+        """
+        Yields the tar archive of the directory contents, laid out as ./<directory_name>/<relative path>.
+        When a cache writer is given, the archive is also written into the content cache.
+        """
+        tar = TarStream(compress=compress)
+        completed = False
+        try:
+            for data in self.__generate_directory_archive(tar, directory_name_with_path, directory_name,
+                                                          file_statuses, transfer_stats):
+                if data:
+                    if cache_writer is not None:
+                        cache_writer.write(data)
+                    yield data
+            completed = True
+        except GeneratorExit:
+            logger.log_warning("Client disconnected while downloading the directory {}".format(directory_name_with_path))
+            raise
+        except Exception:
+            logger.log_exception("Streaming the directory {} failed".format(directory_name_with_path), exc_info=True)
+            raise
+        finally:
+            if transfer_stats is not None:
+                transfer_stats.finish()
+            if cache_writer is not None:
+                if completed:
+                    cache_writer.commit()
+                else:
+                    cache_writer.abort()
+
+    def __generate_directory_archive(self, tar, directory_name_with_path, directory_name, file_statuses,
+                                     transfer_stats=None):
+        root = "./" + directory_name
+        yield tar.add_directory(".")
+        if not any(relative_path == "" for relative_path, _ in file_statuses):
+            yield tar.add_directory(root)
+
+        files = [(directory_name_with_path + ("/" + relative_path if relative_path else ""), file_status.get("length", 0))
+                 for relative_path, file_status in file_statuses if file_status.get("type") != "DIRECTORY"]
+        contents = HdfsParallelReader(self._read_file_range, transfer_stats).read(files)
+        try:
+            content = next(contents, None)
+            file_index = 0
+            for relative_path, file_status in file_statuses:
+                name = root + "/" + relative_path if relative_path else root
+                mtime = file_status.get("modificationTime", 0) // 1000
+                mode = int(file_status.get("permission", "0"), 8)
+                if file_status.get("type") == "DIRECTORY":
+                    yield tar.add_directory(name, mtime=mtime, mode=mode or 0o755)
+                    continue
+
+                yield tar.add_file(name, file_status.get("length", 0), mtime=mtime, mode=mode or 0o644)
+                while content is not None and content[0] == file_index:
+                    yield tar.write(content[1])
+                    content = next(contents, None)
+                yield tar.end_file()
+                if transfer_stats is not None:
+                    transfer_stats.add_file()
+                file_index += 1
+        finally:
+            # Cancels the reads in flight when the client disconnected
+            contents.close()
+        yield tar.close()
+
+    def _walk(self, directory_name_with_path):
+        """
+        Lists the contents of the directory recursively
+
+        Keyword arguments:
+            directory_name_with_path {str} -- Name of the directory identified with a path
+
+        Returns:
+            generator of (relative_path, file_status) -- The files and directories under the directory
+        """
+        directories = [""]
+        while directories:
+            relative_directory = directories.pop()
+            for file_status in self._list_status(
+                    directory_name_with_path + ("/" + relative_directory if relative_directory else "")):
+                if not file_status.get("pathSuffix"):
+                    # The path is a file
+                    yield relative_directory, file_status
+                    continue
+                relative_path = (relative_directory + "/" if relative_directory else "") + file_status["pathSuffix"]
+                yield relative_path, file_status
+                if file_status.get("type") == "DIRECTORY":
+                    directories.append(relative_path)
+
+    def _list_status(self, directory_name_with_path):
+        """
+        Lists the directory
+
+        Keyword arguments:
+            directory_name_with_path {str} -- Name of the directory identified with a path
+
+        Returns:
+            file_statuses {list} -- FileStatus of the entries of the directory, or of the path itself when it is a file
+        """
+        list_status_url = self.url + directory_name_with_path + "?op=LISTSTATUS"
+        response = RestUtil.request_with_retry(upstream="webhdfs").get(list_status_url, auth=self.auth)
+        if not response.ok:
+            if response.status_code == 404:
+                raise ObjectNotFoundError("Directory {} not found.".format(directory_name_with_path))
+            raise ServiceError(
+                "Attempt to list directory {0} failed with {1} and {2}.".format(
+                    directory_name_with_path, response.status_code, response.reason))
+        return response.json().get("FileStatuses", {}).get("FileStatus", [])
+
+    def list_directory(self, directory_name_with_path, display_path, recursive=False, glob=None,
+                       limit=constants.LIST_DEFAULT_LIMIT, cursor=None):
+        """
+        Streams the entries of the directory as NDJSON, one FileStatus per line, in the order of their paths.
+        The directory is listed page by page with LISTSTATUS_BATCH while the entries are sent, so the listing
+        is never held in memory. When more than limit entries match, the last line holds the cursor to be
+        passed to get the next page.
+
+        Keyword arguments:
+            directory_name_with_path {str} -- Name of the directory identified with a path
+            display_path {str} -- Path of the directory as requested, the paths of the entries are relative to it
+            recursive {bool} -- Flag to list the subdirectories too
+            glob {str} -- Pattern the names of the entries must match, or their relative paths when it has a /
+            limit {int} -- Maximum number of entries returned
+            cursor {str} -- Cursor returned by the previous page
+
+        Returns:
+             response -- Default Flask response object streaming the entries
+        """
+        directory_name_with_path = directory_name_with_path.rstrip("/")
+        last_path, descend = self.__decode_list_cursor(cursor) if cursor else (None, False)
+        # Fails before the response is started when the directory doesn't exist
+        root_status = self._get_file_status(directory_name_with_path)
+        if root_status is None:
+            raise ObjectNotFoundError("Directory {} not found.".format(directory_name_with_path))
+
+        if root_status.get("type") != "DIRECTORY":
+            entries = iter([] if last_path is not None else [(os.path.basename(directory_name_with_path),
+                                                              root_status)])
+            display_path = posixpath.dirname(display_path.rstrip("/"))
+        elif last_path is None:
+            entries = self.__list_tree(directory_name_with_path, "", None, recursive)
+        else:
+            entries = self.__list_tree_after(directory_name_with_path, last_path, descend, recursive)
+        response = Response(self.__generate_listing(entries, display_path, glob, limit, recursive),
+                            mimetype="application/x-ndjson")
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    def __generate_listing(self, entries, display_path, glob, limit, recursive):
+        match_path = glob is not None and "/" in glob
+        count = 0
+        last_path, last_status = None, None
+        try:
+            for relative_path, file_status in entries:
+                if glob is not None and not fnmatch.fnmatchcase(
+                        relative_path if match_path else posixpath.basename(relative_path), glob):
+                    continue
+                if count >= limit:
+                    if last_path is not None:
+                        # The next page starts after the last entry sent
+                        yield json.dumps({"cursor": self.__encode_list_cursor(last_path, last_status,
+                                                                              recursive)}) + "\n"
+                    return
+                yield json.dumps(self.__get_list_entry(display_path, relative_path, file_status)) + "\n"
+                last_path, last_status = relative_path, file_status
+                count += 1
+        except Exception as e:
+            # The status line is sent already, the error ends the stream
+            logger.log_exception("Listing of {} failed".format(display_path), exc_info=True)
+            yield json.dumps({"error": e.message if isinstance(e, ServiceError) else str(e)}) + "\n"
+
+    def __list_tree(self, directory_name_with_path, relative_directory, start_after, recursive):
+        """Yields the (relative path, FileStatus) of the entries of the directory after start_after, depth first"""
+        for file_status in self._list_status_batches(self.__join_path(directory_name_with_path, relative_directory),
+                                                     start_after):
+            relative_path = self.__join_path(relative_directory, file_status.get("pathSuffix"))
+            yield relative_path, file_status
+            if recursive and file_status.get("type") == "DIRECTORY":
+                yield from self.__list_tree(directory_name_with_path, relative_path, None, recursive)
+
+    def __list_tree_after(self, directory_name_with_path, last_path, descend, recursive):
+        """Resumes the depth first listing after the entry last sent, going back up one directory at a time"""
+        if descend:
+            yield from self.__list_tree(directory_name_with_path, last_path, None, recursive)
+        parts = last_path.split("/")
+        for depth in range(len(parts), 0, -1):
+            try:
+                yield from self.__list_tree(directory_name_with_path, "/".join(parts[:depth - 1]), parts[depth - 1],
+                                            recursive)
+            except ObjectNotFoundError:
+                # The directory was deleted since the previous page
+                continue
+
+    def _list_status_batches(self, directory_name_with_path, start_after=None):
+        """
+        Lists the directory one batch of entries at a time, the batch size is set by the namenode
+
+        Keyword arguments:
+            directory_name_with_path {str} -- Name of the directory identified with a path
+            start_after {str} -- Name of the entry the listing starts after
+
+        Returns:
+            generator of file_status -- FileStatus of the entries of the directory in the order of their names
+        """
+        global _list_status_batch_supported
+        while _list_status_batch_supported:
+            list_status_url = self.url + directory_name_with_path + "?op=LISTSTATUS_BATCH"
+            params = {"startAfter": start_after} if start_after else None
+            response = RestUtil.request_with_retry(upstream="webhdfs").get(list_status_url, params=params,
+                                                                           auth=self.auth)
+            if response.status_code == 400 and "LISTSTATUS_BATCH" in response.text:
+                logger.log_warning("LISTSTATUS_BATCH isn't supported by the namenode, falling back to LISTSTATUS")
+                _list_status_batch_supported = False
+                break
+            if not response.ok:
+                if response.status_code == 404:
+                    raise ObjectNotFoundError("Directory {} not found.".format(directory_name_with_path))
+                raise ServiceError(
+                    "Attempt to list directory {0} failed with {1} and {2}.".format(
+                        directory_name_with_path, response.status_code, response.reason))
+            listing = response.json().get("DirectoryListing", {})
+            file_statuses = listing.get("partialListing", {}).get("FileStatuses", {}).get("FileStatus", [])
+            for file_status in file_statuses:
+                yield file_status
+            if not file_statuses or not listing.get("remainingEntries"):
+                return
+            start_after = file_statuses[-1].get("pathSuffix")
+
+        for file_status in sorted(self._list_status(directory_name_with_path), key=lambda f: f.get("pathSuffix")):
+            if start_after is None or file_status.get("pathSuffix") > start_after:
+                yield file_status
+
+    @staticmethod
+    def __get_list_entry(display_path, relative_path, file_status):
+        return {
+            "path": WebHdfsClient.__join_path(display_path.rstrip("/"), relative_path),
+            "name": posixpath.basename(relative_path),
+            "type": file_status.get("type"),
+            "length": file_status.get("length"),
+            "modification_time": file_status.get("modificationTime"),
+            "permission": file_status.get("permission"),
+            "owner": file_status.get("owner"),
+            "group": file_status.get("group"),
+            "replication": file_status.get("replication")
+        }
+
+    @staticmethod
+    def __encode_list_cursor(last_path, last_status, recursive):
+        cursor = {"path": last_path, "descend": recursive and last_status.get("type") == "DIRECTORY"}
+        return base64.urlsafe_b64encode(json.dumps(cursor).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def __decode_list_cursor(cursor):
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+            return cursor["path"], cursor["descend"]
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+            raise BadRequestError("The cursor {} isn't valid.".format(cursor))
+
+    def download_files(self, file_names_with_paths, archive_format="tar", compress=True, root_path=None,
+                       transfer_stats=None):
+        """
+        Downloads several files in a single response, either a tar archive or a multipart/mixed stream.
+        The files are resolved and read in parallel, and returned in the order of the paths.
+
+        Keyword arguments:
+            file_names_with_paths {list} -- Names of the files identified with a path. Glob patterns are expanded.
+            archive_format {str} -- tar or multipart
+            compress {bool} -- Flag to gzip compress the tar archive
+            root_path {str} -- The files are named relative to this path in the response
+            transfer_stats {TransferStats} -- Counters updated while downloading
+
+        Returns:
+             response -- Default Flask response object streaming the content of the files
+        """
+        pool = SwExecutor().get_pool(HDFS_RESOLVE_POOL, int(Environment().get_hdfs_download_max_concurrency()))
+        resolve = SwSessionManager().bind_session(lambda path: WebHdfsClient()._resolve_download_files(path))
+        files = []
+        file_paths = set()
+        for resolved_files in pool.map(resolve, file_names_with_paths):
+            for file_name_with_path, file_status in resolved_files:
+                if file_name_with_path in file_paths:
+                    continue
+                file_paths.add(file_name_with_path)
+                files.append((file_name_with_path, file_status))
+        if len(files) > constants.MAX_BULK_DOWNLOAD_FILES:
+            raise BadRequestError("The paths match {0} files, at most {1} files can be downloaded at once.".format(
+                len(files), constants.MAX_BULK_DOWNLOAD_FILES))
+        logger.log_info("Downloading {} files".format(len(files)))
+
+        root_path = root_path.strip("/") + "/" if root_path and root_path.strip("/") else ""
+        names = [f[len(root_path):] if root_path and f.startswith(root_path) else f for f, _ in files]
+        contents = HdfsParallelReader(self._read_file_range, transfer_stats).read(
+            [(file_name_with_path, file_status.get("length", 0)) for file_name_with_path, file_status in files])
+
+        if archive_format == "multipart":
+            boundary = uuid.uuid4().hex
+            response = Response(self.__generate_multipart_files(boundary, names, files, contents, transfer_stats),
+                                direct_passthrough=True)
+            response.headers["Content-Type"] = "multipart/mixed; boundary={}".format(boundary)
+            response.headers["Content-Length"] = str(self.__get_multipart_files_length(boundary, names, files))
+            return response
+
+        tar = TarStream(compress=compress)
+        response = Response(self.__generate_archive_files(tar, names, files, contents, transfer_stats),
+                            mimetype="application/x-tar", direct_passthrough=True)
+        response.headers["Content-Disposition"] = 'attachment;filename="{}"'.format(
+            "files.tar.gz" if compress else "files.tar")
+        return response
+
+    def _resolve_download_files(self, file_name_with_path):
+        """
+        Resolves a path of a bulk download to the files to be downloaded
+
+        Returns:
+            files {list} -- The (path, file_status) of the files. Glob patterns matching nothing return no file.
+        """
+        if not GLOB_CHARACTERS.intersection(file_name_with_path):
+            # The archive declares the length of each file before reading it
+            download_file_path, file_status = self._get_actual_download_file_status(file_name_with_path,
+                                                                                    revalidate=True)
+            if file_status is None:
+                raise BadRequestError(
+                    "{} is a directory with multiple entries, it can't be downloaded as a file.".format(file_name_with_path))
+            return [(download_file_path, file_status)]
+        return [m for m in self._expand_glob(file_name_with_path) if m[1].get("type") == "FILE"]
+
+    def _expand_glob(self, file_name_with_path):
+        """
+        Expands the glob pattern to the files and directories matching it
+
+        Returns:
+            matches {list} -- The (path, file_status) of the matches in the order of their paths
+        """
+        # Walk down the pattern one level at a time, listing only the directories matching the pattern so far
+        parts = file_name_with_path.strip("/").split("/")
+        glob_index = next((i for i, part in enumerate(parts) if GLOB_CHARACTERS.intersection(part)), len(parts))
+        if glob_index == len(parts):
+            file_status = self._get_file_status(file_name_with_path.strip("/"))
+            return [(file_name_with_path.strip("/"), file_status)] if file_status is not None else []
+        matches = [("/".join(parts[:glob_index]), None)]
+        for part in parts[glob_index:]:
+            next_matches = []
+            # The entries are listed in the order of their names, a prefix pattern ends past the prefix
+            prefix = part[:-1] if part.endswith("*") and not GLOB_CHARACTERS.intersection(part[:-1]) else None
+            for directory, _ in matches:
+                if not GLOB_CHARACTERS.intersection(part):
+                    file_status = self._get_file_status(self.__join_path(directory, part))
+                    if file_status is not None:
+                        next_matches.append((self.__join_path(directory, part), file_status))
+                    continue
+                try:
+                    for file_status in self._list_status_batches(directory):
+                        path_suffix = file_status.get("pathSuffix")
+                        if prefix and path_suffix > prefix and not path_suffix.startswith(prefix):
+                            break
+                        if path_suffix and fnmatch.fnmatchcase(path_suffix, part):
+                            next_matches.append((self.__join_path(directory, path_suffix), file_status))
+                except ObjectNotFoundError:
+                    continue
+            matches = sorted(next_matches, key=lambda m: m[0])
+        return matches
+
+    def delete_paths(self, file_names_with_paths, older_than=None, dry_run=False, root_path=None):
+        """
+        Deletes the files and directories matching the paths, which are prefixes or glob patterns.
+        The patterns are expanded in parallel with batched listings, and the matches deleted recursively
+        in parallel, capped by HDFS_BATCH_MAX_CONCURRENCY.
+
+        Keyword arguments:
+            file_names_with_paths {list} -- Names of the files or directories identified with a path, glob patterns
+                are expanded, a trailing * matches the entries starting with a prefix
+            older_than {int} -- Only the matches not modified for this number of seconds are deleted
+            dry_run {bool} -- Flag to return the matches without deleting them
+            root_path {str} -- The paths are named relative to this path in the response
+
+        Returns:
+             response {dict} -- The matches with the status of their deletion, and the counts of deletions
+        """
+        pool = SwExecutor().get_pool(HDFS_RESOLVE_POOL, int(Environment().get_hdfs_download_max_concurrency()))
+        expand = SwSessionManager().bind_session(lambda path: WebHdfsClient()._expand_glob(path))
+        matches = {}
+        for expanded_paths in pool.map(expand, file_names_with_paths):
+            for file_name_with_path, file_status in expanded_paths:
+                matches[file_name_with_path] = file_status
+
+        if older_than is not None:
+            modified_before = (time.time() - older_than) * 1000
+            matches = {p: f for p, f in matches.items() if f.get("modificationTime", 0) < modified_before}
+        # The content of a directory to be deleted goes with it, the ancestors of a path sort before it
+        paths = []
+        kept_paths = set()
+        for file_name_with_path in sorted(matches):
+            parts = file_name_with_path.split("/")
+            if not any("/".join(parts[:i]) in kept_paths for i in range(1, len(parts))):
+                paths.append(file_name_with_path)
+                kept_paths.add(file_name_with_path)
+        if len(paths) > constants.MAX_BULK_DELETE_PATHS:
+            raise BadRequestError("The paths match {0} files and directories, at most {1} can be deleted at once.".format(
+                len(paths), constants.MAX_BULK_DELETE_PATHS))
+        logger.log_info("{0} {1} paths".format("Matched" if dry_run else "Deleting", len(paths)))
+
+        results = [{} for _ in paths] if dry_run else \
+            self.run_batch([{"op": "delete", "path": p, "recursive": True} for p in paths])
+        root_path = root_path.strip("/") + "/" if root_path and root_path.strip("/") else ""
+        for file_name_with_path, result in zip(paths, results):
+            file_status = matches[file_name_with_path]
+            result["path"] = file_name_with_path[len(root_path):] if root_path and \
+                file_name_with_path.startswith(root_path) else file_name_with_path
+            result["type"] = file_status.get("type")
+            result["modification_time"] = file_status.get("modificationTime")
+        deleted = len([r for r in results if r.get("status") == 200])
+        return {
+            "dry_run": dry_run,
+            "matched": len(paths),
+            "deleted": deleted,
+            "failed": 0 if dry_run else len(paths) - deleted,
+            "paths": results
+        }
+
+    @staticmethod
+    def __join_path(directory, name):
+        return directory + "/" + name if directory else name
+
+    def __generate_archive_files(self, tar, names, files, contents, transfer_stats=None):
+        try:
+            content = next(contents, None)
+            for file_index, (name, (file_name_with_path, file_status)) in enumerate(zip(names, files)):
+                yield tar.add_file(name, file_status.get("length", 0),
+                                   mtime=file_status.get("modificationTime", 0) // 1000,
+                                   mode=int(file_status.get("permission", "0"), 8) or 0o644)
+                while content is not None and content[0] == file_index:
+                    yield tar.write(content[1])
+                    content = next(contents, None)
+                yield tar.end_file()
+                if transfer_stats is not None:
+                    transfer_stats.add_file()
+            yield tar.close()
+        finally:
+            contents.close()
+            if transfer_stats is not None:
+                transfer_stats.finish()
+
+    @staticmethod
+    def __get_multipart_file_header(boundary, name, file_status):
+        return "--{0}\r\nContent-Type: application/octet-stream\r\n" \
+               "Content-Disposition: attachment; filename=\"{1}\"\r\nContent-Length: {2}\r\n\r\n".format(
+                   boundary, name.replace('"', '\\"'), file_status.get("length", 0)).encode("utf-8")
+
+    def __get_multipart_files_length(self, boundary, names, files):
+        return sum(len(self.__get_multipart_file_header(boundary, name, file_status)) + file_status.get("length", 0) + 2
+                   for name, (_, file_status) in zip(names, files)) + len("--{}--\r\n".format(boundary))
+
+    def __generate_multipart_files(self, boundary, names, files, contents, transfer_stats=None):
+        try:
+            content = next(contents, None)
+            for file_index, (name, (file_name_with_path, file_status)) in enumerate(zip(names, files)):
+                yield self.__get_multipart_file_header(boundary, name, file_status)
+                remaining = file_status.get("length", 0)
+                while content is not None and content[0] == file_index:
+                    remaining -= len(content[1])
+                    if remaining < 0:
+                        break
+                    yield content[1]
+                    content = next(contents, None)
+                if remaining:
+                    # Abort rather than send a part not matching its declared Content-Length
+                    raise ServiceError("The file {} changed while being downloaded.".format(file_name_with_path))
+                yield b"\r\n"
+                if transfer_stats is not None:
+                    transfer_stats.add_file()
+            yield "--{}--\r\n".format(boundary).encode("ascii")
+        finally:
+            contents.close()
+            if transfer_stats is not None:
+                transfer_stats.finish()
+
+    def run_batch(self, operations):
+        """
+        Runs the operations concurrently, each one independently of the others. The number of operations
+        run at the same time by the worker is capped by HDFS_BATCH_MAX_CONCURRENCY.
+
+        Keyword arguments:
+            operations {list} -- Operations as dictionaries with the op, one of delete, mkdir, rename or upload,
+                the path and the arguments of the op: recursive, destination, data and overwrite
+
+        Returns:
+             results {list} -- The status code of each operation in the order of the operations, along with the
+                error message of the failed ones
+        """
+        max_concurrency = int(Environment().get_hdfs_batch_max_concurrency())
+        pool = SwExecutor().get_pool(HDFS_BATCH_POOL, max_concurrency)
+        # Pool threads use a client of their own, the authentication objects are not thread safe
+        run_operation = SwSessionManager().bind_session(
+            lambda operation: WebHdfsClient()._run_batch_operation(operation))
+        futures = [pool.submit(run_operation, operation) for operation in operations]
+        return [future.result() for future in futures]
+
+    def _run_batch_operation(self, operation):
+        op = operation["op"]
+        path = operation["path"]
         try:
-            with tempfile.TemporaryDirectory() as temp:
-                client.download(hdfs_path=directory_name_with_path, local_path=temp, n_threads=5)
-                tmp_archive = os.path.join(temp)
-                data = io.BytesIO()
-                with open(shutil.make_archive(tmp_archive, 'gztar', temp), "rb") as output_data:
-                    data.write(output_data.read())
-                data.seek(0)
-            return send_file(data, as_attachment=True, attachment_filename=directory_name+".tar.gz")
+            if op == "delete":
+                response = self.delete_file(path, recursive=operation.get("recursive"))
+                if not response.json().get("boolean"):
+                    raise ObjectNotFoundError("File {} not found.".format(path))
+                status = 200
+            elif op == "mkdir":
+                self.make_directory(path)
+                status = 201
+            elif op == "rename":
+                self.rename(path, operation["destination"])
+                status = 200
+            elif op == "upload":
+                self.upload_file(path, operation["data"], overwrite=operation.get("overwrite", False))
+                status = 201
+            else:
+                raise BadRequestError("Unknown operation {}.".format(op))
+            return {"status": status}
         except Exception as e:
-            raise ServiceError("Downloading the folder from HDFS failed with the error: {0}".format(str(e)))
+            logger.log_warning("Batch operation {0} of {1} failed: {2}".format(op, path, str(e)))
+            return {
+                "status": self.__get_error_status(e),
+                "error": e.message if isinstance(e, ServiceError) else str(e)
+            }
+
+    @staticmethod
+    def __get_error_status(error):
+        """Returns the status code the error is reported with, as done by the error handlers of the api"""
+        if isinstance(error, BadRequestError):
+            return 400
+        if isinstance(error, AuthenticationError):
+            return 401
+        if isinstance(error, ObjectNotFoundError):
+            return 404
+        if isinstance(error, PreconditionFailedError):
+            return 412
+        return 500
 
-    def upload_directory(self, directory_path, archive_directory_data):
-        '''Untars the archive_directory_data provided as input,
-        and uploads all the contents of the tar to the directory path
-        specified on HDFS.
-        '''
+    def make_directory(self, directory_name_with_path):
+        """
+        Creates the directory along with its missing parents
+
+        Keyword arguments:
+            directory_name_with_path {str} -- Name of the directory identified with a path
+        """
+        make_directory_url = self.url + directory_name_with_path + "?op=MKDIRS"
+        response = RestUtil.request_with_retry(upstream="webhdfs").put(make_directory_url, auth=self.auth)
+        if not response.ok or not response.json().get("boolean"):
+            raise ServiceError("Attempt to create directory {0} failed with {1} and {2}.".format(
+                directory_name_with_path, response.status_code, response.reason))
+        HdfsMetadataCache().invalidate(directory_name_with_path)
+
+    def rename(self, source_path, destination_path):
+        """
+        Renames a file or directory, the destination must not exist
+
+        Keyword arguments:
+            source_path {str} -- Path to be renamed
+            destination_path {str} -- New path
+        """
+        rename_url = self.url + source_path + "?op=RENAME&destination=/" + destination_path.lstrip("/")
+        response = RestUtil.request_with_retry(upstream="webhdfs").put(rename_url, auth=self.auth)
+        HdfsMetadataCache().invalidate(source_path)
+        HdfsMetadataCache().invalidate(destination_path)
+        if response.status_code == 404:
+            raise ObjectNotFoundError("File {} not found.".format(source_path))
+        if not response.ok or not response.json().get("boolean"):
+            raise ServiceError("Attempt to rename {0} to {1} failed with {2} and {3}.".format(
+                source_path, destination_path, response.status_code, response.reason))
+
+    def concat(self, file_name_with_path, source_paths):
+        """
+        Moves the blocks of the source files to the end of the file, the sources are deleted.
+        The content hash recorded on the file no longer holds and is removed.
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file identified with a path
+            source_paths {list} -- Paths of the files to be concatenated, in order
+        """
+        self._remove_content_hash(file_name_with_path)
+        concat_url = self.url + file_name_with_path + "?op=CONCAT&sources=" + \
+            ",".join("/" + path.lstrip("/") for path in source_paths)
+        response = RestUtil.request_with_retry(upstream="webhdfs").post(concat_url, auth=self.auth)
+        HdfsMetadataCache().invalidate(file_name_with_path)
+        if not response.ok:
+            raise ServiceError("Attempt to concatenate files into {0} failed with {1} and {2}.".format(
+                file_name_with_path, response.status_code, response.reason))
+
+    def append_file(self, file_name_with_path, data, content_length=None):
+        """
+        Appends the content to the file, following the namenode redirect to the datanode.
+        The content hash recorded on the file no longer holds and is removed.
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file identified with a path
+            data {bytearray or file} -- Content to be appended
+            content_length {int} -- Length of the stream when known
+        """
+        self._remove_content_hash(file_name_with_path)
+        append_file_url = self.url + file_name_with_path + "?op=APPEND"
+        response = RestUtil.request_with_retry(upstream="webhdfs").post(append_file_url, auth=self.auth,
+                                                                        allow_redirects=False)
+        if response.status_code != 307:
+            raise ServiceError("Attempt to append to file {0} failed with {1} and {2}.".format(
+                file_name_with_path, response.status_code, response.reason))
+
+        body = SpooledBody(data, content_length)
+        try:
+            response = RestUtil.request_with_retry(upstream="webhdfs").post(response.headers["Location"],
+                                                                            auth=self.auth, data=body.get_reader())
+        finally:
+            body.close()
+        HdfsMetadataCache().invalidate(file_name_with_path)
+        if not response.ok:
+            raise ServiceError("Attempt to append to file {0} failed with {1} and {2}.".format(
+                file_name_with_path, response.status_code, response.reason))
+
+    def read_file(self, file_name_with_path):
+        """
+        Reads the whole content of a small file
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file identified with a path
+
+        Returns:
+             content {bytes} -- Content of the file
+        """
+        return self._read_file_range(file_name_with_path)
+
+    def upload_directory(self, directory_path, archive_directory_data, transfer_stats=None):
+        '''Reads the tar provided as input, gzip compressed or not, member by member
+        and writes each member straight to the directory path specified on HDFS.
+        Nothing is staged on the local disk. Small files are uploaded in parallel,
+        big files are streamed from the archive as they are read.'''
         logger.log_info("Uploading the directory to HDFS")
-        web_hdfs_url = Environment().get_web_hdfs_url()
         hdfs_file_base_url = Environment().get_hdfs_file_base_url()
-        session = SwSessionManager().get_session()
-        user_name = session.get_username()
-        client = InsecureClient(web_hdfs_url, user_name)
         directory_name_with_path = "/" + directory_path
-        directory_name = os.path.split(directory_path)[1]
+        if isinstance(archive_directory_data, (bytes, bytearray)):
+            archive_directory_data = io.BytesIO(archive_directory_data)
+
+        max_concurrency = int(Environment().get_hdfs_upload_max_concurrency())
+        pool = SwExecutor().get_pool(HDFS_WRITE_POOL, max_concurrency)
+        # Bounds the number of files read in memory and waiting to be written
+        slots = threading.BoundedSemaphore(max_concurrency)
+        # Pool threads use a client of their own, the authentication objects are not thread safe
+        write_file = SwSessionManager().bind_session(
+            lambda path, data: self.__write_archive_file(WebHdfsClient(), path, data, transfer_stats))
+        max_buffered_size = int(Environment().get_upload_spool_max_memory_size())
+        futures = []
+        if transfer_stats is not None:
+            transfer_stats.set_concurrency(max_concurrency)
         try:
-            with tempfile.TemporaryDirectory() as temp:
-                local_dir_path = temp + "/" + directory_name +".tar.gz"
-                with open(local_dir_path, "wb") as dir_archive:
-                    dir_archive.write(archive_directory_data)
-                with tarfile.open(local_dir_path, "r:gz") as tar:
-                    tar.extractall(temp)
-                os.remove(local_dir_path)
-                response = client.upload(hdfs_path=directory_name_with_path, local_path=temp)
-                logger.log_info("Successfully uploaded the directory {0} to HDFS".format(response))
+            self.make_directory(directory_path)
+            with tarfile.open(fileobj=archive_directory_data, mode="r|*") as tar:
+                for member in tar:
+                    member_path = self.__get_archive_member_path(directory_path, member.name)
+                    if member_path is None:
+                        continue
+                    if member.isdir():
+                        self.make_directory(member_path)
+                    elif member.isfile():
+                        if member.size <= max_buffered_size:
+                            data = tar.extractfile(member).read()
+                            slots.acquire()
+                            future = pool.submit(write_file, member_path, data)
+                            future.add_done_callback(lambda f: slots.release())
+                            futures.append(future)
+                        else:
+                            self.__write_archive_file(self, member_path, tar.extractfile(member), transfer_stats,
+                                                      content_length=member.size)
+                    else:
+                        logger.log_warning("Skipping the archive member {} which isn't a file or a directory".format(
+                            member.name))
+            for future in futures:
+                future.result()
+            HdfsMetadataCache().invalidate(directory_name_with_path)
+            logger.log_info("Successfully uploaded the directory {0} to HDFS".format(directory_name_with_path))
             return hdfs_file_base_url + directory_name_with_path
 
         except Exception as e:
+            for future in futures:
+                future.cancel()
+            if isinstance(e, BadRequestError):
+                raise
             raise ServiceError("Uploading the directory to HDFS failed with the error: {0}".format(str(e)))
-                
+
+    @staticmethod
+    def __write_archive_file(client, file_name_with_path, data, transfer_stats=None, content_length=None):
+        content_length = len(data) if content_length is None else content_length
+        client._write_file(file_name_with_path, data, content_length=content_length)
+        if transfer_stats is not None:
+            transfer_stats.add_file()
+            transfer_stats.add_bytes(content_length)
+
+    @staticmethod
+    def __get_archive_member_path(directory_path, member_name):
+        """Returns the HDFS path of the archive member, None for the root of the archive"""
+        name = posixpath.normpath(member_name)
+        if name.startswith("/") or name == ".." or name.startswith("../"):
+            raise BadRequestError("The archive member {} is outside of the directory.".format(member_name))
+        if name == ".":
+            return None
+        return directory_path.rstrip("/") + "/" + name
+
     def delete_directory(self, directory_url):
-        web_hdfs_url = Environment().get_web_hdfs_url()
-        session = SwSessionManager().get_session()
-        user_name = session.get_username()
-        client = InsecureClient(web_hdfs_url, user_name)
         try:
             directory_name_with_path = urllib3.util.parse_url(directory_url).path
             logger.log_info("Deleting the directory {}".format(directory_name_with_path))
-            response = client.delete(directory_name_with_path, recursive=True)
-            if not response:
+            response = self.delete_file(directory_name_with_path.lstrip("/"), recursive=True)
+            if not response.json().get("boolean"):
                 raise ServiceError("Directory {0} doesn't exist".format(directory_name_with_path))
             return
 
@@ -10,13 +10,22 @@
 # an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
 # specific language governing permissions and limitations under the License.
 # ----------------------------------------------------------------------------------------------------
+import base64
+import binascii
+import os
 import time
 from string import Template
 
+from service.clients.hdfs_content_cache import HdfsContentCache
+from service.clients.hdfs_retention_collector import HdfsRetentionCollector
+from service.clients.hdfs_upload_sessions import HdfsUploadSessions
 from service.clients.web_hdfs_client import WebHdfsClient
-from service.exception.exceptions import ServiceError
+from service.exception.exceptions import BadRequestError, ServiceError
+from service.utils import constants
 from service.utils.environment import Environment
 from service.utils.sw_logger import SwLogger
+from service.utils.transfer_operations import TransferOperations
+from service.utils.transfer_stats import StatsReader, TransferStats
 
 logger = SwLogger(__name__)
 
@@ -28,52 +37,59 @@ class FilesProvider:
     def __init__(self):
         self.client = WebHdfsClient()
 
-    def upload_file(self, file_name_with_path, data, overwrite=False):
+    def upload_file(self, file_name_with_path, data, overwrite=False, content_length=None, content_hash=None):
         """
         Uploads file to a HDFS location identified by the path
 
         Keyword arguments:
             file_name_with_path {str} -- Name of the file identified with a path
-            data {bytearray} -- Byte array representation of the file
+            data {bytearray or file} -- Byte array representation of the file, or a stream of the file
             overwrite {bool} -- Flag indicating of the file should be overwritten
+            content_length {int} -- Length of the stream when known
+            content_hash {str} -- SHA-256 digest of the content as a hex string, used to deduplicate the upload
 
         Returns:
              response {dict} -- Dictionary denoting the status of the upload operation and the relative location of the file.
         """
         response = None
         try:
-            response = self.client.upload_file(self.__update_absolute_hdfs_file_path(file_name_with_path), data, overwrite)
+            response = self.client.upload_file(self.__update_absolute_hdfs_file_path(file_name_with_path), data, overwrite,
+                                               content_length=content_length, content_hash=content_hash)
         except Exception as ex:
             logger.log_exception("File upload operation failed", exc_info=True)
             if isinstance(ex, ServiceError):
                 raise ex
         return response
 
-    def download_file(self, file_name_with_path):
+    def download_file(self, file_name_with_path, request_headers=None):
         """
         Downloads a file from HDFS location identified by the path
 
         Keyword arguments:
             file_name_with_path {str} -- Name of the file identified with a path
+            request_headers {dict} -- Headers of the request, used for range and conditional requests
 
         Returns:
              response -- Default Flask response object with file content and appropriate headers set
         """
         response = None
         try:
-            response = self.client.download_file(self.__update_absolute_hdfs_file_path(file_name_with_path))
+            response = self.client.download_file(self.__update_absolute_hdfs_file_path(file_name_with_path),
+                                                 request_headers=request_headers)
         except Exception as ex:
             logger.log_exception("File download operation failed", exc_info=True)
             if isinstance(ex, ServiceError):
                 raise ex
         return response
 
-    def download_directory(self, directory_path):
+    def download_directory(self, directory_path, request_headers=None, compress=True):
         """
         Downloads a file from HDFS location identified by the path
 
         Keyword arguments:
             directory_path {str} -- Name of the directory identified with a path
+            request_headers {dict} -- Headers of the request, used for conditional requests
+            compress {bool} -- Flag to gzip compress the tar archive
 
         Returns:
              response -- Default Flask response object with archived directory content and appropriate headers set
@@ -81,17 +97,249 @@ class FilesProvider:
         response = None
         try:
             start_time = time.time()
-            response = self.client.download_directory(directory_path)
+            transfer_stats = TransferStats("Download of the directory {}".format(directory_path))
+            response = self.client.download_directory(directory_path, request_headers=request_headers,
+                                                      compress=compress, transfer_stats=transfer_stats)
             end_time = time.time()
             logger.log_info("Time taken to download the directory {0} is {1}".format(
                     directory_path, str(end_time - start_time)
                 ))
+            if response is not None:
+                # The content is streamed after returning, the stats are complete once the response is closed
+                response.call_on_close(lambda: self.__log_transfer_stats(transfer_stats))
         except Exception as ex:
             logger.log_exception("Directory download operation failed", exc_info=True)
             if isinstance(ex, ServiceError):
                 raise ex
         return response
 
+    def list_directory(self, directory_path, recursive=False, glob=None, limit=None, cursor=None):
+        """
+        Lists a directory of HDFS identified by the path, page by page
+
+        Keyword arguments:
+            directory_path {str} -- Name of the directory identified with a path
+            recursive {bool} -- Flag to list the subdirectories too
+            glob {str} -- Pattern the names of the entries must match, or their relative paths when it has a /
+            limit {int} -- Maximum number of entries returned
+            cursor {str} -- Cursor returned by the previous page
+
+        Returns:
+             response -- Default Flask response object streaming the entries as NDJSON
+        """
+        response = None
+        try:
+            if limit is None:
+                limit = constants.LIST_DEFAULT_LIMIT
+            if limit < 1 or limit > constants.LIST_MAX_LIMIT:
+                raise BadRequestError("The limit must be between 1 and {}.".format(constants.LIST_MAX_LIMIT))
+            response = self.client.list_directory(self.__update_absolute_hdfs_file_path(directory_path),
+                                                  directory_path, recursive=recursive, glob=glob, limit=limit,
+                                                  cursor=cursor)
+        except Exception as ex:
+            logger.log_exception("Directory listing operation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def get_content_summary(self, file_name_with_path):
+        """
+        Returns the size and the number of files and directories under a HDFS path
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file or directory identified with a path
+
+        Returns:
+             response {dict} -- Dictionary with the content summary of the path
+        """
+        response = None
+        try:
+            response = self.client.get_content_summary(self.__update_absolute_hdfs_file_path(file_name_with_path))
+            response["path"] = file_name_with_path
+        except Exception as ex:
+            logger.log_exception("Content summary operation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def download_files(self, file_names_with_paths, archive_format="tar", compress=True):
+        """
+        Downloads several files from HDFS in a single response
+
+        Keyword arguments:
+            file_names_with_paths {list} -- Names of the files identified with a path, glob patterns are allowed
+            archive_format {str} -- tar or multipart
+            compress {bool} -- Flag to gzip compress the tar archive
+
+        Returns:
+             response -- Default Flask response object streaming the content of the files
+        """
+        response = None
+        try:
+            transfer_stats = TransferStats("Download of {} paths".format(len(file_names_with_paths)))
+            response = self.client.download_files(
+                [self.__update_absolute_hdfs_file_path(f) for f in file_names_with_paths],
+                archive_format=archive_format, compress=compress,
+                root_path=Environment().get_base_hdfs_location(), transfer_stats=transfer_stats)
+            if response is not None:
+                response.call_on_close(lambda: self.__log_transfer_stats(transfer_stats))
+        except Exception as ex:
+            logger.log_exception("Bulk download operation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def create_upload(self, file_name_with_path, overwrite=False, total_chunks=None):
+        """
+        Creates a session to upload a file to HDFS in chunks
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file identified with a path
+            overwrite {bool} -- Flag indicating of the file should be overwritten
+            total_chunks {int} -- Number of chunks of the file when known
+
+        Returns:
+             response {dict} -- Status of the upload session
+        """
+        response = None
+        try:
+            response = self.__get_upload_sessions().create_upload(
+                self.__update_absolute_hdfs_file_path(file_name_with_path), overwrite=overwrite,
+                total_chunks=total_chunks)
+        except Exception as ex:
+            logger.log_exception("Upload session creation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def upload_chunk(self, upload_id, chunk_number, data, content_length=None):
+        """
+        Uploads a chunk of the file of an upload session
+
+        Keyword arguments:
+            upload_id {str} -- Identifier of the upload session
+            chunk_number {int} -- Number of the chunk, starting at 0
+            data {bytearray or file} -- Content of the chunk
+            content_length {int} -- Length of the stream when known
+
+        Returns:
+             response {dict} -- Number and size of the uploaded chunk
+        """
+        response = None
+        try:
+            response = self.__get_upload_sessions().upload_chunk(upload_id, chunk_number, data,
+                                                                 content_length=content_length)
+        except Exception as ex:
+            logger.log_exception("Chunk upload operation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def get_upload(self, upload_id):
+        """
+        Fetches the status of an upload session
+
+        Keyword arguments:
+            upload_id {str} -- Identifier of the upload session
+
+        Returns:
+             response {dict} -- Status of the upload session, with the received and the missing chunks
+        """
+        response = None
+        try:
+            response = self.__get_upload_sessions().get_upload(upload_id)
+        except Exception as ex:
+            logger.log_exception("Fetching the upload session failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def commit_upload(self, upload_id):
+        """
+        Assembles the chunks of an upload session into the file
+
+        Keyword arguments:
+            upload_id {str} -- Identifier of the upload session
+
+        Returns:
+             response {dict} -- Dictionary denoting the status of the upload operation and the relative location of the file.
+        """
+        response = None
+        try:
+            start_time = time.time()
+            response = self.__get_upload_sessions().commit_upload(upload_id)
+            logger.log_info("Time taken to commit the upload session {0} is {1}".format(
+                upload_id, str(time.time() - start_time)))
+        except Exception as ex:
+            logger.log_exception("Upload session commit failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def delete_upload(self, upload_id):
+        """
+        Deletes an upload session and its chunks
+
+        Keyword arguments:
+            upload_id {str} -- Identifier of the upload session
+        """
+        try:
+            self.__get_upload_sessions().delete_upload(upload_id)
+        except Exception as ex:
+            logger.log_exception("Upload session deletion failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+
+    def __get_upload_sessions(self):
+        return HdfsUploadSessions(self.__update_absolute_hdfs_file_path(Environment().get_upload_sessions_dir()))
+
+    def move(self, source_path, destination_path):
+        """
+        Moves a file or directory within HDFS without transferring its content
+
+        Keyword arguments:
+            source_path {str} -- Name of the file or directory to be moved identified with a path
+            destination_path {str} -- New name of the file or directory identified with a path
+
+        Returns:
+             response {dict} -- Dictionary denoting the status of the move and the relative location of the destination.
+        """
+        response = None
+        try:
+            response = self.client.move(self.__update_absolute_hdfs_file_path(source_path),
+                                        self.__update_absolute_hdfs_file_path(destination_path))
+        except Exception as ex:
+            logger.log_exception("Move operation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def copy(self, source_path, destination_path, overwrite=False):
+        """
+        Copies a file or directory within HDFS, without sending its content to the client
+
+        Keyword arguments:
+            source_path {str} -- Name of the file or directory to be copied identified with a path
+            destination_path {str} -- Name of the copy identified with a path
+            overwrite {bool} -- Flag indicating if the existing files of the copy should be overwritten
+
+        Returns:
+             response {dict} -- Dictionary denoting the status of the copy, the relative location of the copy and
+                the number of files and bytes copied.
+        """
+        response = None
+        try:
+            transfer_stats = TransferStats("Copy of {}".format(source_path))
+            response = self.client.copy(self.__update_absolute_hdfs_file_path(source_path),
+                                        self.__update_absolute_hdfs_file_path(destination_path),
+                                        overwrite=overwrite, transfer_stats=transfer_stats)
+            self.__log_transfer_stats(transfer_stats)
+        except Exception as ex:
+            logger.log_exception("Copy operation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
     def delete_file(self, file_name_with_path):
         """
         Deletes a file from HDFS identified by the path
@@ -132,13 +380,103 @@ class FilesProvider:
         return response
 
     
+    def run_batch(self, operations):
+        """
+        Runs several delete, mkdir, rename and small upload operations concurrently
+
+        Keyword arguments:
+            operations {list} -- Operations as dictionaries with the op and the path, the destination of a rename,
+                the base64 encoded content of an upload and the recursive and overwrite flags
+
+        Returns:
+             response {dict} -- The status of each operation in the order of the request, with the counts of
+                the operations which succeeded and failed
+        """
+        response = None
+        try:
+            if not operations or len(operations) > constants.MAX_BATCH_OPERATIONS:
+                raise BadRequestError("Between 1 and {} operations are expected.".format(
+                    constants.MAX_BATCH_OPERATIONS))
+            batch = [self.__get_batch_operation(index, operation) for index, operation in enumerate(operations)]
+            results = self.client.run_batch(batch)
+            for operation, result in zip(operations, results):
+                result["op"] = operation.get("op")
+                result["path"] = operation.get("path")
+            succeeded = len([r for r in results if r["status"] < 400])
+            response = {
+                "operations": results,
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded
+            }
+        except Exception as ex:
+            logger.log_exception("Batch operation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def __get_batch_operation(self, index, operation):
+        """Validates the operation of a batch request and resolves its paths"""
+        op = operation.get("op")
+        if op not in ["delete", "mkdir", "rename", "upload"] or not operation.get("path"):
+            raise BadRequestError("Operation {} must have an op of delete, mkdir, rename or upload and a path.".format(
+                index))
+        batch_operation = {
+            "op": op,
+            "path": self.__update_absolute_hdfs_file_path(operation.get("path")),
+            "recursive": operation.get("recursive"),
+            "overwrite": operation.get("overwrite") is True
+        }
+        if op == "rename":
+            if not operation.get("destination"):
+                raise BadRequestError("Operation {} must have a destination.".format(index))
+            batch_operation["destination"] = self.__update_absolute_hdfs_file_path(operation.get("destination"))
+        elif op == "upload":
+            try:
+                data = base64.b64decode(operation.get("content") or "", validate=True)
+            except (binascii.Error, TypeError):
+                raise BadRequestError("The content of operation {} must be base64 encoded.".format(index))
+            if len(data) > constants.MAX_BATCH_UPLOAD_SIZE:
+                raise BadRequestError("The content of operation {0} is bigger than {1} bytes.".format(
+                    index, constants.MAX_BATCH_UPLOAD_SIZE))
+            batch_operation["data"] = data
+        return batch_operation
+
+    def delete_paths(self, file_names_with_paths, older_than=None, dry_run=False):
+        """
+        Deletes the files and directories of HDFS matching the prefixes or glob patterns, in parallel
+
+        Keyword arguments:
+            file_names_with_paths {list} -- Names of the files or directories identified with a path, glob patterns
+                are expanded, a trailing * matches the entries starting with a prefix
+            older_than {int} -- Only the matches not modified for this number of seconds are deleted
+            dry_run {bool} -- Flag to return the matches without deleting them
+
+        Returns:
+             response {dict} -- The matches with the status of their deletion, and the counts of deletions
+        """
+        response = None
+        try:
+            base_path = Environment().get_base_hdfs_location().strip("/")
+            absolute_paths = [self.__update_absolute_hdfs_file_path(f) for f in file_names_with_paths]
+            if any(not p.strip("/") or p.strip("/") == base_path for p in absolute_paths):
+                raise BadRequestError("The base HDFS location can't be deleted.")
+            if older_than is not None and older_than < 0:
+                raise BadRequestError("The age of the paths to be deleted can't be negative.")
+            response = self.client.delete_paths(absolute_paths, older_than=older_than, dry_run=dry_run,
+                                                root_path=Environment().get_base_hdfs_location())
+        except Exception as ex:
+            logger.log_exception("Bulk delete operation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
     def upload_directory(self, hdfs_directory_path, archive_directory_data):
         """
         Upplaods a directory to HDFS identified by the path
 
         Keyword arguments:
             hdfs_directory_path {str} -- Name of the directory identified with a path
-            archive_directory_data {binary data} - Directory content in tar.gz format
+            archive_directory_data {binary data or file} - Directory content in tar.gz format, or a stream of it
 
         Returns:
              response -- Http method response
@@ -147,10 +485,13 @@ class FilesProvider:
         start_time = time.time()
         try:
             absolute_directory_path = self.__update_absolute_hdfs_file_path(hdfs_directory_path)
-            response = self.client.upload_directory(absolute_directory_path, archive_directory_data)
+            transfer_stats = TransferStats("Upload of the directory {}".format(hdfs_directory_path))
+            response = self.client.upload_directory(absolute_directory_path, archive_directory_data,
+                                                    transfer_stats=transfer_stats)
             end_time = time.time()
             logger.log_info("Time taken to upload the directory {0} is {1}".format(
                     hdfs_directory_path, str(end_time - start_time)))
+            self.__log_transfer_stats(transfer_stats)
         except Exception as ex:
             logger.log_exception("Directory upload operation failed", exc_info=True)
             if isinstance(ex, ServiceError):
@@ -159,6 +500,174 @@ class FilesProvider:
 
     
 
+    def start_upload_file(self, file_name_with_path, data, overwrite=False, content_hash=None):
+        """
+        Starts the upload of a file in the background, the content is saved locally before returning
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file identified with a path
+            data {file} -- Stream of the file
+            overwrite {bool} -- Flag indicating of the file should be overwritten
+            content_hash {str} -- SHA-256 digest of the content as a hex string, used to deduplicate the upload
+
+        Returns:
+             response {dict} -- The state of the transfer operation
+        """
+        absolute_file_path = self.__update_absolute_hdfs_file_path(file_name_with_path)
+
+        def upload(transfer_stats, input_file, result_path):
+            response = WebHdfsClient().upload_file(absolute_file_path, StatsReader(input_file, transfer_stats),
+                                                   overwrite, content_length=os.fstat(input_file.fileno()).st_size,
+                                                   content_hash=content_hash)
+            transfer_stats.add_file()
+            return response
+
+        return self.__start_transfer("upload", file_name_with_path, upload, input_stream=data)
+
+    def start_upload_directory(self, hdfs_directory_path, archive_directory_data):
+        """
+        Starts the upload of a directory in the background, the archive is saved locally before returning
+
+        Keyword arguments:
+            hdfs_directory_path {str} -- Name of the directory identified with a path
+            archive_directory_data {file} - Stream of the directory content in tar.gz format
+
+        Returns:
+             response {dict} -- The state of the transfer operation
+        """
+        absolute_directory_path = self.__update_absolute_hdfs_file_path(hdfs_directory_path)
+
+        def upload(transfer_stats, input_file, result_path):
+            return WebHdfsClient().upload_directory(absolute_directory_path, input_file,
+                                                    transfer_stats=transfer_stats)
+
+        return self.__start_transfer("upload", hdfs_directory_path, upload, input_stream=archive_directory_data)
+
+    def start_download_file(self, file_name_with_path):
+        """
+        Starts the download of a file in the background, its content is fetched with get_transfer_result
+
+        Keyword arguments:
+            file_name_with_path {str} -- Name of the file identified with a path
+
+        Returns:
+             response {dict} -- The state of the transfer operation
+        """
+        absolute_file_path = self.__update_absolute_hdfs_file_path(file_name_with_path)
+
+        def download(transfer_stats, input_file, result_path):
+            response = WebHdfsClient().download_file(absolute_file_path)
+            result = TransferOperations.save_response(response, result_path, transfer_stats=transfer_stats)
+            transfer_stats.add_file()
+            return result
+
+        return self.__start_transfer("download", file_name_with_path, download)
+
+    def start_download_directory(self, directory_path, compress=True):
+        """
+        Starts the download of a directory in the background, its archive is fetched with get_transfer_result
+
+        Keyword arguments:
+            directory_path {str} -- Name of the directory identified with a path
+            compress {bool} -- Flag to gzip compress the tar archive
+
+        Returns:
+             response {dict} -- The state of the transfer operation
+        """
+        def download(transfer_stats, input_file, result_path):
+            response = WebHdfsClient().download_directory(directory_path, compress=compress,
+                                                          transfer_stats=transfer_stats)
+            return TransferOperations.save_response(response, result_path)
+
+        return self.__start_transfer("download", directory_path, download)
+
+    def get_transfer(self, operation_id):
+        """
+        Returns the state of a transfer operation, with its progress and its result once ended
+
+        Keyword arguments:
+            operation_id {str} -- Identifier of the transfer operation
+
+        Returns:
+             response {dict} -- The state of the transfer operation
+        """
+        response = None
+        try:
+            response = TransferOperations().get(operation_id, self.client._get_cache_user())
+        except Exception as ex:
+            logger.log_exception("Get transfer operation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def get_transfer_result(self, operation_id):
+        """
+        Downloads the content fetched by a finished download operation
+
+        Keyword arguments:
+            operation_id {str} -- Identifier of the transfer operation
+
+        Returns:
+             response -- Default Flask response object with the content and appropriate headers set
+        """
+        response = None
+        try:
+            response = TransferOperations().send_result(operation_id, self.client._get_cache_user())
+        except Exception as ex:
+            logger.log_exception("Transfer result download failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def delete_transfer(self, operation_id):
+        """
+        Deletes an ended transfer operation along with its content
+
+        Keyword arguments:
+            operation_id {str} -- Identifier of the transfer operation
+        """
+        try:
+            TransferOperations().delete(operation_id, self.client._get_cache_user())
+        except Exception as ex:
+            logger.log_exception("Delete transfer operation failed", exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+
+    def __start_transfer(self, operation_type, path, function, input_stream=None):
+        response = None
+        try:
+            response = TransferOperations().start(operation_type, path, self.client._get_cache_user(), function,
+                                                  input_stream=input_stream)
+        except Exception as ex:
+            logger.log_exception("Starting the {} operation failed".format(operation_type), exc_info=True)
+            if isinstance(ex, ServiceError):
+                raise ex
+        return response
+
+    def get_content_cache_stats(self):
+        """
+        Returns the hit and miss metrics of the local content cache of the worker serving the request
+
+        Returns:
+             response {dict} -- Dictionary with the cache metrics
+        """
+        return HdfsContentCache().get_stats()
+
+    def get_retention_metrics(self):
+        """
+        Returns the metrics of the collector deleting the expired run artifacts from HDFS
+
+        Returns:
+             response {dict} -- Dictionary with the totals of the paths, files and bytes deleted and the last run
+        """
+        return HdfsRetentionCollector().get_metrics()
+
+    @staticmethod
+    def __log_transfer_stats(transfer_stats):
+        if transfer_stats.bytes > 0:
+            transfer_stats.finish()
+            logger.log_info(str(transfer_stats))
+
     @staticmethod
     def __update_absolute_hdfs_file_path(file_name_with_path):
 
@@ -52,6 +52,13 @@ class ObjectNotFoundError(ServiceError):
         super().__init__(msg, error=error, target=target)
 
 
+class PreconditionFailedError(ServiceError):
+    """Exception raised when a precondition of the request isn't met."""
+
+    def __init__(self, msg, error=None, target: ErrorTarget = None):
+        super().__init__(msg, error=error, target=target)
+
+
 class InternalServerError(ServiceError):
     '''Exception raised when unexpected error occur.'''
 
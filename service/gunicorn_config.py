@@ -15,6 +15,7 @@ import multiprocessing
 import socket
 
 
+from service.utils import constants
 from service.utils.sw_logger import SwLogger
 
 logger = SwLogger(__name__)
@@ -41,7 +42,7 @@ access_log_format = "%(t)s '%(r)s' %(s)s %(b)s '%(f)s' '%(a)s'"
 #workers = (2 * cpu_count) + 1
 workers = 5
 worker_class = "gthread"
-threads = 500
+threads = constants.GUNICORN_THREADS
 timeout = 1800  # 30 minutes
 keepalive = 2
 
@@ -93,4 +94,10 @@ def worker_abort(worker):
 
 def worker_exit(server, exit):
     logger.log_info("Worker exiting.")
+    from service.clients.hdfs_retention_collector import HdfsRetentionCollector
+    HdfsRetentionCollector().stop()
+    from service.utils.sw_executor import SwExecutor
+    SwExecutor().shutdown()
+    from service.utils.rest_util import RestUtil
+    RestUtil.close_sessions()
     logger.log_info("Worker exited.")
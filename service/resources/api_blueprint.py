@@ -15,7 +15,7 @@ from flask import Blueprint
 from flask_restplus import Api
 
 from service.exception.exceptions import (AuthenticationError, BadRequestError, ObjectNotFoundError, ServiceError,
-                                          ServiceErrors, InternalServerError)
+                                          ServiceErrors, InternalServerError, PreconditionFailedError)
 from service.resources.files import ns as fns
 from service.resources.jobs import ns as jns
 from service.resources.records import ns as rns
@@ -68,6 +68,13 @@ def object_error_handler(e):
     return get_error_json(e.message, e), 404
 
 
+@api.errorhandler(PreconditionFailedError)
+def precondition_failed_handler(e):
+    '''Precondition failed error handler'''
+    logger.log_warning(str(e), exc_info=True)
+    return get_error_json(e.message, e), 412
+
+
 @api.errorhandler(InternalServerError)
 def internal_server_error_handler(e):
     '''Internal server error handler'''
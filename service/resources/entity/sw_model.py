@@ -59,7 +59,167 @@ class SwModel:
 
         self.upload_file_response_model = self.ns.model("UploadFilesResponse", {
             "status": fields.String(description="Status of the upload operation."),
-            "location": fields.String(description="Relative path of the file uploaded.")
+            "location": fields.String(description="Relative path of the file uploaded."),
+            "deduplicated": fields.Boolean(description="Flag set when the file already had the content or was copied within HDFS.")
+        })
+
+        self.content_summary_model = self.ns.model("ContentSummary", {
+            "path": fields.String(description="Name of the file or directory with path."),
+            "type": fields.String(description="Type of the path, FILE or DIRECTORY."),
+            "length": fields.Integer(description="Total size of the files in bytes."),
+            "file_count": fields.Integer(description="Number of files."),
+            "directory_count": fields.Integer(description="Number of directories, the path itself included."),
+            "space_consumed": fields.Integer(description="Disk space used by the files in bytes, replicas included."),
+            "quota": fields.Integer(description="Name quota of the directory, -1 when not set."),
+            "space_quota": fields.Integer(description="Space quota of the directory in bytes, -1 when not set."),
+            "modification_time": fields.Integer(description="Modification time of the path in milliseconds since the epoch."),
+            "cached": fields.Boolean(description="Flag set when the summary was served from the cache of the worker.")
+        })
+
+        self.copy_request_model = self.ns.model("CopyRequest", {
+            "source": fields.String(required=True, description="Name of the file or directory with path.", example="arun/testing/model"),
+            "destination": fields.String(required=True, description="New name of the file or directory with path. It must not exist for a move.", example="arun/production/model"),
+            "overwrite": fields.Boolean(description="Flag to overwrite the existing files of the copy. Defaults to false.", example=False)
+        })
+
+        self.copy_response_model = self.ns.model("CopyResponse", {
+            "status": fields.String(description="Status of the copy or move."),
+            "location": fields.String(description="Relative path of the copy or of the moved file or directory."),
+            "files": fields.Integer(description="Number of files copied."),
+            "bytes": fields.Integer(description="Number of bytes copied.")
+        })
+
+        self.bulk_download_request_model = self.ns.model("BulkDownloadRequest", {
+            "files": fields.List(fields.String(), required=True, description="Names of the files with path to be downloaded. Glob patterns such as * and ? are expanded.", example=["arun/testing/output/*.json", "arun/testing/first_spark_job.py"]),
+            "format": fields.String(description="Format of the response, tar or multipart. Defaults to tar.", enum=["tar", "multipart"], example="tar"),
+            "compress": fields.Boolean(description="Flag to gzip compress the tar. Defaults to true.", example=True)
+        })
+
+        self.batch_operation_model = self.ns.model("BatchOperation", {
+            "op": fields.String(required=True, description="Operation to be run.", enum=["delete", "mkdir", "rename", "upload"], example="delete"),
+            "path": fields.String(required=True, description="Name of the file or directory with path.", example="arun/testing/output"),
+            "destination": fields.String(description="New name of the file or directory with path, for a rename."),
+            "content": fields.String(description="Base64 encoded content of the file, for an upload. Up to 1 MiB."),
+            "overwrite": fields.Boolean(description="Flag to overwrite the file if already exists, for an upload."),
+            "recursive": fields.Boolean(description="Flag to delete a directory with its content. By default paths without an extension are deleted recursively.")
+        })
+
+        self.batch_request_model = self.ns.model("BatchRequest", {
+            "operations": fields.List(fields.Nested(self.batch_operation_model), required=True, description="Operations to be run, up to 1000. They run concurrently and independently of each other.")
+        })
+
+        self.batch_operation_result_model = self.ns.model("BatchOperationResult", {
+            "op": fields.String(description="Operation run."),
+            "path": fields.String(description="Name of the file or directory with path."),
+            "status": fields.Integer(description="Status code of the operation, as returned by the single file endpoints."),
+            "error": fields.String(description="Message of the error the operation failed with.")
+        })
+
+        self.batch_response_model = self.ns.model("BatchResponse", {
+            "operations": fields.List(fields.Nested(self.batch_operation_result_model), description="Result of each operation, in the order of the request."),
+            "succeeded": fields.Integer(description="Number of operations which succeeded."),
+            "failed": fields.Integer(description="Number of operations which failed.")
+        })
+
+        self.bulk_delete_request_model = self.ns.model("BulkDeleteRequest", {
+            "paths": fields.List(fields.String(), required=True, description="Names of the files or directories with path to be deleted. Glob patterns such as * and ? are expanded, a trailing * matches the entries starting with a prefix.", example=["testing_data/Configuration_Job/*"]),
+            "older_than": fields.Integer(description="Only the files and directories not modified for this number of seconds are deleted. The modification time of a directory changes with its direct entries only.", example=86400),
+            "dry_run": fields.Boolean(description="Flag to return the matching paths without deleting them. Defaults to false.", example=False)
+        })
+
+        self.bulk_delete_result_model = self.ns.model("BulkDeleteResult", {
+            "path": fields.String(description="Name of the file or directory with path."),
+            "type": fields.String(description="Type of the path, FILE or DIRECTORY."),
+            "modification_time": fields.Integer(description="Modification time of the path in milliseconds since the epoch."),
+            "status": fields.Integer(description="Status code of the deletion, absent on a dry run."),
+            "error": fields.String(description="Message of the error the deletion failed with.")
+        })
+
+        self.bulk_delete_response_model = self.ns.model("BulkDeleteResponse", {
+            "dry_run": fields.Boolean(description="Flag set when nothing was deleted."),
+            "matched": fields.Integer(description="Number of files and directories matching the paths."),
+            "deleted": fields.Integer(description="Number of files and directories deleted."),
+            "failed": fields.Integer(description="Number of deletions which failed."),
+            "paths": fields.List(fields.Nested(self.bulk_delete_result_model), description="The matching files and directories in the order of their paths. The content of a matching directory isn't listed.")
+        })
+
+        self.upload_session_model = self.ns.model("UploadSession", {
+            "id": fields.String(description="Identifier of the upload session."),
+            "file": fields.String(description="Path of the file uploaded."),
+            "status": fields.String(description="Status of the upload session, open or committing."),
+            "total_chunks": fields.Integer(description="Number of chunks of the file, when given on creation."),
+            "chunks": fields.List(fields.Integer(), description="Numbers of the chunks received."),
+            "missing_chunks": fields.List(fields.Integer(), description="Numbers of the chunks missing to commit the upload."),
+            "size": fields.Integer(description="Total size of the chunks received in bytes.")
+        })
+
+        self.upload_chunk_model = self.ns.model("UploadChunk", {
+            "id": fields.String(description="Identifier of the upload session."),
+            "chunk": fields.Integer(description="Number of the chunk."),
+            "size": fields.Integer(description="Size of the chunk in bytes.")
+        })
+
+        self.transfer_progress_model = self.ns.model("TransferProgress", {
+            "bytes": fields.Integer(description="Number of bytes transferred."),
+            "files": fields.Integer(description="Number of files transferred."),
+            "duration": fields.Float(description="Number of seconds since the start of the transfer."),
+            "bytes_per_second": fields.Integer(description="Average rate of the transfer.")
+        })
+
+        self.transfer_operation_model = self.ns.model("TransferOperation", {
+            "id": fields.String(description="Identifier of the transfer operation."),
+            "type": fields.String(description="Type of the transfer, upload or download.", enum=["upload", "download"]),
+            "path": fields.String(description="Path of the file or directory transferred."),
+            "status": fields.String(description="Status of the transfer.", enum=["running", "finished", "failed"]),
+            "created_at": fields.Float(description="Start time of the transfer in seconds since the epoch."),
+            "updated_at": fields.Float(description="Time of the last update of the status in seconds since the epoch."),
+            "progress": fields.Nested(self.transfer_progress_model, description="Progress of the transfer."),
+            "result": fields.Raw(description="Result of the upload, or the size and type of the content downloaded."),
+            "error": fields.String(description="Message of the error the transfer failed with.")
+        })
+
+        self.content_cache_stats_model = self.ns.model("ContentCacheStats", {
+            "hits": fields.Integer(description="Number of downloads served from the cache."),
+            "misses": fields.Integer(description="Number of cacheable downloads not found in the cache."),
+            "evictions": fields.Integer(description="Number of entries evicted from the cache."),
+            "entries": fields.Integer(description="Number of entries in the cache."),
+            "size_bytes": fields.Integer(description="Total size of the cached entries in bytes."),
+            "max_bytes": fields.Integer(description="Maximum size of the cache in bytes.")
+        })
+
+        self.retention_path_model = self.ns.model("RetentionPath", {
+            "path": fields.String(description="Name of the file or directory with path, relative to the base HDFS location."),
+            "pattern": fields.String(description="Pattern of the retention rule matching the path."),
+            "modification_time": fields.Integer(description="Modification time of the path in milliseconds since the epoch."),
+            "files": fields.Integer(description="Number of files under the path."),
+            "bytes": fields.Integer(description="Size of the files under the path in bytes."),
+            "dry_run": fields.Boolean(description="Flag set when the path was only reported."),
+            "error": fields.String(description="Message of the error the deletion failed with.")
+        })
+
+        self.retention_run_model = self.ns.model("RetentionRun", {
+            "started_at": fields.Float(description="Start time of the run in seconds since the epoch."),
+            "ended_at": fields.Float(description="End time of the run in seconds since the epoch."),
+            "dry_run": fields.Boolean(description="Flag set when the run only reported the paths to be deleted, unless their rule says otherwise."),
+            "matched_paths": fields.Integer(description="Number of paths older than their retention."),
+            "deleted_paths": fields.Integer(description="Number of paths deleted."),
+            "failed_paths": fields.Integer(description="Number of paths which couldn't be deleted."),
+            "reclaimed_files": fields.Integer(description="Number of files deleted."),
+            "reclaimed_bytes": fields.Integer(description="Size of the files deleted in bytes."),
+            "paths": fields.List(fields.Nested(self.retention_path_model), description="The paths matched, up to 1000.")
+        })
+
+        self.retention_metrics_model = self.ns.model("RetentionMetrics", {
+            "enabled": fields.Boolean(description="Flag set when retention rules are configured."),
+            "dry_run": fields.Boolean(description="Flag set when the paths are only reported by default."),
+            "interval": fields.Integer(description="Number of seconds between two runs."),
+            "rules": fields.List(fields.Raw(), description="The retention rules."),
+            "runs": fields.Integer(description="Number of runs."),
+            "deleted_paths": fields.Integer(description="Total number of paths deleted."),
+            "failed_paths": fields.Integer(description="Total number of paths which couldn't be deleted."),
+            "reclaimed_files": fields.Integer(description="Total number of files deleted."),
+            "reclaimed_bytes": fields.Integer(description="Total size of the files deleted in bytes."),
+            "last_run": fields.Nested(self.retention_run_model, allow_null=True, description="Report of the last run.")
         })
 
         self.error_model = self.ns.model("ErrorModel", {
@@ -15,6 +15,7 @@ from flask import request
 from flask_restplus import Namespace, Resource
 
 from service.core.files_provider import FilesProvider
+from service.exception.exceptions import BadRequestError
 from service.resources.entity.sw_model import SwModel
 from service.utils.sw_logger import SwLogger
 
@@ -29,12 +30,18 @@ class Files(Resource):
     @ns.doc(id="post", description="Uploads file to HDFS.")
     @ns.param(name="file", description="Name of the file to be uploaded with path.", _in="query", required=True, example="arun/testing/first_spark_job.py")
     @ns.param(name="overwrite", description="Flag to overwrite the file if already exists.", _in="query", required=False)
+    @ns.param(name="async", description="Flag to run the upload in the background. The content is received, then 202 is returned with the transfer operation to be followed at /files/operations/{operation_id}.", _in="query", required=False)
+    @ns.param(name="X-Content-SHA256", description="SHA-256 digest of the file in hex. The upload is skipped when the file already has this content, or done by a copy within HDFS when the same content was uploaded to another path. The body can then be left empty, 412 is returned when the content is needed.", _in="header", required=False)
     @ns.response(201, "File uploaded successfully.", swagger_model.upload_file_response_model)
+    @ns.response(202, "Upload started in the background.", swagger_model.transfer_operation_model)
+    @ns.response(400, "Bad Request", swagger_model.error_container)
     @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(412, "The content of the file is needed", swagger_model.error_container)
     @ns.response(500, "Internal Server Error", swagger_model.error_container)
     def put(self):
 
         response_status_code = 201
+        is_async = self.__is_async()
 
         # grab all headers
         if request.args.get("file"):
@@ -44,30 +51,67 @@ class Files(Resource):
             overwrite_flag = False
             if overwrite is not None and overwrite in ["TRUE", "true", "True"]:
                 overwrite_flag = True
-            response_content = FilesProvider().upload_file(file_name_with_path=file_name, data=request.data, overwrite=overwrite_flag)
+            if is_async:
+                response_content = FilesProvider().start_upload_file(file_name_with_path=file_name,
+                                                                     data=request.stream, overwrite=overwrite_flag,
+                                                                     content_hash=request.headers.get("X-Content-SHA256"))
+                return self.__accepted(response_content)
+            # The body is streamed to HDFS instead of being read in memory
+            response_content = FilesProvider().upload_file(file_name_with_path=file_name, data=request.stream,
+                                                           overwrite=overwrite_flag,
+                                                           content_length=request.content_length,
+                                                           content_hash=request.headers.get("X-Content-SHA256"))
 
         elif request.args.get("directory"):
             hdfs_directory_path = request.args.get("directory")
-            response_content = FilesProvider().upload_directory(hdfs_directory_path=hdfs_directory_path, archive_directory_data=request.data)
+            if is_async:
+                response_content = FilesProvider().start_upload_directory(hdfs_directory_path=hdfs_directory_path,
+                                                                          archive_directory_data=request.stream)
+                return self.__accepted(response_content)
+            response_content = FilesProvider().upload_directory(hdfs_directory_path=hdfs_directory_path, archive_directory_data=request.stream)
             
         return response_content, response_status_code
 
     @ns.doc(id="get", description="Downloads the file/folder from HDFS.")
     @ns.produces(["application/octet-stream"])
-    @ns.param(name="file", description="Name of the file with path that should be downloaded from the remote HDFS.", _in="query", required=True, example="arun/testing/first_spark_job.py")
+    @ns.param(name="file", description="Name of the file with path that should be downloaded from the remote HDFS. The part files of a directory holding the output of a Spark job are downloaded concatenated.", _in="query", required=True, example="arun/testing/first_spark_job.py")
     @ns.param(name="directory", description=" Absolute path of the folder/directory that should be downloaded as a tar from the remote HDFS.", _in="query", required=False, example="hdfs://alpha:9000/testing_data/Configuration_Job/95139353-17f8-440e-ad65-9ff85999fabe/output/drift_archive_gcr/drift_detection_model")
+    @ns.param(name="compress", description="Flag to gzip compress the tar of the directory. Defaults to true.", _in="query", required=False)
+    @ns.param(name="Range", description="Byte ranges of the file to be downloaded. Multiple ranges are returned as multipart/byteranges.", _in="header", required=False, example="bytes=0-1023")
+    @ns.param(name="async", description="Flag to run the download in the background. 202 is returned with the transfer operation to be followed at /files/operations/{operation_id}, the content is then fetched from /files/operations/{operation_id}/result.", _in="query", required=False)
     @ns.response(200, "File downloaded successfully.")
+    @ns.response(202, "Download started in the background.", swagger_model.transfer_operation_model)
+    @ns.param(name="If-None-Match", description="Entity tag of the copy held by the client. 304 is returned when it is still current.", _in="header", required=False)
+    @ns.param(name="If-Modified-Since", description="Modification date of the copy held by the client. 304 is returned when the content hasn't changed since.", _in="header", required=False)
+    @ns.param(name="If-Range", description="Entity tag or modification date of the partial copy held by the client. The Range header is honoured only when it is still current, otherwise the whole file is returned.", _in="header", required=False)
+    @ns.response(206, "Requested ranges of the file downloaded successfully.")
+    @ns.response(304, "The copy held by the client is still current.")
     @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(416, "Requested range not satisfiable")
     @ns.response(500, "Internal Server Error", swagger_model.error_container)
     def get(self):
         response_content = None
+        is_async = self.__is_async()
         # grab all headers
         if request.args.get("file"):
             file_name = request.args.get("file")
-            response_content = FilesProvider().download_file(file_name_with_path=file_name)
+            if is_async:
+                return self.__accepted(FilesProvider().start_download_file(file_name_with_path=file_name))
+            response_content = FilesProvider().download_file(file_name_with_path=file_name,
+                                                             request_headers=request.headers)
         elif request.args.get("directory"):
             directory_path = request.args.get("directory")
-            response_content = FilesProvider().download_directory(directory_path=directory_path)
+            compress = request.args.get("compress")
+
+            compress_flag = True
+            if compress is not None and compress in ["FALSE", "false", "False"]:
+                compress_flag = False
+            if is_async:
+                return self.__accepted(FilesProvider().start_download_directory(directory_path=directory_path,
+                                                                                compress=compress_flag))
+            response_content = FilesProvider().download_directory(directory_path=directory_path,
+                                                                  request_headers=request.headers,
+                                                                  compress=compress_flag)
         return response_content
 
     @ns.doc(id="delete", description="Deletes the file or folder from HDFS.")
@@ -88,3 +132,322 @@ class Files(Resource):
             directory_path = request.args.get("directory")
             response_content = FilesProvider().delete_directory(directory_path=directory_path)
         return response_content, response_status_code
+
+    def __accepted(self, operation):
+        """Returns the 202 response of a transfer started in the background"""
+        location = self.api.url_for(FilesOperation, operation_id=operation.get("id")) if operation else None
+        return operation, 202, {"Location": location} if location else {}
+
+    @staticmethod
+    def __is_async():
+        is_async = request.args.get("async")
+        return is_async is not None and is_async in ["TRUE", "true", "True"]
+
+
+@ns.route("/files/operations/<string:operation_id>")
+class FilesOperation(Resource):
+
+    @ns.doc(id="get", description="Fetches the status of a transfer run in the background, with its progress and its result once ended.")
+    @ns.response(200, "Transfer operation fetched successfully.", swagger_model.transfer_operation_model)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "Transfer operation not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def get(self, operation_id):
+
+        response_status_code = 200
+        response_content = FilesProvider().get_transfer(operation_id)
+        return response_content, response_status_code
+
+    @ns.doc(id="delete", description="Deletes an ended transfer operation along with the content it downloaded.")
+    @ns.response(204, "Transfer operation deleted successfully.")
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "Transfer operation not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def delete(self, operation_id):
+
+        FilesProvider().delete_transfer(operation_id)
+        return None, 204
+
+
+@ns.route("/files/operations/<string:operation_id>/result")
+class FilesOperationResult(Resource):
+
+    @ns.doc(id="get", description="Downloads the content fetched by a finished download run in the background.")
+    @ns.produces(["application/octet-stream", "application/x-tar"])
+    @ns.param(name="Range", description="Byte range of the content to be downloaded.", _in="header", required=False, example="bytes=0-1023")
+    @ns.response(200, "Content downloaded successfully.")
+    @ns.response(206, "Requested range of the content downloaded successfully.")
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "Transfer operation or its content not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def get(self, operation_id):
+        return FilesProvider().get_transfer_result(operation_id)
+
+
+@ns.route("/files/move")
+class FilesMove(Resource):
+
+    @ns.expect(swagger_model.copy_request_model, validate=True)
+    @ns.doc(id="post", description="Moves a file or directory within HDFS. Only the metadata changes, no content is transferred.", body=swagger_model.copy_request_model)
+    @ns.response(200, "File or directory moved successfully.", swagger_model.copy_response_model)
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "File not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def post(self):
+
+        response_status_code = 200
+        request_json = request.get_json()
+        response_content = FilesProvider().move(source_path=request_json.get("source"),
+                                                destination_path=request_json.get("destination"))
+        return response_content, response_status_code
+
+
+@ns.route("/files/copy")
+class FilesCopy(Resource):
+
+    @ns.expect(swagger_model.copy_request_model, validate=True)
+    @ns.doc(id="post", description="Copies a file or directory within HDFS. The content is streamed between the datanodes by the service without being sent to the client, the files of a directory are copied in parallel.", body=swagger_model.copy_request_model)
+    @ns.response(201, "File or directory copied successfully.", swagger_model.copy_response_model)
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "File not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def post(self):
+
+        response_status_code = 201
+        request_json = request.get_json()
+        response_content = FilesProvider().copy(source_path=request_json.get("source"),
+                                                destination_path=request_json.get("destination"),
+                                                overwrite=request_json.get("overwrite") is True)
+        return response_content, response_status_code
+
+
+@ns.route("/files/list")
+class FilesList(Resource):
+
+    @ns.doc(id="get", description="Lists a directory of HDFS as NDJSON, one entry per line in the order of their paths. When more entries than the limit match, the last line is an object with the cursor of the next page. An error while the entries are sent ends the stream with an object with the error.")
+    @ns.produces(["application/x-ndjson"])
+    @ns.param(name="path", description="Name of the directory with path to be listed. The paths of the entries start with it.", _in="query", required=True, example="arun/testing/output")
+    @ns.param(name="recursive", description="Flag to list the subdirectories too.", _in="query", required=False)
+    @ns.param(name="glob", description="Glob pattern the names of the entries must match, or their paths relative to the directory when it has a /.", _in="query", required=False, example="part-*")
+    @ns.param(name="limit", description="Maximum number of entries returned, up to 10000. Defaults to 1000.", _in="query", required=False, type=int)
+    @ns.param(name="cursor", description="Cursor returned by the previous page, along with the same path, recursive flag and glob.", _in="query", required=False)
+    @ns.response(200, "Directory listed successfully.")
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "Directory not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def get(self):
+        directory_path = request.args.get("path")
+        if not directory_path:
+            raise BadRequestError("The path of the directory to be listed is expected.")
+        recursive = request.args.get("recursive")
+
+        recursive_flag = False
+        if recursive is not None and recursive in ["TRUE", "true", "True"]:
+            recursive_flag = True
+        response_content = FilesProvider().list_directory(directory_path=directory_path, recursive=recursive_flag,
+                                                          glob=request.args.get("glob"),
+                                                          limit=request.args.get("limit", type=int),
+                                                          cursor=request.args.get("cursor"))
+        return response_content
+
+
+@ns.route("/files/summary")
+class FilesSummary(Resource):
+
+    @ns.doc(id="get", description="Fetches the size and the number of files of a file or directory of HDFS, without downloading it. The summary is cached for a short time.")
+    @ns.param(name="path", description="Name of the file or directory with path.", _in="query", required=True, example="arun/testing/output")
+    @ns.response(200, "Content summary fetched successfully.", swagger_model.content_summary_model)
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "File not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def get(self):
+
+        response_status_code = 200
+        file_name = request.args.get("path")
+        if not file_name:
+            raise BadRequestError("The path of the file or directory is expected.")
+        response_content = FilesProvider().get_content_summary(file_name_with_path=file_name)
+        return response_content, response_status_code
+
+
+@ns.route("/files/bulk")
+class FilesBulk(Resource):
+
+    @ns.expect(swagger_model.bulk_download_request_model, validate=True)
+    @ns.doc(id="post", description="Downloads several files from HDFS in a single tar or multipart/mixed response. The files are returned in the order of the request.", body=swagger_model.bulk_download_request_model)
+    @ns.produces(["application/x-tar", "multipart/mixed"])
+    @ns.response(200, "Files downloaded successfully.")
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "File not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def post(self):
+        request_json = request.get_json()
+        file_names = request_json.get("files")
+        archive_format = request_json.get("format") or "tar"
+        if not file_names or archive_format not in ["tar", "multipart"]:
+            raise BadRequestError("A list of files and a format of tar or multipart are expected.")
+
+        compress = request_json.get("compress")
+        response_content = FilesProvider().download_files(file_names_with_paths=file_names,
+                                                          archive_format=archive_format,
+                                                          compress=compress is not False)
+        return response_content
+
+
+@ns.route("/files/bulk/delete")
+class FilesBulkDelete(Resource):
+
+    @ns.expect(swagger_model.bulk_delete_request_model, validate=True)
+    @ns.doc(id="post", description="Deletes the files and directories of HDFS matching prefixes or glob patterns, optionally only the ones older than an age. Directories are deleted with their content, the deletions run in parallel and each one gets its own status.", body=swagger_model.bulk_delete_request_model)
+    @ns.response(200, "Matching paths deleted, see the status of each one.", swagger_model.bulk_delete_response_model)
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def post(self):
+
+        response_status_code = 200
+        request_json = request.get_json()
+        file_names = request_json.get("paths")
+        if not file_names:
+            raise BadRequestError("A list of paths is expected.")
+        response_content = FilesProvider().delete_paths(file_names_with_paths=file_names,
+                                                        older_than=request_json.get("older_than"),
+                                                        dry_run=request_json.get("dry_run") is True)
+        return response_content, response_status_code
+
+
+@ns.route("/files/batch")
+class FilesBatch(Resource):
+
+    @ns.expect(swagger_model.batch_request_model, validate=True)
+    @ns.doc(id="post", description="Runs several delete, mkdir, rename and small upload operations concurrently in a single request. Each operation gets its own status, the failure of one doesn't stop the others. Operations depending on each other must be sent in separate requests.", body=swagger_model.batch_request_model)
+    @ns.response(200, "Operations run, see the status of each one.", swagger_model.batch_response_model)
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def post(self):
+
+        response_status_code = 200
+        operations = request.get_json().get("operations")
+        response_content = FilesProvider().run_batch(operations=operations)
+        return response_content, response_status_code
+
+
+@ns.route("/files/uploads")
+class FilesUploads(Resource):
+
+    @ns.doc(id="post", description="Creates a session to upload a large file in chunks. The chunks can be uploaded in parallel and again after a failure, and are assembled into the file on commit.")
+    @ns.param(name="file", description="Name of the file to be uploaded with path.", _in="query", required=True, example="arun/testing/training_data.csv")
+    @ns.param(name="overwrite", description="Flag to overwrite the file if already exists.", _in="query", required=False)
+    @ns.param(name="chunks", description="Number of chunks of the file, when known.", _in="query", required=False, type=int)
+    @ns.response(201, "Upload session created successfully.", swagger_model.upload_session_model)
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def post(self):
+
+        response_status_code = 201
+        file_name = request.args.get("file")
+        if not file_name:
+            raise BadRequestError("The file to be uploaded is expected.")
+        overwrite = request.args.get("overwrite")
+
+        overwrite_flag = False
+        if overwrite is not None and overwrite in ["TRUE", "true", "True"]:
+            overwrite_flag = True
+        total_chunks = request.args.get("chunks", type=int)
+        response_content = FilesProvider().create_upload(file_name_with_path=file_name, overwrite=overwrite_flag,
+                                                         total_chunks=total_chunks)
+        return response_content, response_status_code
+
+
+@ns.route("/files/uploads/<string:upload_id>")
+class FilesUpload(Resource):
+
+    @ns.doc(id="get", description="Fetches the status of an upload session, with the chunks received and the chunks missing.")
+    @ns.response(200, "Upload session fetched successfully.", swagger_model.upload_session_model)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "Upload session not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def get(self, upload_id):
+
+        response_status_code = 200
+        response_content = FilesProvider().get_upload(upload_id)
+        return response_content, response_status_code
+
+    @ns.doc(id="delete", description="Deletes an upload session and its chunks.")
+    @ns.response(204, "Upload session deleted successfully.")
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "Upload session not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def delete(self, upload_id):
+
+        FilesProvider().delete_upload(upload_id)
+        return None, 204
+
+
+@ns.route("/files/uploads/<string:upload_id>/chunks/<int:chunk_number>")
+class FilesUploadChunk(Resource):
+
+    @ns.doc(id="put", description="Uploads a chunk of the file. Chunks are numbered from 0, a chunk uploaded again replaces the previous one.")
+    @ns.response(200, "Chunk uploaded successfully.", swagger_model.upload_chunk_model)
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "Upload session not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def put(self, upload_id, chunk_number):
+
+        response_status_code = 200
+        response_content = FilesProvider().upload_chunk(upload_id, chunk_number, data=request.stream,
+                                                        content_length=request.content_length)
+        return response_content, response_status_code
+
+
+@ns.route("/files/uploads/<string:upload_id>/commit")
+class FilesUploadCommit(Resource):
+
+    @ns.doc(id="post", description="Assembles the chunks of an upload session into the file and ends the session. An interrupted commit resumes when requested again.")
+    @ns.response(200, "File uploaded successfully.", swagger_model.upload_file_response_model)
+    @ns.response(400, "Bad Request", swagger_model.error_container)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(404, "Upload session not found", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def post(self, upload_id):
+
+        response_status_code = 200
+        response_content = FilesProvider().commit_upload(upload_id)
+        return response_content, response_status_code
+
+
+@ns.route("/files/cache")
+class FilesCache(Resource):
+
+    @ns.doc(id="get", description="Fetches the metrics of the local cache of downloaded files of the worker serving the request.")
+    @ns.response(200, "Cache metrics fetched successfully.", swagger_model.content_cache_stats_model)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def get(self):
+
+        response_status_code = 200
+        response_content = FilesProvider().get_content_cache_stats()
+        return response_content, response_status_code
+
+
+@ns.route("/files/retention")
+class FilesRetention(Resource):
+
+    @ns.doc(id="get", description="Fetches the metrics of the collector deleting the run artifacts older than their retention from HDFS, with the report of its last run.")
+    @ns.response(200, "Retention metrics fetched successfully.", swagger_model.retention_metrics_model)
+    @ns.response(401, "Unauthorized", swagger_model.error_container)
+    @ns.response(500, "Internal Server Error", swagger_model.error_container)
+    def get(self):
+
+        response_status_code = 200
+        response_content = FilesProvider().get_retention_metrics()
+        return response_content, response_status_code
@@ -52,11 +52,11 @@ class Auth:
             if Environment().is_kerberos_enabled():
                 user_principal = self.get_user_principal(username)
                 key_tab_path = Environment().get_hdfs_keytab_file_path()
-                logger.log_info("Minting a kerberos ticket for principal {} using keytab {}".format(user_principal, key_tab_path))
                 if key_tab_path is None or user_principal is None:
                     raise AuthenticationError("Keytab file or kerberos principal missing")
-                returncode = KerberosUtil.renew_kinit(key_tab_path, user_principal)
-                logger.log_info('kinit return code:' + str(returncode))
+                # kinit is run only when the cached ticket of the principal is missing or about to expire
+                returncode = KerberosUtil.ensure_ticket(key_tab_path, user_principal)
+                logger.log_debug('kinit return code:' + str(returncode))
 
             return username, user_principal
         except Exception as e:
@@ -0,0 +1,131 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests_kerberos import HTTPKerberosAuth
+
+from service.utils.sw_logger import SwLogger
+from service.utils.sw_singleton import SwSingleton
+
+logger = SwLogger(__name__)
+
+HADOOP_AUTH_COOKIE = "hadoop.auth"
+
+
+class AuthCookieStore(metaclass=SwSingleton):
+    """Holds the signed hadoop.auth cookies issued by Hadoop and Livy for each principal and host"""
+
+    # Seconds before the cookie expiry after which the cookie is no longer replayed
+    EXPIRY_MARGIN = 30
+
+    def __init__(self):
+        self.cookies = dict()
+        self.lock = threading.Lock()
+
+    def get_cookie(self, principal, host):
+        with self.lock:
+            cookie = self.cookies.get((principal, host))
+            if cookie is None:
+                return None
+            value, expiry = cookie
+            if time.time() + self.EXPIRY_MARGIN >= expiry:
+                del self.cookies[(principal, host)]
+                return None
+            return value
+
+    def set_cookie(self, principal, host, value, expiry):
+        with self.lock:
+            self.cookies[(principal, host)] = (value, expiry)
+
+    def remove_cookie(self, principal, host):
+        with self.lock:
+            self.cookies.pop((principal, host), None)
+
+
+class SpnegoCookieAuth(HTTPKerberosAuth):
+    """
+    Kerberos auth that replays the hadoop.auth cookie issued after a successful SPNEGO negotiation,
+    so that subsequent requests of the principal skip the 401 and negotiate round trip. The negotiation
+    is done again only when the cookie is missing, expired or rejected by the server.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.cookie_store = AuthCookieStore()
+
+    def __call__(self, request):
+        host = urlparse(request.url).netloc
+        cookie = self.cookie_store.get_cookie(self.principal, host)
+        if cookie is not None:
+            request.headers["Cookie"] = self.__append_cookie(request.headers.get("Cookie"), cookie)
+        return super().__call__(request)
+
+    def handle_401(self, response, **kwargs):
+        # The cookie was rejected or there was none, drop it and negotiate again
+        request_cookie = response.request.headers.get("Cookie")
+        if request_cookie is not None and HADOOP_AUTH_COOKIE in request_cookie:
+            self.cookie_store.remove_cookie(self.principal, urlparse(response.request.url).netloc)
+            cookies = [c for c in request_cookie.split(";") if not c.strip().startswith(HADOOP_AUTH_COOKIE + "=")]
+            if cookies:
+                response.request.headers["Cookie"] = ";".join(cookies)
+            else:
+                del response.request.headers["Cookie"]
+        return super().handle_401(response, **kwargs)
+
+    def handle_other(self, response):
+        self.__store_auth_cookie(response)
+        if "Authorization" not in response.request.headers and response.headers.get("www-authenticate") is None:
+            # Nothing was negotiated for this request (it was authenticated using the cookie or a delegation
+            # token), so there is no server token to verify for mutual authentication.
+            return response
+        return super().handle_other(response)
+
+    def handle_response(self, response, **kwargs):
+        response = super().handle_response(response, **kwargs)
+        if response.status_code == 401:
+            # The ticket was rejected even after negotiating, make sure it gets minted again
+            from service.utils.kerberos_util import KerberosUtil
+            KerberosUtil.invalidate_ticket(self.principal)
+        return response
+
+    def __store_auth_cookie(self, response):
+        host = urlparse(response.request.url).netloc
+        cookie = next((c for c in response.cookies if c.name == HADOOP_AUTH_COOKIE), None)
+        if cookie is None:
+            return
+        value = cookie.value.strip('"') if cookie.value else None
+        if not value:
+            # Hadoop clears the cookie when the authentication fails
+            self.cookie_store.remove_cookie(self.principal, host)
+            return
+
+        # The signed token carries its expiry in milliseconds, eg. u=user&p=user@REALM&t=kerberos&e=1602864000000&s=...
+        expiry = None
+        match = re.search(r"(?:^|&)e=(\d+)", value)
+        if match:
+            expiry = int(match.group(1)) / 1000
+        elif cookie.expires:
+            expiry = cookie.expires
+        if expiry is not None:
+            self.cookie_store.set_cookie(self.principal, host, cookie.value, expiry)
+
+    @staticmethod
+    def __append_cookie(header, value):
+        cookie = "{}={}".format(HADOOP_AUTH_COOKIE, value)
+        if not header:
+            return cookie
+        return header + "; " + cookie
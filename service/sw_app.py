@@ -13,6 +13,7 @@
 
 from flask import Flask, request
 
+from service.clients.hdfs_retention_collector import HdfsRetentionCollector
 from service.config import DevelopmentConfig, ProductionConfig
 from service.resources.api_blueprint import api_blueprint
 from service.security.auth import Auth
@@ -31,10 +32,17 @@ def create_app(configuration=None):
     if configuration:
         app.config.from_object(configuration)
 
+    if Environment().is_kerberos_enabled():
+        # Keep a separate credential cache per principal
+        KerberosUtil.init_credential_cache_collection()
+
     # Allow trailing slashes for all rest endpoints
     app.url_map.strict_slashes = False
     app.register_blueprint(api_blueprint)
 
+    # Deletes the expired run artifacts from HDFS, when retention rules are configured
+    HdfsRetentionCollector().start()
+
     @app.before_request
     def before_request():
         # skip authentication and authorization for heartbeat and swagger APIs
@@ -63,10 +71,12 @@ def create_app(configuration=None):
             # Define loading policy for all resources type in case of a resource type
             # dedicated directive is not defined (fallback)
             response.headers["X-Content-Type-Options"] = "nosniff"
-            # The cache should not store anything about the client request or server response.
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-            # For older browsers that do not support Cache-Control.
-            response.headers["Pragma"] = "no-cache"
+            if "Cache-Control" not in response.headers:
+                # Unless the endpoint allows caching its response (like file downloads with validators),
+                # the cache should not store anything about the client request or server response.
+                response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+                # For older browsers that do not support Cache-Control.
+                response.headers["Pragma"] = "no-cache"
             # Block pages from loading when they detect reflected XSS attacks:
             response.headers["X-XSS-Protection"] = "1; mode=block"
             # Define loading policy for all resources type in case of a resource type
@@ -18,3 +18,38 @@ LIVY_JOB_FAILED_STATE = 'error'
 LIVY_JOB_DEAD_STATE = 'dead'
 LIVY_JOB_KILLED_STATE = 'killed'
 SYNC_JOB_MAX_WAIT_TIME = 300
+
+# Number of request threads of each gunicorn worker
+GUNICORN_THREADS = 500
+# Number of per host connection pools cached by the pooled http sessions.
+# Datanode redirects fan out to many hosts, hence the higher number than the requests default.
+HTTP_POOL_CONNECTIONS = 32
+# Size of the chunks in which the file content is streamed to the client
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Maximum number of byte ranges served for a single request, the whole file is sent for more ranges
+MAX_BYTE_RANGES = 32
+# Maximum number of files returned by a single bulk download
+MAX_BULK_DOWNLOAD_FILES = 10000
+# Size of the chunks in which uploads are read from the client and sent to HDFS
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Maximum number of chunks of an upload session
+MAX_UPLOAD_CHUNKS = 10000
+# Extended attribute holding the SHA-256 digest of the content of the uploaded files
+CONTENT_HASH_XATTR = "user.sha256"
+EMPTY_CONTENT_SHA256 = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+# Retries of a write rejected by the datanode because of a concurrent write of the same file, and the delay
+# before the first retry in seconds. The delay doubles with each retry.
+UPLOAD_CONFLICT_RETRY_COUNT = 3
+UPLOAD_CONFLICT_RETRY_DELAY = 0.5
+# Number of seconds between two saves of the progress of the transfers running in the background
+TRANSFER_PROGRESS_SAVE_INTERVAL = 5
+# Maximum number of operations of a batch request, and maximum size of a file uploaded by a batch request
+MAX_BATCH_OPERATIONS = 1000
+MAX_BATCH_UPLOAD_SIZE = 1024 * 1024
+# Number of entries returned by a page of a directory listing by default, and at most
+LIST_DEFAULT_LIMIT = 1000
+LIST_MAX_LIMIT = 10000
+# Maximum number of files and directories deleted by a single bulk delete
+MAX_BULK_DELETE_PATHS = 10000
+# Maximum number of paths listed in the report of a run of the HDFS retention collector
+RETENTION_REPORT_MAX_PATHS = 1000
@@ -17,6 +17,7 @@ import os
 import pathlib
 from distutils.util import strtobool
 
+from service.utils import constants
 from service.utils.python_util import get
 from service.utils.sw_singleton import SwSingleton
 
@@ -63,6 +64,15 @@ class Environment(metaclass=SwSingleton):
     def get_hdfs_keytab_file_path(self):
         return self.get_property_value("HDFS_KEYTAB_FILE_PATH")
 
+    def get_kerberos_ccache_dir(self):
+        return self.get_property_value("KERBEROS_CCACHE_DIR", "/tmp/krb5cc_wos")
+
+    def get_kerberos_ticket_lifetime(self):
+        return self.get_property_value("KERBEROS_TICKET_LIFETIME", 3600)
+
+    def get_kerberos_ticket_renew_margin(self):
+        return self.get_property_value("KERBEROS_TICKET_RENEW_MARGIN", 300)
+
     def get_kerberos_principals(self):
         return self.kerberos_principals
 
@@ -81,6 +91,96 @@ class Environment(metaclass=SwSingleton):
     def is_hive_client_auth_enabled(self):
         return self.get_property_boolean_value("HIVE_CLIENT_AUTHORIZATION_ENABLED", "false")
 
+    def get_http_pool_maxsize(self):
+        return self.get_property_value("HTTP_POOL_MAXSIZE", constants.GUNICORN_THREADS)
+
+    def get_hdfs_metadata_cache_ttl(self):
+        return self.get_property_value("HDFS_METADATA_CACHE_TTL", 30)
+
+    def get_hdfs_metadata_cache_negative_ttl(self):
+        return self.get_property_value("HDFS_METADATA_CACHE_NEGATIVE_TTL", 5)
+
+    def get_hdfs_metadata_cache_max_entries(self):
+        return self.get_property_value("HDFS_METADATA_CACHE_MAX_ENTRIES", 10000)
+
+    def get_hdfs_content_summary_cache_ttl(self):
+        return self.get_property_value("HDFS_CONTENT_SUMMARY_CACHE_TTL", 30)
+
+    def get_hdfs_content_summary_cache_max_entries(self):
+        return self.get_property_value("HDFS_CONTENT_SUMMARY_CACHE_MAX_ENTRIES", 10000)
+
+    def get_hdfs_content_cache_dir(self):
+        return self.get_property_value("HDFS_CONTENT_CACHE_DIR", "/tmp/wos_hdfs_cache")
+
+    def get_hdfs_content_cache_max_bytes(self):
+        return self.get_property_value("HDFS_CONTENT_CACHE_MAX_BYTES", 1024 * 1024 * 1024)
+
+    def get_hdfs_content_cache_max_file_bytes(self):
+        return self.get_property_value("HDFS_CONTENT_CACHE_MAX_FILE_BYTES", 256 * 1024 * 1024)
+
+    def get_files_cache_max_age(self):
+        return self.get_property_value("FILES_CACHE_MAX_AGE", 0)
+
+    def get_hdfs_download_max_concurrency(self):
+        return self.get_property_value("HDFS_DOWNLOAD_MAX_CONCURRENCY", 16)
+
+    def get_hdfs_download_initial_concurrency(self):
+        return self.get_property_value("HDFS_DOWNLOAD_INITIAL_CONCURRENCY", 4)
+
+    def get_hdfs_download_segment_size(self):
+        return self.get_property_value("HDFS_DOWNLOAD_SEGMENT_SIZE", 8 * 1024 * 1024)
+
+    def get_upload_spool_max_memory_size(self):
+        return self.get_property_value("UPLOAD_SPOOL_MAX_MEMORY_SIZE", 8 * 1024 * 1024)
+
+    def get_upload_spool_dir(self):
+        return self.get_property_value("UPLOAD_SPOOL_DIR")
+
+    def get_upload_sessions_dir(self):
+        return self.get_property_value("UPLOAD_SESSIONS_DIR", ".uploads")
+
+    def get_upload_commit_mode(self):
+        return self.get_property_value("UPLOAD_COMMIT_MODE", "concat")
+
+    def get_upload_index_ttl(self):
+        return self.get_property_value("UPLOAD_INDEX_TTL", 86400)
+
+    def get_upload_index_max_entries(self):
+        return self.get_property_value("UPLOAD_INDEX_MAX_ENTRIES", 10000)
+
+    def get_upload_lock_dir(self):
+        return self.get_property_value("UPLOAD_LOCK_DIR")
+
+    def get_hdfs_upload_max_concurrency(self):
+        return self.get_property_value("HDFS_UPLOAD_MAX_CONCURRENCY", 8)
+
+    def get_transfer_operations_dir(self):
+        return self.get_property_value("TRANSFER_OPERATIONS_DIR")
+
+    def get_transfer_operations_max_concurrency(self):
+        return self.get_property_value("TRANSFER_OPERATIONS_MAX_CONCURRENCY", 4)
+
+    def get_transfer_operations_ttl(self):
+        return self.get_property_value("TRANSFER_OPERATIONS_TTL", 86400)
+
+    def get_hdfs_batch_max_concurrency(self):
+        return self.get_property_value("HDFS_BATCH_MAX_CONCURRENCY", 16)
+
+    def get_hdfs_retention_rules(self):
+        return self.get_property_value("HDFS_RETENTION_RULES")
+
+    def get_hdfs_retention_interval(self):
+        return self.get_property_value("HDFS_RETENTION_INTERVAL", 3600)
+
+    def get_hdfs_retention_max_deletes_per_second(self):
+        return self.get_property_value("HDFS_RETENTION_MAX_DELETES_PER_SECOND", 2)
+
+    def get_hdfs_retention_user(self):
+        return self.get_property_value("HDFS_RETENTION_USER")
+
+    def get_hdfs_retention_dir(self):
+        return self.get_property_value("HDFS_RETENTION_DIR", "/tmp/wos_hdfs_retention")
+
     def get_property_value(self, property_name, default=None):
         if os.environ.get(property_name):
             return os.environ.get(property_name)
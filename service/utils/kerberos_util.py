@@ -11,11 +11,156 @@
 # specific language governing permissions and limitations under the License.
 # ----------------------------------------------------------------------------------------------------
 
+import datetime
+import os
+import re
+import threading
+import time
+
+from service.utils.environment import Environment
+from service.utils.sw_logger import SwLogger
+
+logger = SwLogger(__name__)
+
 
 class KerberosUtil:
 
+    # Date formats used by klist to print the ticket expiry time
+    KLIST_DATE_FORMATS = ("%m/%d/%y %H:%M:%S", "%m/%d/%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S")
+
+    # principal -> epoch seconds at which the cached ticket expires
+    _ticket_expiry = {}
+    _principal_locks = {}
+    _locks_lock = threading.Lock()
+
+    @classmethod
+    def ensure_ticket(cls, keytab, principal, exit_on_fail=True):
+        """
+        Makes sure a valid kerberos ticket is available for the principal. kinit is run only when
+        there is no ticket minted by this process yet or when the ticket is about to expire.
+
+        Keyword arguments:
+            keytab -- keytab file
+            principal {str} -- user principal
+            exit_on_fail {bool} -- exit operation on fail flag
+
+        Returns:
+            operation returncode
+        """
+        if cls.__is_ticket_valid(principal):
+            return 0
+
+        # Only one thread per principal renews the ticket, the others wait and reuse it
+        with cls.__get_principal_lock(principal):
+            if cls.__is_ticket_valid(principal):
+                return 0
+
+            ccache = cls.get_credential_cache(principal)
+            logger.log_info("Minting a kerberos ticket for principal {} using keytab {} into {}".format(
+                principal, keytab, ccache))
+            returncode = cls.renew_kinit(keytab, principal, exit_on_fail=exit_on_fail, ccache=ccache)
+            if returncode:
+                cls._ticket_expiry.pop(principal, None)
+                return returncode
+
+            cls._ticket_expiry[principal] = cls.__get_ticket_expiry(principal)
+            return 0
+
+    @classmethod
+    def init_credential_cache_collection(cls):
+        """
+        Points the process to a DIR credential cache collection holding one cache per principal, so that
+        the tickets of the different users served concurrently don't overwrite each other. GSSAPI selects
+        the cache of a principal from the collection when the principal is given explicitly.
+        """
+        ccache_dir = Environment().get_kerberos_ccache_dir()
+        os.makedirs(ccache_dir, mode=0o700, exist_ok=True)
+        os.environ["KRB5CCNAME"] = "DIR:" + ccache_dir
+
+    @classmethod
+    def get_credential_cache(cls, principal):
+        """
+        Returns the name of the credential cache holding the tickets of the principal
+
+        Keyword arguments:
+            principal {str} -- user principal
+
+        Returns:
+            ccache {str} -- Name of the principal's cache within the DIR collection
+        """
+        # Caches of a DIR collection have to be named tkt*
+        cache_name = "tkt_" + re.sub(r"[^A-Za-z0-9_.-]", "_", principal)
+        return "DIR::" + os.path.join(Environment().get_kerberos_ccache_dir(), cache_name)
+
+    @classmethod
+    def get_http_auth(cls, principal):
+        """
+        Returns the SPNEGO auth to be used for the http requests made on behalf of the principal.
+        The auth replays the hadoop.auth cookie of the principal and negotiates only when it is rejected.
+        A new auth has to be used by each thread as the negotiation state is kept in the auth object.
+
+        Keyword arguments:
+            principal {str} -- user principal
+
+        Returns:
+            auth {SpnegoCookieAuth} -- Kerberos auth using the principal's credential cache
+        """
+        from requests_kerberos import REQUIRED
+        from service.security.spnego_auth import SpnegoCookieAuth
+        return SpnegoCookieAuth(mutual_authentication=REQUIRED, sanitize_mutual_error_response=False,
+                                principal=principal)
+
+    @classmethod
+    def invalidate_ticket(cls, principal):
+        """Forgets the cached ticket of the principal so that the next request runs kinit again."""
+        cls._ticket_expiry.pop(principal, None)
+
+    @classmethod
+    def __is_ticket_valid(cls, principal):
+        expiry = cls._ticket_expiry.get(principal)
+        if expiry is None:
+            return False
+        renew_margin = int(Environment().get_kerberos_ticket_renew_margin())
+        return time.time() + renew_margin < expiry
+
+    @classmethod
+    def __get_principal_lock(cls, principal):
+        lock = cls._principal_locks.get(principal)
+        if lock is None:
+            with cls._locks_lock:
+                lock = cls._principal_locks.setdefault(principal, threading.Lock())
+        return lock
+
+    @classmethod
+    def __get_ticket_expiry(cls, principal):
+        """
+        Reads the expiry time of the ticket granting ticket using klist. Falls back to the configured
+        ticket lifetime when the klist output can not be parsed.
+        """
+        from subprocess import Popen, PIPE
+
+        try:
+            subp = Popen(["/usr/bin/klist", "-c", cls.get_credential_cache(principal)], stdin=PIPE, stdout=PIPE, stderr=PIPE)
+            stdout, _ = subp.communicate()
+            if subp.returncode == 0:
+                for line in stdout.decode("utf-8", errors="ignore").splitlines():
+                    tokens = line.split()
+                    # Valid starting       Expires              Service principal
+                    # 10/16/2026 10:00:00  10/16/2026 20:00:00  krbtgt/REALM@REALM
+                    if len(tokens) >= 5 and tokens[4].startswith("krbtgt/"):
+                        expires = "{} {}".format(tokens[2], tokens[3])
+                        for date_format in cls.KLIST_DATE_FORMATS:
+                            try:
+                                return datetime.datetime.strptime(expires, date_format).timestamp()
+                            except ValueError:
+                                continue
+        except Exception:
+            logger.log_warning("Failed to read the ticket expiry for principal {}".format(principal), exc_info=True)
+
+        return time.time() + int(Environment().get_kerberos_ticket_lifetime())
+
     @classmethod
-    def renew_kinit(cls, keytab, principal, exit_on_fail=True):
+    def renew_kinit(cls, keytab, principal, exit_on_fail=True, ccache=None):
         """
         Renew kerberos token from keytab
 
@@ -23,6 +168,7 @@ class KerberosUtil:
             keytab -- keytab file
             principal {str} -- user principal
             exit_on_fail {bool} -- exit operation on fail flag
+            ccache {str} -- credential cache to store the ticket in, defaults to the process default cache
 
         Returns:
             operation returncode
@@ -32,6 +178,8 @@ class KerberosUtil:
         import sys
 
         kinit_args = ['/usr/bin/kinit', '-kt', keytab, principal]
+        if ccache is not None:
+            kinit_args[1:1] = ['-c', ccache]
         subp = Popen(kinit_args, stdin=PIPE, stdout=PIPE, stderr=PIPE)
         subp.wait()
         if subp.returncode != 0:
@@ -44,3 +192,4 @@ class KerberosUtil:
                 sys.exit(subp.returncode)
             else:
                 return subp.returncode
+        return subp.returncode
@@ -13,16 +13,30 @@
 
 # Supress info and warning logs from requests and urllib3
 import logging
+import threading
 from http import HTTPStatus
+from http.cookiejar import DefaultCookiePolicy
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from service.utils import constants
+from service.utils.environment import Environment
+
 logging.getLogger("requests").setLevel(logging.CRITICAL)
 logging.getLogger("urllib3").setLevel(logging.CRITICAL)
 
 
+class _RejectAllCookiesPolicy(DefaultCookiePolicy):
+    """Cookie policy that never stores cookies in the jar of a shared session.
+    Pooled sessions are used by every user of the process, so a cookie set for
+    one principal must never be replayed for another."""
+
+    def set_ok(self, cookie, request):
+        return False
+
+
 class RestUtil:
 
     RETRY_COUNT = 6
@@ -32,6 +46,10 @@ class RestUtil:
         HTTPStatus.SERVICE_UNAVAILABLE,
         HTTPStatus.GATEWAY_TIMEOUT)
 
+    # Long lived sessions keyed by upstream and retry policy
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
     @staticmethod
     def override_response_encoding(r, *args, **kwargs):
         if r.encoding is None:
@@ -40,28 +58,80 @@ class RestUtil:
 
     @classmethod
     def request_with_retry(cls, session=None, method_list=[], retry_count=RETRY_COUNT, **kwargs):
-        session = session or requests.Session()
-        session.hooks['response'].append(RestUtil.override_response_encoding)
-        if kwargs.get("verify_ssl") is False:
-            session.verify = False
+        """
+        Returns a session configured to retry on connection errors and on the retry status codes.
+
+        When no session is passed, a process wide pooled session is returned for the combination of
+        upstream and retry policy, so that the TCP/TLS connections are reused across requests.
 
+        Keyword arguments:
+            session {requests.Session} -- Session to configure instead of using a pooled one
+            method_list {list} -- Additional HTTP methods to be retried
+            retry_count {int} -- Number of retries
+            upstream {str} -- Name of the upstream service the session is used for, eg. webhdfs or livy
+            additional_retry_status_codes {tuple} -- Additional status codes on which the request is retried
+            connect_retry_count {int} -- Number of retries on connection errors
+            back_off_factor {float} -- Back off factor between the retries
+            verify_ssl {bool} -- Flag indicating if the SSL certificates should be verified
+
+        Returns:
+            session {requests.Session} -- Session with the retry adapter mounted
+        """
         # some requests might want to pass other status on which they have to be retried.
         # such status should be passed as a tuple
+        status_codes = cls.RETRY_AFTER_STATUS_CODES
         additional_retry_status_codes = kwargs.get(
             "additional_retry_status_codes", None)
         if additional_retry_status_codes:
-            cls.RETRY_AFTER_STATUS_CODES = cls.RETRY_AFTER_STATUS_CODES + \
-                additional_retry_status_codes
+            status_codes = status_codes + tuple(
+                code for code in additional_retry_status_codes if code not in status_codes)
         # Get connection retry count from arguments. If not provided, default to retry_count.
         connect_retry_count = kwargs.get(
             "connect_retry_count", retry_count)
         #  Construct an iterable set of method to retry.
-        method_list = {item for item in method_list +
-                       list(Retry.DEFAULT_METHOD_WHITELIST)}
+        method_list = frozenset(method_list + list(Retry.DEFAULT_METHOD_WHITELIST))
 
         back_off_factor = cls.BACK_OFF_FACTOR
         if kwargs.get("back_off_factor") is not None:
             back_off_factor = kwargs.get("back_off_factor")
+        verify_ssl = kwargs.get("verify_ssl") is not False
+
+        if session is not None:
+            cls.__configure_session(session, method_list, retry_count, connect_retry_count,
+                                    back_off_factor, status_codes, verify_ssl)
+            return session
+
+        key = (kwargs.get("upstream"), method_list, retry_count, connect_retry_count,
+               back_off_factor, tuple(sorted(int(code) for code in status_codes)), verify_ssl)
+        session = cls._sessions.get(key)
+        if session is None:
+            with cls._sessions_lock:
+                session = cls._sessions.get(key)
+                if session is None:
+                    session = requests.Session()
+                    # The cookies of one user must not leak into the requests of another user
+                    session.cookies.set_policy(_RejectAllCookiesPolicy())
+                    cls.__configure_session(session, method_list, retry_count, connect_retry_count,
+                                            back_off_factor, status_codes, verify_ssl)
+                    cls._sessions[key] = session
+        return session
+
+    @classmethod
+    def close_sessions(cls):
+        """Closes all the pooled sessions and their connections."""
+        with cls._sessions_lock:
+            for session in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
+
+    @classmethod
+    def __configure_session(cls, session, method_list, retry_count, connect_retry_count, back_off_factor,
+                            status_codes, verify_ssl):
+        if cls.override_response_encoding not in session.hooks['response']:
+            session.hooks['response'].append(cls.override_response_encoding)
+        if verify_ssl is False:
+            session.verify = False
+
         retry = Retry(
             total=retry_count,
             read=retry_count,
@@ -70,9 +140,11 @@ class RestUtil:
             # Time delay between requests is calculated using
             # {backoff factor} * (2 ^ ({number of total retries} - 1)) seconds
             backoff_factor=back_off_factor,
-            status_forcelist=cls.RETRY_AFTER_STATUS_CODES,
+            status_forcelist=status_codes,
         )
-        adapter = HTTPAdapter(max_retries=retry)
+        # Size the connection pools so that every request thread of the worker can hold a connection
+        pool_maxsize = int(Environment().get_http_pool_maxsize())
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=constants.HTTP_POOL_CONNECTIONS,
+                              pool_maxsize=pool_maxsize)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
-        return session
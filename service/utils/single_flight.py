@@ -0,0 +1,95 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import fcntl
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+
+class _Call:
+    """A call in flight, the callers waiting for it are woken up when it is done"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coordinates the concurrent calls made with the same key, so that only one of them runs at a time.
+    With shared results, the callers arriving while a call is in flight wait for it and get its result
+    instead of running their own. A call which fails isn't shared, the waiting callers then run theirs.
+    """
+
+    def __init__(self):
+        self.__calls = {}
+        self.__lock = threading.Lock()
+
+    def do(self, key, function, shared=True):
+        """
+        Runs the function unless a call with the key is in flight
+
+        Keyword arguments:
+            key {hashable} -- Key identifying the calls to be coordinated
+            function {callable} -- Function to be called without arguments
+            shared {bool} -- Flag indicating if the result of the call in flight can be returned to the other callers
+
+        Returns:
+            (result, is_shared) -- The result of the function, and a flag set when it was returned by another call
+        """
+        while True:
+            with self.__lock:
+                call = self.__calls.get(key)
+                if call is None:
+                    call = self.__calls[key] = _Call()
+                    break
+            call.done.wait()
+            if shared and call.error is None:
+                return call.result, True
+
+        try:
+            call.result = function()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+
+
+@contextmanager
+def file_lock(lock_dir, key):
+    """
+    Holds an exclusive lock shared by the processes of the host, none when no lock directory is given
+
+    Keyword arguments:
+        lock_dir {str} -- Local directory holding the lock files
+        key {str} -- Key identifying the lock
+    """
+    if not lock_dir:
+        yield
+        return
+
+    os.makedirs(lock_dir, exist_ok=True)
+    lock_path = os.path.join(lock_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".lock")
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
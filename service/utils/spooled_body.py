@@ -0,0 +1,157 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import hashlib
+import io
+import tempfile
+
+from service.utils import constants
+from service.utils.environment import Environment
+
+
+class SpooledBody:
+    """
+    Body of an upload read once from the client and sent to HDFS, possibly several times.
+    The body is copied into a spool while it is sent the first time, so that it can be sent again
+    on a retry. The spool is held in memory up to a threshold and spills to a local file above it,
+    so the memory used by an upload stays bounded whatever its size.
+
+    Usage:
+        body = SpooledBody(request.stream, request.content_length)
+        try:
+            requests.put(url, data=body.get_reader())
+            ...
+            requests.put(url, data=body.get_reader())
+        finally:
+            body.close()
+    """
+
+    def __init__(self, stream, length=None):
+        """
+        Keyword arguments:
+            stream {file} -- Stream of the body, or the bytes of the body
+            length {int} -- Length of the body when known
+        """
+        if isinstance(stream, (bytes, bytearray)):
+            length = len(stream)
+            stream = io.BytesIO(stream)
+        self.stream = stream
+        self.length = length
+        self.spool = tempfile.SpooledTemporaryFile(max_size=int(Environment().get_upload_spool_max_memory_size()),
+                                                   dir=Environment().get_upload_spool_dir())
+        self.received = 0
+        self.complete = False
+        self.sha256 = hashlib.sha256()
+
+    def get_reader(self):
+        """
+        Returns a file like object with the body, to be passed as the data of a request.
+        Readers can be rewound, urllib3 seeks back to the start of the body on its retries.
+        """
+        if self.length is None:
+            # The length must be known before sending, the body is spooled first
+            self.__drain()
+            return _BodyReader(self, self.received)
+        return _BodyReader(self, self.length)
+
+    def get_sha256(self):
+        """Returns the SHA-256 digest of the body as a hex string"""
+        self.__drain()
+        return self.sha256.hexdigest()
+
+    def read_at(self, position, size):
+        """Reads the body at the position, from the client stream when it wasn't read that far yet"""
+        while position > self.received and not self.complete:
+            self.__read_stream(min(position - self.received, constants.UPLOAD_CHUNK_SIZE))
+        if position < self.received:
+            self.spool.seek(position)
+            return self.spool.read(min(size, self.received - position))
+        return self.__read_stream(size)
+
+    def close(self):
+        self.spool.close()
+
+    def __read_stream(self, size):
+        data = self.stream.read(size) if not self.complete else b""
+        if not data:
+            self.complete = True
+            return b""
+        self.spool.seek(0, io.SEEK_END)
+        self.spool.write(data)
+        self.sha256.update(data)
+        self.received += len(data)
+        return data
+
+    def __drain(self):
+        while not self.complete:
+            self.__read_stream(constants.UPLOAD_CHUNK_SIZE)
+
+
+class _BodyReader:
+    """Reads the body in chunks of bounded size, requests sends it with its length as Content-Length"""
+
+    def __init__(self, body, length):
+        self.body = body
+        self.length = length
+        self.position = 0
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        while True:
+            data = self.read(constants.UPLOAD_CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.length
+        self.position = max(0, min(offset, self.length))
+        return self.position
+
+    def read(self, size=-1):
+        # Like a raw stream, a read returns at most one chunk
+        remaining = self.length - self.position
+        if remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self.body.read_at(self.position, min(size, constants.UPLOAD_CHUNK_SIZE))
+        self.position += len(data)
+        return data
+
+
+class PeekedStream:
+    """Stream of a body whose first byte is read ahead, telling whether the body is empty without consuming it"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.head = stream.read(1)
+
+    def is_empty(self):
+        return not self.head
+
+    def read(self, size=-1):
+        if not self.head:
+            return self.stream.read(size)
+        head, self.head = self.head, b""
+        if size is None or size < 0:
+            return head + self.stream.read()
+        return head + self.stream.read(size - 1) if size > 1 else head
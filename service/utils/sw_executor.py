@@ -0,0 +1,56 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from service.utils.sw_singleton import SwSingleton
+
+
+class SwExecutor(metaclass=SwSingleton):
+    """
+    Thread pools shared by all the requests served by the worker. Each kind of work gets its own pool,
+    so that a task never waits for a task queued behind it in the same pool.
+    """
+
+    def __init__(self):
+        self.__pools = {}
+        self.__lock = threading.Lock()
+
+    def get_pool(self, name, max_workers):
+        """
+        Returns the pool with the given name, it is created with max_workers threads on first use
+
+        Keyword arguments:
+            name {str} -- Name of the pool
+            max_workers {int} -- Maximum number of threads of the pool
+
+        Returns:
+             pool {ThreadPoolExecutor} -- The shared pool
+        """
+        pool = self.__pools.get(name)
+        if pool is None:
+            with self.__lock:
+                pool = self.__pools.get(name)
+                if pool is None:
+                    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+                    self.__pools[name] = pool
+        return pool
+
+    def shutdown(self, wait=False):
+        """Shuts the pools down when the worker exits, the tasks already running are not interrupted"""
+        with self.__lock:
+            pools = list(self.__pools.values())
+            self.__pools = {}
+        for pool in pools:
+            pool.shutdown(wait=wait)
@@ -50,3 +50,20 @@ class SwSessionManager(metaclass=Singleton):
             return self.sw_session.session
         except AttributeError:
             return None
+
+    def bind_session(self, function):
+        """
+        Returns a function calling the given function with the session of the calling thread,
+        to be run in worker threads
+        """
+        session = self.get_session()
+
+        def run_with_session(*args, **kwargs):
+            previous_session = self.get_session()
+            self.set_session(session)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.set_session(previous_session)
+
+        return run_with_session
@@ -0,0 +1,101 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import tarfile
+import zlib
+
+from service.exception.exceptions import ServiceError
+
+
+class TarStream:
+    """
+    Builds a tar archive, optionally gzip compressed, one member at a time without buffering the members.
+    Every method returns the archive bytes that are ready to be sent.
+
+    Usage:
+        tar = TarStream()
+        yield tar.add_file(name, size, mtime)
+        for chunk in chunks:
+            yield tar.write(chunk)
+        yield tar.end_file()
+        yield tar.close()
+    """
+
+    def __init__(self, compress=True):
+        # wbits of 31 writes the gzip header and trailer
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        self.offset = 0
+        self.name = None
+        self.remaining = 0
+        self.padding = 0
+
+    def add_directory(self, name, mtime=0, mode=0o755):
+        info = tarfile.TarInfo(name)
+        info.type = tarfile.DIRTYPE
+        info.mtime = mtime
+        info.mode = mode
+        return self.__output(info.tobuf(tarfile.DEFAULT_FORMAT, "utf-8", "surrogateescape"))
+
+    def add_file(self, name, size, mtime=0, mode=0o644):
+        """Starts a file member of the given size, its content has to be passed to write() next"""
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = mtime
+        info.mode = mode
+        self.name = name
+        self.remaining = size
+        self.padding = (tarfile.BLOCKSIZE - size % tarfile.BLOCKSIZE) % tarfile.BLOCKSIZE
+        return self.__output(info.tobuf(tarfile.DEFAULT_FORMAT, "utf-8", "surrogateescape"))
+
+    def write(self, chunk):
+        """
+        Writes content of the current file member. The file changed since its size was declared in the member
+        header if the content goes beyond it, the archive can't be completed then.
+
+        Returns:
+            bytes {bytes} -- The archive bytes ready to be sent
+        """
+        if len(chunk) > self.remaining:
+            raise ServiceError("The file {} changed while being archived.".format(self.name))
+        self.remaining -= len(chunk)
+        return self.__output(chunk)
+
+    def end_file(self):
+        """
+        Ends the current file member, which must have got all the content declared in its header
+
+        Returns:
+            bytes {bytes} -- The archive bytes ready to be sent
+        """
+        if self.remaining:
+            raise ServiceError("The file {} changed while being archived.".format(self.name))
+        data = b"\0" * self.padding
+        self.remaining = 0
+        self.padding = 0
+        return self.__output(data)
+
+    def close(self):
+        # End of archive marker, padded to a full record like tarfile does
+        data = b"\0" * (tarfile.BLOCKSIZE * 2)
+        blocks_end = self.offset + len(data)
+        data += b"\0" * ((tarfile.RECORDSIZE - blocks_end % tarfile.RECORDSIZE) % tarfile.RECORDSIZE)
+        output = self.__output(data)
+        if self.compressor is not None:
+            output += self.compressor.flush()
+        return output
+
+    def __output(self, data):
+        self.offset += len(data)
+        if self.compressor is not None:
+            return self.compressor.compress(data)
+        return data
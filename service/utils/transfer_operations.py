@@ -0,0 +1,313 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from flask import current_app, has_app_context, send_file
+
+from service.exception.exceptions import BadRequestError, ObjectNotFoundError, ServiceError
+from service.utils import constants
+from service.utils.environment import Environment
+from service.utils.sw_executor import SwExecutor
+from service.utils.sw_logger import SwLogger
+from service.utils.sw_session_manager import SwSessionManager
+from service.utils.sw_singleton import SwSingleton
+from service.utils.transfer_stats import TransferStats
+
+logger = SwLogger(__name__)
+
+# Pool running the transfers, kept apart from the pools the transfers use themselves
+TRANSFERS_POOL = "transfers"
+OPERATION_ID_PATTERN = re.compile("^[0-9a-f]{32}$")
+
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+
+class TransferOperations(metaclass=SwSingleton):
+    """
+    Transfers run in the background of the worker, so that the request starting them returns right away.
+    The state of each operation is kept in a JSON file of a local directory, along with the content uploaded
+    by the client and the content to be downloaded by the client. The state of a running operation is saved
+    periodically with its progress, the workers of the host can hence report on the operations of each other.
+
+    Usage:
+        operation = TransferOperations().start("download", path, owner, download, input_stream=None)
+        operation = TransferOperations().get(operation["id"], owner)
+    """
+
+    def __init__(self):
+        self.directory = Environment().get_transfer_operations_dir() or \
+            os.path.join(tempfile.gettempdir(), "wos_transfer_operations")
+        os.makedirs(self.directory, exist_ok=True)
+        self.ttl = int(Environment().get_transfer_operations_ttl())
+        self.max_concurrency = int(Environment().get_transfer_operations_max_concurrency())
+        self.__running = {}
+        self.__lock = threading.Lock()
+        self.__progress_thread = None
+
+    def start(self, operation_type, path, owner, function, input_stream=None):
+        """
+        Starts the operation in the background
+
+        Keyword arguments:
+            operation_type {str} -- Type of the operation, such as upload or download
+            path {str} -- Path of the file or directory transferred
+            owner {str} -- User the operation is run for, the only one allowed to query it
+            function {callable} -- Function doing the transfer, called with the transfer stats to be updated,
+                the input file and the path of the result file. It returns the result of the operation.
+            input_stream {file} -- Content sent by the client, saved before returning
+
+        Returns:
+             operation {dict} -- The state of the operation
+        """
+        self.__remove_expired()
+        operation_id = uuid.uuid4().hex
+        now = time.time()
+        state = {
+            "id": operation_id,
+            "type": operation_type,
+            "path": path,
+            "owner": owner,
+            "pid": os.getpid(),
+            "status": RUNNING,
+            "created_at": now,
+            "updated_at": now,
+            "progress": None,
+            "result": None,
+            "error": None
+        }
+        input_path = None
+        if input_stream is not None:
+            # The request stream is gone once the response is sent, the content is read first
+            input_path = self.__get_path(operation_id, "input")
+            with open(input_path, "wb") as input_file:
+                shutil.copyfileobj(input_stream, input_file, constants.UPLOAD_CHUNK_SIZE)
+
+        transfer_stats = TransferStats("{} of {}".format(operation_type.capitalize(), path))
+        state["progress"] = self.__get_progress(transfer_stats)
+        self.__save(state)
+        with self.__lock:
+            self.__running[operation_id] = (state, transfer_stats)
+            self.__start_progress_thread()
+
+        run = SwSessionManager().bind_session(self.__run)
+        app = current_app._get_current_object() if has_app_context() else None
+        pool = SwExecutor().get_pool(TRANSFERS_POOL, self.max_concurrency)
+        pool.submit(run, app, state, transfer_stats, function, input_path)
+        logger.log_info("Started the {0} operation {1} of {2}".format(operation_type, operation_id, path))
+        return self.__get_public_state(state)
+
+    def get(self, operation_id, owner):
+        """Returns the state of the operation with its progress"""
+        return self.__get_public_state(self.__load(operation_id, owner))
+
+    def send_result(self, operation_id, owner):
+        """
+        Sends the content downloaded by a finished operation
+
+        Returns:
+             response -- Flask response sending the result file, ranges and conditional requests are supported
+        """
+        state = self.__load(operation_id, owner)
+        result_path = self.__get_path(operation_id, "result")
+        if state["status"] != FINISHED or not os.path.exists(result_path):
+            raise ObjectNotFoundError("Operation {} has no content to download.".format(operation_id))
+        result = state["result"]
+        response = send_file(result_path, mimetype=result.get("content_type") or "application/octet-stream",
+                             conditional=True)
+        # send_file marks the response as publicly cacheable, the content belongs to the owner of the operation
+        response.headers["Cache-Control"] = "private, no-store"
+        if result.get("content_disposition"):
+            response.headers["Content-Disposition"] = result["content_disposition"]
+        return response
+
+    def delete(self, operation_id, owner):
+        """Deletes a finished operation along with its content"""
+        state = self.__load(operation_id, owner)
+        if state["status"] == RUNNING:
+            raise BadRequestError("Operation {} is still running.".format(operation_id))
+        self.__remove(operation_id)
+
+    @staticmethod
+    def save_response(response, result_path, transfer_stats=None):
+        """
+        Writes the content of a download response to the result file
+
+        Keyword arguments:
+            response {Response} -- Response streaming the content
+            result_path {str} -- Path of the result file
+            transfer_stats {TransferStats} -- Stats counting the bytes written, when not counted by the download
+
+        Returns:
+             result {dict} -- The size of the content and the headers needed to send it
+        """
+        size = 0
+        try:
+            with open(result_path, "wb") as result_file:
+                for chunk in response.response:
+                    result_file.write(chunk)
+                    size += len(chunk)
+                    if transfer_stats is not None:
+                        transfer_stats.add_bytes(len(chunk))
+        finally:
+            response.close()
+        return {
+            "size": size,
+            "content_type": response.headers.get("Content-Type"),
+            "content_disposition": response.headers.get("Content-Disposition")
+        }
+
+    def __run(self, app, state, transfer_stats, function, input_path):
+        operation_id = state["id"]
+        input_file = None
+        try:
+            if input_path is not None:
+                input_file = open(input_path, "rb")
+            if app is not None:
+                # Downloads may answer with send_file, which needs a request context
+                with app.test_request_context():
+                    result = function(transfer_stats, input_file, self.__get_path(operation_id, "result"))
+            else:
+                result = function(transfer_stats, input_file, self.__get_path(operation_id, "result"))
+            state["status"] = FINISHED
+            state["result"] = result
+            transfer_stats.finish()
+            logger.log_info("The {0} operation {1} finished. {2}".format(state["type"], operation_id, transfer_stats))
+        except Exception as e:
+            logger.log_exception("The {0} operation {1} failed".format(state["type"], operation_id), exc_info=True)
+            state["status"] = FAILED
+            state["error"] = e.message if isinstance(e, ServiceError) else str(e)
+        finally:
+            if input_file is not None:
+                input_file.close()
+            if input_path is not None:
+                self.__remove_file(input_path)
+            transfer_stats.finish()
+            with self.__lock:
+                self.__running.pop(operation_id, None)
+            state["progress"] = self.__get_progress(transfer_stats)
+            state["updated_at"] = time.time()
+            self.__save(state)
+
+    def __start_progress_thread(self):
+        if self.__progress_thread is None or not self.__progress_thread.is_alive():
+            self.__progress_thread = threading.Thread(target=self.__save_progress, name="transfer-progress",
+                                                      daemon=True)
+            self.__progress_thread.start()
+
+    def __save_progress(self):
+        """Saves the progress of the running operations until none is left"""
+        while True:
+            time.sleep(constants.TRANSFER_PROGRESS_SAVE_INTERVAL)
+            with self.__lock:
+                running = list(self.__running.values())
+                if not running:
+                    self.__progress_thread = None
+                    return
+            for state, transfer_stats in running:
+                if state["status"] == RUNNING:
+                    state["progress"] = self.__get_progress(transfer_stats)
+                    state["updated_at"] = time.time()
+                    self.__save(state)
+
+    def __load(self, operation_id, owner):
+        if not OPERATION_ID_PATTERN.match(operation_id or ""):
+            raise ObjectNotFoundError("Operation {} not found.".format(operation_id))
+        with self.__lock:
+            running = self.__running.get(operation_id)
+        if running is not None:
+            # The live progress of the operations of this worker
+            state, transfer_stats = running
+            state = dict(state, progress=self.__get_progress(transfer_stats))
+        else:
+            try:
+                with open(self.__get_path(operation_id, "json")) as state_file:
+                    state = json.load(state_file)
+            except (OSError, ValueError):
+                raise ObjectNotFoundError("Operation {} not found.".format(operation_id))
+            if state["status"] == RUNNING and not self.__is_alive(state["pid"]):
+                state["status"] = FAILED
+                state["error"] = "The operation was interrupted by the restart of the worker running it."
+        if state.get("owner") != owner:
+            raise ObjectNotFoundError("Operation {} not found.".format(operation_id))
+        return state
+
+    def __save(self, state):
+        # Written to a temporary file first, so that readers never see a partial state
+        state_path = self.__get_path(state["id"], "json")
+        temp_path = "{}.{}.tmp".format(state_path, threading.get_ident())
+        with open(temp_path, "w") as state_file:
+            json.dump(state, state_file)
+        os.replace(temp_path, state_path)
+
+    def __remove_expired(self):
+        """Removes the operations which ended more than the time to live ago"""
+        expiry = time.time() - self.ttl
+        for file_name in os.listdir(self.directory):
+            operation_id, _, extension = file_name.partition(".")
+            if extension != "json" or not OPERATION_ID_PATTERN.match(operation_id):
+                continue
+            try:
+                with open(os.path.join(self.directory, file_name)) as state_file:
+                    state = json.load(state_file)
+            except (OSError, ValueError):
+                continue
+            ended = state["status"] != RUNNING or not self.__is_alive(state["pid"])
+            if ended and state["updated_at"] < expiry:
+                self.__remove(operation_id)
+
+    def __remove(self, operation_id):
+        for extension in ["input", "result", "json"]:
+            self.__remove_file(self.__get_path(operation_id, extension))
+
+    def __get_path(self, operation_id, extension):
+        return os.path.join(self.directory, "{}.{}".format(operation_id, extension))
+
+    @staticmethod
+    def __remove_file(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def __is_alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    @staticmethod
+    def __get_progress(transfer_stats):
+        return {
+            "bytes": transfer_stats.bytes,
+            "files": transfer_stats.files,
+            "duration": round(transfer_stats.get_duration(), 3),
+            "bytes_per_second": round(transfer_stats.get_throughput())
+        }
+
+    @staticmethod
+    def __get_public_state(state):
+        return {k: v for k, v in state.items() if k not in ["owner", "pid"]}
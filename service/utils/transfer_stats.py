@@ -0,0 +1,83 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import threading
+import time
+
+
+class TransferStats:
+    """Counters of a single transfer between HDFS and the client, updated by the threads doing the transfer"""
+
+    def __init__(self, name):
+        self.name = name
+        self.start_time = time.time()
+        self.end_time = None
+        self.bytes = 0
+        self.files = 0
+        self.segments = 0
+        self.retries = 0
+        self.concurrency = 0
+        self.max_concurrency = 0
+        self.__lock = threading.Lock()
+
+    def add_bytes(self, count):
+        with self.__lock:
+            self.bytes += count
+
+    def add_file(self):
+        with self.__lock:
+            self.files += 1
+
+    def add_segment(self, count):
+        with self.__lock:
+            self.segments += 1
+            self.bytes += count
+
+    def add_retry(self):
+        with self.__lock:
+            self.retries += 1
+
+    def set_concurrency(self, concurrency):
+        self.concurrency = concurrency
+        self.max_concurrency = max(self.max_concurrency, concurrency)
+
+    def finish(self):
+        if self.end_time is None:
+            self.end_time = time.time()
+
+    def get_duration(self):
+        return (self.end_time or time.time()) - self.start_time
+
+    def get_throughput(self):
+        """Returns the throughput in bytes per second"""
+        duration = self.get_duration()
+        return self.bytes / duration if duration > 0 else 0
+
+    def __str__(self):
+        return "{0}: {1} bytes, {2} files, {3} segments in {4:.3f} seconds ({5:.2f} MiB/s), " \
+               "{6} retries, concurrency of up to {7}".format(
+                   self.name, self.bytes, self.files, self.segments, self.get_duration(),
+                   self.get_throughput() / (1024 * 1024), self.retries, self.max_concurrency)
+
+
+class StatsReader:
+    """File like object counting the bytes read from the stream it wraps into the transfer stats"""
+
+    def __init__(self, stream, transfer_stats):
+        self.stream = stream
+        self.transfer_stats = transfer_stats
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.transfer_stats.add_bytes(len(data))
+        return data
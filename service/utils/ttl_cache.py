@@ -0,0 +1,81 @@
+# ----------------------------------------------------------------------------------------------------
+# (C) Copyright IBM Corp. 2020.  All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+# an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations under the License.
+# ----------------------------------------------------------------------------------------------------
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TtlCache:
+    """
+    Thread safe cache bounded by number of entries, where each entry expires after a time to live.
+    The least recently used entries are evicted first when the cache is full.
+
+    Usage:
+        cache = TtlCache(max_size=1000, ttl=30)
+        cache.put(key, value)
+        value = cache.get(key)
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Returns the value of the key if present and not expired"""
+        value, expired = self.get_entry(key)
+        if value is None or expired:
+            return default
+        return value
+
+    def get_entry(self, key):
+        """
+        Returns the value of the key along with a flag indicating if it is expired.
+        Expired entries are returned so that callers can revalidate them instead of fetching them again.
+
+        Returns:
+            (value, expired) -- (None, True) when the key is not in the cache
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None, True
+            self.entries.move_to_end(key)
+            value, expiry = entry
+            return value, time.time() >= expiry
+
+    def put(self, key, value, ttl=None):
+        with self.lock:
+            self.entries[key] = (value, time.time() + (self.ttl if ttl is None else ttl))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def remove(self, key):
+        with self.lock:
+            return self.entries.pop(key, (None, None))[0]
+
+    def remove_if(self, predicate):
+        """Removes all the entries for which predicate(key, value) is true"""
+        with self.lock:
+            for key in [k for k, (v, _) in self.entries.items() if predicate(k, v)]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)